@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Simulator Benchmarks
+
+Micro and throughput benchmarks for the simulator hot paths:
+- cc_encode / sysex_*_encode: YamahaSimulator encoders into a null MIDI output
+- cc_encode_metrics:          cc_encode with live metrics recording (sim_metrics.py)
+- osc_ypr_encode:             the /ypr encoder used by HeadTrackerSimulator's sender
+- mapping_load:               loading data/midi_mapping.json through its compiled cache
+- mapping_compile:            parsing, validating and compiling it without the cache
+- midi_parse:                 streaming parser (midi_parser.py) over running-status CCs, per message
+- osc_dispatch_*:             OSC address -> handler at 400 patterns (osc_dispatch.py): segment
+                              trie, one alternation regex, and a linear scan of per-pattern regexes
+- loopback_send_*:            paced /ypr sending to a 127.0.0.1 UDP receiver at
+                              several target rates (0 = as fast as possible)
+
+Results are written as JSON with environment metadata. Two result files can be
+compared; any benchmark that got worse by more than the threshold is flagged
+and the command exits non-zero.
+
+Usage:
+    python benchmarks.py run --out baseline.json
+    python benchmarks.py run --quick --only encode
+    python benchmarks.py compare baseline.json current.json --threshold 10
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'bridgehead_headtracker_sim'))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'yamaha_02r96_sim'))
+
+from rotation_schemas import RotationSender, compile_schemas, load_schemas
+from mapping_cache import load_compiled
+from midi_parser import MidiParser
+from osc_dispatch import benchmark_addresses, benchmark_patterns, build_dispatcher
+from sim_clock import REAL_CLOCK
+from sim_metrics import MetricsRegistry
+from stream_integrity import SequenceStamper
+from yamaha_02r96_simulator import YamahaSimulator
+
+LOOPBACK_RATES = [1000, 10000, 0]  # messages per second, 0 = unpaced
+OSC_DISPATCH_PATTERNS = 400  # handler patterns in the osc_dispatch_* benchmarks
+DEFAULT_THRESHOLD = 10.0  # percent
+
+
+class NullMidiOut:
+    """MIDI output that discards everything (measures encoding only)"""
+
+    def send_message(self, message):
+        pass
+
+
+def measure(run: Callable[[int], None], number: int, repeat: int) -> Dict[str, Any]:
+    """Time run(number) `repeat` times and report nanoseconds per operation"""
+    run(max(1, number // 10))  # warm-up
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            run(number)
+            times.append((time.perf_counter_ns() - started) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    median = statistics.median(times)
+    return {
+        'value': median, 'unit': 'ns/op', 'higher_is_better': False,
+        'min': min(times), 'max': max(times), 'ops_per_sec': 1e9 / median,
+        'number': number, 'repeat': repeat,
+    }
+
+
+# Benchmarks
+
+def bench_cc_encode(number: int, repeat: int) -> Dict[str, Any]:
+    simulator = YamahaSimulator(verbose=False, midiout=NullMidiOut())
+
+    def run(n):
+        send = simulator.send_track_volume
+        for i in range(n):
+            send(i % 48 + 1, i & 0x7F)
+    return measure(run, number, repeat)
+
+
+def bench_cc_encode_metrics(number: int, repeat: int) -> Dict[str, Any]:
+    simulator = YamahaSimulator(verbose=False, midiout=NullMidiOut(), metrics=MetricsRegistry())
+
+    def run(n):
+        send = simulator.send_track_volume
+        for i in range(n):
+            send(i % 48 + 1, i & 0x7F)
+    return measure(run, number, repeat)
+
+
+def bench_sysex_solo_encode(number: int, repeat: int) -> Dict[str, Any]:
+    simulator = YamahaSimulator(verbose=False, midiout=NullMidiOut())
+
+    def run(n):
+        send = simulator.send_track_solo
+        for i in range(n):
+            send(i % 48 + 1, i & 1 == 0)
+    return measure(run, number, repeat)
+
+
+def bench_sysex_position_encode(number: int, repeat: int) -> Dict[str, Any]:
+    simulator = YamahaSimulator(verbose=False, midiout=NullMidiOut())
+
+    def run(n):
+        send = simulator.send_position_x
+        for i in range(n):
+            send(i % 48 + 1, i % 127 - 63)  # half of the values use the negative encoding
+    return measure(run, number, repeat)
+
+
+def bench_osc_ypr_encode(number: int, repeat: int) -> Dict[str, Any]:
+    encode = compile_schemas(load_schemas())['ypr'].encode
+
+    def run(n):
+        for i in range(n):
+            encode(i * 0.01, -i * 0.01, 0.5)
+    return measure(run, number, repeat)
+
+
+def bench_osc_ypr_stamped_encode(number: int, repeat: int) -> Dict[str, Any]:
+    encode = compile_schemas(load_schemas(), SequenceStamper())['ypr'].encode
+
+    def run(n):
+        for i in range(n):
+            encode(i * 0.01, -i * 0.01, 0.5)
+    return measure(run, number, repeat)
+
+
+def bench_mapping_load(number: int, repeat: int) -> Dict[str, Any]:
+    simulator = YamahaSimulator(verbose=False, midiout=NullMidiOut())
+
+    def run(n):
+        for _ in range(n):
+            simulator.load_mappings()
+    return measure(run, max(1, number // 100), repeat)
+
+
+def bench_mapping_compile(number: int, repeat: int) -> Dict[str, Any]:
+    def run(n):
+        for _ in range(n):
+            load_compiled(use_cache=False).device("Yamaha 02R96-1")
+    return measure(run, max(1, number // 100), repeat)
+
+
+def bench_midi_parse(number: int, repeat: int) -> Dict[str, Any]:
+    stream = memoryview(bytes([0xB0]) + bytes([1, 64]) * number)
+
+    def run(n):
+        feed = MidiParser().feed
+        data = stream[:1 + 2 * n]
+        for i in range(0, len(data), 4096):
+            feed(data[i:i + 4096])
+    return measure(run, number, repeat)
+
+
+def _bench_osc_dispatch(kind: str, number: int, repeat: int) -> Dict[str, Any]:
+    patterns = benchmark_patterns(OSC_DISPATCH_PATTERNS)
+    addresses = benchmark_addresses(patterns)
+    match = build_dispatcher(kind, patterns).match
+
+    def run(n):
+        for i in range(n):
+            match(addresses[i % len(addresses)])
+    # the baselines are 30-60x slower at this pattern count
+    return measure(run, number if kind == 'trie' else max(1, number // 20), repeat)
+
+
+def bench_osc_dispatch_trie(number: int, repeat: int) -> Dict[str, Any]:
+    return _bench_osc_dispatch('trie', number, repeat)
+
+
+def bench_osc_dispatch_regex(number: int, repeat: int) -> Dict[str, Any]:
+    return _bench_osc_dispatch('regex', number, repeat)
+
+
+def bench_osc_dispatch_linear(number: int, repeat: int) -> Dict[str, Any]:
+    return _bench_osc_dispatch('linear', number, repeat)
+
+
+def bench_loopback_send(rate: int, duration: float) -> Dict[str, Any]:
+    """Send /ypr to a local UDP receiver at a target rate and count what arrives"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.1)
+    received = 0
+    stop = threading.Event()
+
+    def receive():
+        nonlocal received
+        while not stop.is_set():
+            try:
+                receiver.recv(64)
+                received += 1
+            except socket.timeout:
+                pass
+
+    thread = threading.Thread(target=receive, daemon=True)
+    thread.start()
+    sender = RotationSender(compile_schemas(load_schemas())['ypr'], *receiver.getsockname())
+    interval = 1.0 / rate if rate else 0.0
+    lateness: List[float] = []
+    sent = 0
+    try:
+        started = time.perf_counter()
+        deadline = started + duration
+        due = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if rate:
+                if now < due:
+                    REAL_CLOCK.sleep_until(due)  # coarse sleep, then spin
+                    continue
+                lateness.append(now - due)
+                due += interval
+            sender.send(sent * 0.01, 0.0, 0.0)
+            sent += 1
+        elapsed = time.perf_counter() - started
+        time.sleep(0.2)  # let the receiver drain
+    finally:
+        stop.set()
+        thread.join()
+        sender.close()
+        receiver.close()
+
+    result = {
+        'value': sent / elapsed, 'unit': 'msg/s', 'higher_is_better': True,
+        'target_rate': rate, 'duration': elapsed, 'sent': sent, 'received': received,
+        'delivered': received / sent if sent else 0.0,
+    }
+    if lateness:
+        lateness.sort()
+        result['lateness_p50_us'] = lateness[len(lateness) // 2] * 1e6
+        result['lateness_p99_us'] = lateness[int(len(lateness) * 0.99)] * 1e6
+    return result
+
+
+MICRO_BENCHMARKS = {
+    'cc_encode': bench_cc_encode,
+    'cc_encode_metrics': bench_cc_encode_metrics,
+    'sysex_solo_encode': bench_sysex_solo_encode,
+    'sysex_position_encode': bench_sysex_position_encode,
+    'osc_ypr_encode': bench_osc_ypr_encode,
+    'osc_ypr_stamped_encode': bench_osc_ypr_stamped_encode,
+    'mapping_load': bench_mapping_load,
+    'mapping_compile': bench_mapping_compile,
+    'midi_parse': bench_midi_parse,
+    'osc_dispatch_trie': bench_osc_dispatch_trie,
+    'osc_dispatch_regex': bench_osc_dispatch_regex,
+    'osc_dispatch_linear': bench_osc_dispatch_linear,
+}
+
+
+def environment() -> Dict[str, Any]:
+    """Metadata needed to judge whether two result files are comparable"""
+    meta = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'hostname': platform.node(),
+    }
+    try:
+        meta['git_commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SIMULATORS_DIR,
+            capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        meta['git_commit'] = None
+    return meta
+
+
+def run_benchmarks(only: Optional[List[str]] = None, number: int = 20000, repeat: int = 7,
+                   rates: List[int] = LOOPBACK_RATES, duration: float = 1.0,
+                   verbose: bool = True) -> Dict[str, Any]:
+    """Run the selected benchmarks (substring match on name) and return the results document"""
+    def selected(name):
+        return not only or any(pattern in name for pattern in only)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, bench in MICRO_BENCHMARKS.items():
+        if selected(name):
+            results[name] = bench(number, repeat)
+            if verbose:
+                print(f"  {name:<28} {results[name]['value']:10.1f} ns/op")
+    for rate in rates:
+        name = f"loopback_send_{rate or 'max'}"
+        if selected(name):
+            results[name] = bench_loopback_send(rate, duration)
+            if verbose:
+                result = results[name]
+                print(f"  {name:<28} {result['value']:10.0f} msg/s  "
+                      f"({result['delivered'] * 100:.1f}% delivered)")
+    return {
+        'environment': environment(),
+        'settings': {'number': number, 'repeat': repeat, 'rates': rates, 'duration': duration},
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Compare benchmarks present in both documents; change is in percent, positive = worse"""
+    rows = []
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            continue
+        new = current['results'][name]
+        change = (new['value'] - base['value']) / base['value'] * 100.0
+        if base.get('higher_is_better'):
+            change = -change
+        rows.append({'name': name, 'unit': base['unit'], 'baseline': base['value'],
+                     'current': new['value'], 'change': change, 'regression': change > threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulator encoders, senders and parsers")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run benchmarks and write a JSON result file")
+    run.add_argument('--out', help="Result file (default: print only)")
+    run.add_argument('--only', nargs='+', help="Run only benchmarks whose name contains one of these")
+    run.add_argument('--quick', action='store_true', help="Fewer iterations and shorter loopback runs")
+    run.add_argument('--rates', type=int, nargs='+', default=LOOPBACK_RATES,
+                     help="Loopback target rates in msg/s (0 = unpaced)")
+
+    compare = commands.add_parser('compare', help="Compare two result files")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help="Flag changes worse than this many percent")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        print("▶ Running benchmarks")
+        if args.quick:
+            document = run_benchmarks(args.only, number=2000, repeat=3, rates=args.rates, duration=0.2)
+        else:
+            document = run_benchmarks(args.only, rates=args.rates)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(document, f, indent=2)
+            print(f"✓ Results written to {args.out}")
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r') as f:
+        current = json.load(f)
+    for key in ('machine', 'python', 'implementation'):
+        if baseline['environment'].get(key) != current['environment'].get(key):
+            print(f"⚠️ Environments differ in {key}: "
+                  f"{baseline['environment'].get(key)} vs {current['environment'].get(key)}")
+
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        mark = '✗' if row['regression'] else '✓'
+        delta = f"{row['change']:.1f}% worse" if row['change'] > 0 else f"{abs(row['change']):.1f}% better"
+        print(f"{mark} {row['name']:<28} {row['baseline']:12.1f} → {row['current']:12.1f} "
+              f"{row['unit']:<6} ({delta})")
+    regressions = [row['name'] for row in rows if row['regression']]
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✓ No regressions beyond {args.threshold:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
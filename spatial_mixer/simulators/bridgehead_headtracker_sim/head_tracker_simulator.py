@@ -3,24 +3,65 @@
 Head Tracking Device Simulator
 Simulates a head tracking device with roll, yaw, and pitch controls.
 Sends OSC messages with pattern /ypr -yaw,-pitch,roll to port 9000.
+
+Other rotation address schemas (/head/*, /cube/*, bundled or not) can be
+selected; they are defined in data/rotation_schemas.json (see rotation_schemas.py).
+
+An optional predictor stage (see pose_predictor.py) extrapolates the pose by a
+configurable lookahead before sending, to compensate for rendering latency.
+
+In change-driven send mode (see send_policy.py) a pose is only sent when it
+moves beyond an angular deadband, plus a low-rate keep-alive.
+
+With --stamp, each OSC message carries a sequence number and send time for
+receiver-side loss/reorder/delay checks (see ../stream_integrity.py).
+
+With --state-bus, every sent pose is also published to shared memory for
+local monitors and renderers (see ../state_bus.py).
 """
 
 import tkinter as tk
 from tkinter import ttk
 import threading
 import time
-import math
-from pythonosc import udp_client
+from time import perf_counter_ns
+import argparse
+import os
+import sys
+# Shared simulator tooling (stream_integrity.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sim_clock import REAL_CLOCK
+from sim_metrics import start_metrics_server
+from state_bus import DEFAULT_NAME as STATE_BUS_NAME, StateBus
+from stream_integrity import SequenceStamper
+from pose_predictor import PREDICTORS, create_predictor
+from rotation_schemas import RotationSender, compile_schemas, load_schemas
+from send_policy import DeadbandGate
 
 class HeadTrackerSimulator:
-    def __init__(self):
+    def __init__(self, predictor: str = "none", lookahead_ms: float = 0.0,
+                 send_mode: str = "fixed", deadband: float = 0.5, keepalive_rate: float = 1.0,
+                 schema: str = "ypr", stamp: bool = False, clock=REAL_CLOCK, metrics=None,
+                 state_bus=None):
         self.root = tk.Tk()
         self.root.title("Head Tracker Simulator")
-        self.root.geometry("400x300")
+        self.root.geometry("400x500")
         self.root.resizable(True, True)
         
-        # OSC client setup
-        self.osc_client = udp_client.SimpleUDPClient("127.0.0.1", 9100)
+        # Time source for pacing (sim_clock.VirtualClock under test)
+        self.clock = clock
+        
+        # Optional live metrics (sim_metrics.MetricsRegistry)
+        self.osc_metrics = metrics.message("head_tracker", "osc") if metrics else None
+        
+        # Optional shared-memory pose for local monitors (state_bus.StateBus)
+        self.state_bus = state_bus
+        
+        # OSC sender setup (every schema is compiled once, up front)
+        self.stamper = SequenceStamper(clock=clock) if stamp else None
+        self.encoders = compile_schemas(load_schemas(), self.stamper)
+        self.schema = tk.StringVar(value=schema)
+        self.sender = RotationSender(self.encoders[schema], "127.0.0.1", 9100)
         
         # Head tracking values (in degrees)
         self.yaw = tk.DoubleVar(value=0.0)
@@ -31,6 +72,18 @@ class HeadTrackerSimulator:
         self.send_rate = tk.DoubleVar(value=30.0)  # Hz
         self.is_sending = tk.BooleanVar(value=False)
         
+        # Pose prediction (extrapolate by lookahead to hide pipeline latency)
+        self.predictor_name = tk.StringVar(value=predictor)
+        self.lookahead_ms = tk.DoubleVar(value=lookahead_ms)
+        self.predictor = create_predictor(predictor)
+        
+        # Change-driven sending ("fixed" = every tick, "change" = beyond deadband)
+        self.send_mode = tk.StringVar(value=send_mode)
+        self.deadband = tk.DoubleVar(value=deadband)  # degrees
+        self.keepalive_rate = keepalive_rate  # Hz
+        self.gate = DeadbandGate(deadband, keepalive_rate)
+        self.pose_changed = threading.Event()  # wakes the sender in change mode
+        
         self.setup_gui()
         self.osc_thread = None
         
@@ -82,9 +135,46 @@ class HeadTrackerSimulator:
         rate_value = ttk.Label(main_frame, text="30 Hz")
         rate_value.grid(row=4, column=2, sticky=tk.W, pady=5)
         
+        # Predictor selection
+        ttk.Label(main_frame, text="Predictor:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        predictor_combo = ttk.Combobox(main_frame, textvariable=self.predictor_name,
+                                       values=list(PREDICTORS), state="readonly", width=10)
+        predictor_combo.grid(row=5, column=1, sticky=tk.W, padx=(10, 5), pady=5)
+        
+        # Lookahead control
+        ttk.Label(main_frame, text="Lookahead:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        lookahead_scale = ttk.Scale(main_frame, from_=0, to=150, orient=tk.HORIZONTAL, 
+                                   variable=self.lookahead_ms, length=200)
+        lookahead_scale.grid(row=6, column=1, sticky=(tk.W, tk.E), padx=(10, 5), pady=5)
+        lookahead_value = ttk.Label(main_frame, text="0 ms")
+        lookahead_value.grid(row=6, column=2, sticky=tk.W, pady=5)
+        
+        # Send mode selection
+        ttk.Label(main_frame, text="Send Mode:").grid(row=7, column=0, sticky=tk.W, pady=5)
+        mode_frame = ttk.Frame(main_frame)
+        mode_frame.grid(row=7, column=1, columnspan=2, sticky=tk.W, padx=(10, 5), pady=5)
+        ttk.Radiobutton(mode_frame, text="Fixed rate", value="fixed",
+                        variable=self.send_mode).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(mode_frame, text="On change", value="change",
+                        variable=self.send_mode).pack(side=tk.LEFT)
+        
+        # Deadband control
+        ttk.Label(main_frame, text="Deadband:").grid(row=8, column=0, sticky=tk.W, pady=5)
+        deadband_scale = ttk.Scale(main_frame, from_=0, to=5, orient=tk.HORIZONTAL, 
+                                  variable=self.deadband, length=200)
+        deadband_scale.grid(row=8, column=1, sticky=(tk.W, tk.E), padx=(10, 5), pady=5)
+        deadband_value = ttk.Label(main_frame, text="0.5°")
+        deadband_value.grid(row=8, column=2, sticky=tk.W, pady=5)
+        
+        # Address schema selection
+        ttk.Label(main_frame, text="Schema:").grid(row=9, column=0, sticky=tk.W, pady=5)
+        schema_combo = ttk.Combobox(main_frame, textvariable=self.schema,
+                                    values=list(self.encoders), state="readonly", width=12)
+        schema_combo.grid(row=9, column=1, sticky=tk.W, padx=(10, 5), pady=5)
+        
         # Control buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=3, pady=20)
+        button_frame.grid(row=10, column=0, columnspan=3, pady=20)
         
         self.start_button = ttk.Button(button_frame, text="Start Sending", 
                                       command=self.start_sending)
@@ -99,28 +189,38 @@ class HeadTrackerSimulator:
           # Status and info
         self.status_label = ttk.Label(main_frame, text="Status: Stopped", 
                                      foreground="red")
-        self.status_label.grid(row=6, column=0, columnspan=3, pady=10)
+        self.status_label.grid(row=11, column=0, columnspan=3, pady=10)
         
-        info_label = ttk.Label(main_frame, text="OSC Pattern: /ypr -yaw,-pitch,roll → 127.0.0.1:9100", 
-                              font=("Arial", 9), foreground="gray")
-        info_label.grid(row=7, column=0, columnspan=3, pady=5)
+        self.info_label = ttk.Label(main_frame, text="", font=("Arial", 9), foreground="gray")
+        self.info_label.grid(row=12, column=0, columnspan=3, pady=5)
         
         # Store value labels for updates
         self.value_labels = {
             'yaw': yaw_value,
             'pitch': pitch_value,
             'roll': roll_value,
-            'rate': rate_value
+            'rate': rate_value,
+            'lookahead': lookahead_value,
+            'deadband': deadband_value
         }
         
         # Bind value change events
         self.yaw.trace('w', self.update_value_labels)
         self.pitch.trace('w', self.update_value_labels)
         self.roll.trace('w', self.update_value_labels)
+        self.yaw.trace('w', self.on_pose_change)
+        self.pitch.trace('w', self.on_pose_change)
+        self.roll.trace('w', self.on_pose_change)
+        self.send_mode.trace('w', self.on_pose_change)
+        self.deadband.trace('w', self.update_value_labels)
+        self.schema.trace('w', self.on_schema_change)
         self.send_rate.trace('w', self.update_value_labels)
+        self.lookahead_ms.trace('w', self.update_value_labels)
+        self.predictor_name.trace('w', self.on_predictor_change)
         
         # Initial label update
         self.update_value_labels()
+        self.on_schema_change()
         
     def update_value_labels(self, *args):
         """Update the value labels when sliders change"""
@@ -128,12 +228,29 @@ class HeadTrackerSimulator:
         self.value_labels['pitch'].config(text=f"{self.pitch.get():.1f}°")
         self.value_labels['roll'].config(text=f"{self.roll.get():.1f}°")
         self.value_labels['rate'].config(text=f"{int(self.send_rate.get())} Hz")
+        self.value_labels['lookahead'].config(text=f"{int(self.lookahead_ms.get())} ms")
+        self.value_labels['deadband'].config(text=f"{self.deadband.get():.1f}°")
+        
+    def on_schema_change(self, *args):
+        """Switch the sender to another precompiled schema encoder"""
+        encoder = self.encoders[self.schema.get()]
+        self.sender.encoder = encoder
+        self.info_label.config(text=f"OSC Pattern: {', '.join(encoder.addresses)} → 127.0.0.1:9100")
+        
+    def on_pose_change(self, *args):
+        """Wake the sender thread (it blocks while idle in change mode)"""
+        self.pose_changed.set()
+        
+    def on_predictor_change(self, *args):
+        """Swap in a fresh predictor when the selection changes"""
+        self.predictor = create_predictor(self.predictor_name.get())
         
     def reset_values(self):
         """Reset all values to zero"""
         self.yaw.set(0.0)
         self.pitch.set(0.0)
         self.roll.set(0.0)
+        self.predictor.reset()
         
     def start_sending(self):
         """Start sending OSC messages"""
@@ -142,6 +259,8 @@ class HeadTrackerSimulator:
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.status_label.config(text="Status: Sending", foreground="green")
+            self.predictor.reset()
+            self.gate.reset()
             
             # Start OSC sending thread
             self.osc_thread = threading.Thread(target=self.osc_sender_loop, daemon=True)
@@ -150,53 +269,122 @@ class HeadTrackerSimulator:
     def stop_sending(self):
         """Stop sending OSC messages"""
         self.is_sending.set(False)
+        self.pose_changed.set()
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.status_label.config(text="Status: Stopped", foreground="red")
         
+    def current_pose(self, now: float):
+        """Read the current pose (degrees), extrapolated by the predictor"""
+        yaw_val = self.yaw.get()
+        pitch_val = self.pitch.get()
+        roll_val = self.roll.get()
+        
+        # Extrapolate the pose by the lookahead (no-op for the "none" predictor)
+        predictor = self.predictor
+        predictor.update(now, yaw_val, pitch_val, roll_val)
+        lookahead = self.lookahead_ms.get() / 1000.0
+        return predictor.predict(lookahead)
+        
     def osc_sender_loop(self):
         """Main loop for sending OSC messages"""
+        gate = self.gate
+        due = self.clock.monotonic()  # fixed-rate schedule: no drift from send time or sleep overshoot
         while self.is_sending.get():           
             try:
-                # Get current values in degrees
-                yaw_val = self.yaw.get()
-                pitch_val = self.pitch.get()
-                roll_val = self.roll.get()
+                change_mode = self.send_mode.get() == "change"
+                if change_mode:
+                    gate.deadband = self.deadband.get()
+                    # Block until a slider moves or the keep-alive is due
+                    self.clock.wait(self.pose_changed, gate.time_until_keepalive(self.clock.monotonic()))
+                    self.pose_changed.clear()
+                    if not self.is_sending.get():
+                        break
+                
+                now = self.clock.monotonic()
+                yaw_val, pitch_val, roll_val = self.current_pose(now)
+                if change_mode and not gate.should_send(now, (yaw_val, pitch_val, roll_val)):
+                    continue
                 
-                # Send OSC message with pattern /ypr -yaw,-pitch,roll (in degrees)
-                self.osc_client.send_message("/ypr", [-yaw_val, -pitch_val, roll_val])
+                # Send the pose using the selected schema (e.g. /ypr -yaw,-pitch,roll in degrees)
+                started = perf_counter_ns()
+                self.sender.send(yaw_val, pitch_val, roll_val)
+                if self.osc_metrics:
+                    self.osc_metrics.record(started, perf_counter_ns())
+                if self.state_bus:
+                    self.state_bus.publish_pose(yaw_val, pitch_val, roll_val)
+                gate.mark_sent(now, (yaw_val, pitch_val, roll_val))
                 
-                # Calculate sleep time based on send rate
-                sleep_time = 1.0 / self.send_rate.get()
-                time.sleep(sleep_time)
+                # Next send on the send-rate grid (a rate cap in change mode); after
+                # falling behind (or idling) the grid restarts instead of bursting
+                interval = 1.0 / self.send_rate.get()
+                due += interval
+                if due < now:
+                    due = now + interval
+                # No spin: the GUI sender gives its core back and lands within the OS sleep overshoot (0.1-2 ms)
+                self.clock.sleep_until(due, spin=0)
                 
             except Exception as e:
                 print(f"Error sending OSC message: {e}")
+                if self.osc_metrics:
+                    self.osc_metrics.errors += 1
                 # Small delay before retrying
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
                 
     def run(self):
         """Start the GUI application"""
         try:
             print("Head Tracker Simulator starting...")
             print("OSC messages will be sent to 127.0.0.1:9100")
-            print("Pattern: /ypr -yaw,-pitch,roll")
+            print(f"Schema: {self.schema.get()}"
+                  f"{' (sequence stamped)' if self.stamper else ''}")
+            print(f"Predictor: {self.predictor_name.get()} "
+                  f"(lookahead {self.lookahead_ms.get():.0f} ms)")
+            print(f"Send mode: {self.send_mode.get()} "
+                  f"(deadband {self.deadband.get():.2f}°, keep-alive {self.keepalive_rate} Hz)")
             print("GUI ready.")
             self.root.mainloop()
         except KeyboardInterrupt:
             print("\nShutting down...")
         finally:
             self.is_sending.set(False)
+            self.sender.close()
 
 if __name__ == "__main__":
-    # Check if required modules are available
-    try:
-        import pythonosc
-    except ImportError:
-        print("Error: python-osc module not found!")
-        print("Please install it with: pip install python-osc")
-        exit(1)
+    parser = argparse.ArgumentParser(description="Head Tracker Simulator")
+    parser.add_argument("--predictor", default="none", choices=list(PREDICTORS),
+                        help="Pose predictor applied before sending")
+    parser.add_argument("--lookahead", type=float, default=0.0,
+                        help="Prediction lookahead in milliseconds")
+    parser.add_argument("--send-mode", default="fixed", choices=["fixed", "change"],
+                        help="Send every tick, or only when the pose changes beyond the deadband")
+    parser.add_argument("--deadband", type=float, default=0.5,
+                        help="Angular deadband in degrees for change-driven sending")
+    parser.add_argument("--keepalive", type=float, default=1.0,
+                        help="Keep-alive floor rate in Hz for change-driven sending (0 = off)")
+    parser.add_argument("--schema", default="ypr", choices=list(load_schemas()),
+                        help="Rotation address schema from data/rotation_schemas.json")
+    parser.add_argument("--stamp", action="store_true",
+                        help="Append sequence number and send time to every OSC message")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve live Prometheus metrics on this local port")
+    parser.add_argument("--state-bus", nargs="?", const=STATE_BUS_NAME, metavar="NAME",
+                        help="Publish every sent pose to a shared-memory state bus (state_bus.py); the first "
+                             "publisher creates and owns it, so start it first and stop it last")
+    args = parser.parse_args()
     
     # Create and run the simulator
-    simulator = HeadTrackerSimulator()
-    simulator.run()
+    metrics = start_metrics_server(args.metrics_port) if args.metrics_port else None
+    state_bus = StateBus(args.state_bus) if args.state_bus else None
+    if state_bus:
+        print(f"✓ Publishing the pose to shared memory '{args.state_bus}'"
+              f"{' (created here: keep this simulator running until the other users stop)' if state_bus.owner else ''}")
+    simulator = HeadTrackerSimulator(predictor=args.predictor, lookahead_ms=args.lookahead,
+                                     send_mode=args.send_mode, deadband=args.deadband,
+                                     keepalive_rate=args.keepalive, schema=args.schema,
+                                     stamp=args.stamp, metrics=metrics, state_bus=state_bus)
+    try:
+        simulator.run()
+    finally:
+        if state_bus:
+            state_bus.close()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Head Pose Predictor
+
+Extrapolates head tracker poses (yaw, pitch, roll in degrees) a configurable
+lookahead into the future, so the pose that reaches the renderer matches where
+the listener's head will be once the pipeline latency has elapsed.
+
+Available predictors:
+- none:     send the latest pose unchanged (baseline)
+- cv:       constant-velocity extrapolation from smoothed finite differences
+- kalman:   per-axis constant-velocity Kalman filter
+- oneeuro:  One-Euro filtered pose and velocity, extrapolated linearly
+
+Usage (offline evaluation against ground-truth trajectories):
+    python pose_predictor.py --lookahead 40
+    python pose_predictor.py --trajectory recorded.csv --lookahead 30 --rate 100
+
+Trajectory files are CSV with a header row: t,yaw,pitch,roll (seconds, degrees)
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Pose = Tuple[float, float, float]
+Sample = Tuple[float, float, float, float]  # (t, yaw, pitch, roll)
+
+AXES = ("yaw", "pitch", "roll")
+
+
+def wrap_angle(angle: float) -> float:
+    """Wrap an angle in degrees to the range [-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class PosePredictor:
+    """Base predictor: holds the latest pose and returns it unchanged"""
+    name = "none"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget all history"""
+        self.last_time: Optional[float] = None
+        self.pose: List[float] = [0.0, 0.0, 0.0]
+
+    def update(self, t: float, yaw: float, pitch: float, roll: float):
+        """Feed a measured pose taken at time t (seconds)"""
+        self.last_time = t
+        self.pose = [yaw, pitch, roll]
+
+    def velocity(self) -> Pose:
+        """Estimated angular velocity in degrees per second"""
+        return (0.0, 0.0, 0.0)
+
+    def predict(self, lookahead: float) -> Pose:
+        """Pose extrapolated lookahead seconds past the last update"""
+        velocity = self.velocity()
+        return tuple(wrap_angle(self.pose[i] + velocity[i] * lookahead) for i in range(3))
+
+
+class ConstantVelocityPredictor(PosePredictor):
+    """Extrapolates with an exponentially smoothed finite-difference velocity"""
+    name = "cv"
+
+    def __init__(self, smoothing: float = 0.5):
+        # smoothing = weight of the newest difference (1.0 = raw differences)
+        self.smoothing = smoothing
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.rates = [0.0, 0.0, 0.0]
+
+    def update(self, t: float, yaw: float, pitch: float, roll: float):
+        if self.last_time is not None and t > self.last_time:
+            dt = t - self.last_time
+            measured = (yaw, pitch, roll)
+            for i in range(3):
+                # Unwrap so a yaw crossing ±180° does not look like a 360° jump
+                rate = wrap_angle(measured[i] - self.pose[i]) / dt
+                self.rates[i] += self.smoothing * (rate - self.rates[i])
+        super().update(t, yaw, pitch, roll)
+
+    def velocity(self) -> Pose:
+        return tuple(self.rates)
+
+
+class KalmanPredictor(PosePredictor):
+    """Per-axis constant-velocity Kalman filter (state: angle, angular rate)"""
+    name = "kalman"
+
+    def __init__(self, process_noise: float = 2000.0, measurement_noise: float = 0.05):
+        # process_noise: angular acceleration variance (deg²/s⁴ per second)
+        # measurement_noise: pose measurement variance (deg²)
+        self.q = process_noise
+        self.r = measurement_noise
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.rates = [0.0, 0.0, 0.0]
+        # Covariance [[p00, p01], [p01, p11]] per axis
+        self.cov = [[self.r, 0.0, 1e4] for _ in range(3)]
+
+    def update(self, t: float, yaw: float, pitch: float, roll: float):
+        if self.last_time is None:
+            super().update(t, yaw, pitch, roll)
+            return
+
+        dt = max(t - self.last_time, 1e-6)
+        measured = (yaw, pitch, roll)
+        q = self.q
+        for i in range(3):
+            p00, p01, p11 = self.cov[i]
+
+            # Predict
+            angle = self.pose[i] + self.rates[i] * dt
+            p00 = p00 + dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+            p01 = p01 + dt * p11 + q * dt ** 2 / 2
+            p11 = p11 + q * dt
+
+            # Correct
+            innovation = wrap_angle(measured[i] - angle)
+            s = p00 + self.r
+            k0, k1 = p00 / s, p01 / s
+            self.pose[i] = wrap_angle(angle + k0 * innovation)
+            self.rates[i] += k1 * innovation
+            self.cov[i] = [(1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01]
+        self.last_time = t
+
+    def velocity(self) -> Pose:
+        return tuple(self.rates)
+
+
+class OneEuroPredictor(PosePredictor):
+    """One-Euro filter on pose and velocity, extrapolated with the filtered velocity"""
+    name = "oneeuro"
+
+    def __init__(self, min_cutoff: float = 3.0, beta: float = 2.0, d_cutoff: float = 10.0):
+        # min_cutoff (Hz) trades jitter for lag at rest, beta raises the cutoff with speed
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.rates = [0.0, 0.0, 0.0]
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, t: float, yaw: float, pitch: float, roll: float):
+        if self.last_time is None or t <= self.last_time:
+            super().update(t, yaw, pitch, roll)
+            return
+
+        dt = t - self.last_time
+        measured = (yaw, pitch, roll)
+        d_alpha = self._alpha(self.d_cutoff, dt)
+        for i in range(3):
+            delta = wrap_angle(measured[i] - self.pose[i])
+            self.rates[i] += d_alpha * (delta / dt - self.rates[i])
+            cutoff = self.min_cutoff + self.beta * abs(self.rates[i])
+            self.pose[i] = wrap_angle(self.pose[i] + self._alpha(cutoff, dt) * delta)
+        self.last_time = t
+
+    def velocity(self) -> Pose:
+        return tuple(self.rates)
+
+
+PREDICTORS: Dict[str, Callable[..., PosePredictor]] = {
+    PosePredictor.name: PosePredictor,
+    ConstantVelocityPredictor.name: ConstantVelocityPredictor,
+    KalmanPredictor.name: KalmanPredictor,
+    OneEuroPredictor.name: OneEuroPredictor,
+}
+
+
+def create_predictor(name: str, **params) -> PosePredictor:
+    """Create a predictor by name (none, cv, kalman, oneeuro)"""
+    try:
+        return PREDICTORS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown predictor '{name}' (choose from: {', '.join(PREDICTORS)})")
+
+
+# Ground-truth trajectories
+
+def load_trajectory(path: str) -> List[Sample]:
+    """Load a t,yaw,pitch,roll CSV trajectory sorted by time"""
+    samples = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            samples.append((float(row['t']), float(row['yaw']),
+                            float(row['pitch']), float(row['roll'])))
+    samples.sort(key=lambda s: s[0])
+    return samples
+
+
+def save_trajectory(path: str, samples: Sequence[Sample]):
+    """Write a trajectory as t,yaw,pitch,roll CSV"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['t', 'yaw', 'pitch', 'roll'])
+        for sample in samples:
+            writer.writerow([f"{value:.6f}" for value in sample])
+
+
+def synthetic_trajectory(kind: str, duration: float = 20.0, rate: float = 1000.0,
+                         seed: int = 1) -> List[Sample]:
+    """Generate a dense ground-truth trajectory
+
+    Kinds:
+    - sweep:  slow sinusoidal look-around (yaw ±90° at 0.2 Hz, gentle pitch/roll)
+    - turns:  quick minimum-jerk head turns between random targets with pauses
+    - tremor: small, fast jitter around a fixed orientation
+    """
+    rng = random.Random(seed)
+    count = int(duration * rate) + 1
+    samples = []
+
+    if kind == 'sweep':
+        for n in range(count):
+            t = n / rate
+            samples.append((t,
+                            90.0 * math.sin(2 * math.pi * 0.2 * t),
+                            15.0 * math.sin(2 * math.pi * 0.13 * t),
+                            5.0 * math.sin(2 * math.pi * 0.31 * t)))
+    elif kind == 'turns':
+        start, target = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        move_start, move_time, pause = 0.0, 0.0, 0.0
+        for n in range(count):
+            t = n / rate
+            if t >= move_start + move_time + pause:
+                start = target
+                target = [rng.uniform(-120, 120), rng.uniform(-30, 30), rng.uniform(-10, 10)]
+                move_start = t
+                move_time = rng.uniform(0.3, 0.8)
+                pause = rng.uniform(0.2, 1.0)
+            s = min((t - move_start) / move_time, 1.0)
+            blend = s ** 3 * (10 - 15 * s + 6 * s * s)  # minimum-jerk profile
+            samples.append((t,) + tuple(start[i] + (target[i] - start[i]) * blend for i in range(3)))
+    elif kind == 'tremor':
+        phases = [rng.uniform(0, 2 * math.pi) for _ in range(3)]
+        for n in range(count):
+            t = n / rate
+            samples.append((t,) + tuple(
+                1.5 * math.sin(2 * math.pi * 6.0 * t + phases[i]) + rng.gauss(0, 0.1)
+                for i in range(3)))
+    else:
+        raise ValueError(f"Unknown trajectory kind '{kind}' (choose from: sweep, turns, tremor)")
+
+    return samples
+
+
+class TrajectoryInterpolator:
+    """Linear interpolation of a sampled trajectory at arbitrary (increasing) times"""
+
+    def __init__(self, samples: Sequence[Sample]):
+        self.samples = samples
+        self.index = 0
+
+    def __call__(self, t: float) -> Pose:
+        samples = self.samples
+        if t <= samples[0][0]:
+            return samples[0][1:]
+        if t >= samples[-1][0]:
+            return samples[-1][1:]
+
+        # Queries arrive mostly in increasing order, so walk from the last position
+        i = self.index
+        if samples[i][0] > t:
+            i = 0
+        while samples[i + 1][0] < t:
+            i += 1
+        self.index = i
+
+        t0, t1 = samples[i][0], samples[i + 1][0]
+        w = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return tuple(wrap_angle(samples[i][k] + w * wrap_angle(samples[i + 1][k] - samples[i][k]))
+                     for k in (1, 2, 3))
+
+
+def evaluate_predictor(predictor: PosePredictor, samples: Sequence[Sample],
+                       lookahead: float, rate: float = 100.0) -> Dict[str, Dict[str, float]]:
+    """Replay a trajectory through a predictor at the given send rate
+
+    Returns per-axis error statistics (degrees) of the predicted pose against
+    the ground truth lookahead seconds later: rms, mean, p95 and max.
+    """
+    predictor.reset()
+    now = TrajectoryInterpolator(samples)
+    future = TrajectoryInterpolator(samples)
+    errors: List[List[float]] = [[], [], []]
+
+    t = samples[0][0]
+    end = samples[-1][0] - lookahead
+    step = 1.0 / rate
+    while t <= end:
+        predictor.update(t, *now(t))
+        predicted = predictor.predict(lookahead)
+        truth = future(t + lookahead)
+        for i in range(3):
+            errors[i].append(abs(wrap_angle(predicted[i] - truth[i])))
+        t += step
+
+    return {AXES[i]: error_stats(errors[i]) for i in range(3)}
+
+
+def error_stats(errors: List[float]) -> Dict[str, float]:
+    """Summary statistics of absolute errors"""
+    if not errors:
+        return {'rms': 0.0, 'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(errors)
+    return {
+        'rms': math.sqrt(sum(e * e for e in errors) / len(errors)),
+        'mean': sum(errors) / len(errors),
+        'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        'max': ordered[-1],
+    }
+
+
+def print_report(name: str, lookahead: float, rate: float,
+                 results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Print an error table (degrees) for each predictor"""
+    print(f"\nTrajectory: {name}  (lookahead {lookahead * 1000:.0f} ms, {rate:.0f} Hz)")
+    print(f"  {'predictor':<10}" + "".join(f"{axis + ' rms':>11}{axis + ' p95':>11}" for axis in AXES))
+    baseline = results.get('none')
+    for predictor_name, stats in results.items():
+        row = f"  {predictor_name:<10}"
+        for axis in AXES:
+            row += f"{stats[axis]['rms']:>11.2f}{stats[axis]['p95']:>11.2f}"
+        if baseline and predictor_name != 'none':
+            base = sum(baseline[a]['rms'] for a in AXES)
+            mine = sum(stats[a]['rms'] for a in AXES)
+            if base > 0:
+                row += f"   ({100 * (mine / base - 1):+.0f}% error vs none)"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate head pose predictors offline")
+    parser.add_argument('--trajectory', action='append',
+                        help="t,yaw,pitch,roll CSV file (repeatable); default: synthetic sweep, turns, tremor")
+    parser.add_argument('--lookahead', type=float, default=40.0, help="Lookahead in milliseconds")
+    parser.add_argument('--rate', type=float, default=100.0, help="Tracker send rate in Hz")
+    parser.add_argument('--predictor', action='append', choices=list(PREDICTORS),
+                        help="Predictor to evaluate (repeatable); default: all")
+    parser.add_argument('--save-synthetic', metavar='DIR',
+                        help="Also write the synthetic trajectories as CSV into DIR")
+    args = parser.parse_args()
+
+    lookahead = args.lookahead / 1000.0
+    predictors = args.predictor or list(PREDICTORS)
+    if 'none' not in predictors:
+        predictors.insert(0, 'none')
+
+    if args.trajectory:
+        trajectories = [(path, load_trajectory(path)) for path in args.trajectory]
+    else:
+        trajectories = [(kind, synthetic_trajectory(kind)) for kind in ('sweep', 'turns', 'tremor')]
+        if args.save_synthetic:
+            for kind, samples in trajectories:
+                save_trajectory(os.path.join(args.save_synthetic, f"{kind}.csv"), samples)
+
+    for name, samples in trajectories:
+        results = {p: evaluate_predictor(create_predictor(p), samples, lookahead, args.rate)
+                   for p in predictors}
+        print_report(name, lookahead, args.rate, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Rotation Address Schemas
+
+Encodes a head pose (yaw, pitch, roll in degrees) into OSC datagrams for any
+configured address schema, so every rotation input path of the sketch can be
+driven by the same sender:
+- ypr:          /ypr -yaw,-pitch,roll (degrees, one message)
+- head:         /head/yaw, /head/pitch, /head/roll (radians, split)
+- cube:         /cube/roll, /cube/yaw, /cube/pitch (normalized 0-1, split)
+- *-bundle:     split messages wrapped in one OSC bundle
+
+Schemas live in data/rotation_schemas.json. Each schema is compiled once into
+fixed OSC headers plus a struct packer, so encoding a pose is a single pack
+call per datagram.
+
+Usage (print the encoded datagrams for a pose):
+    python rotation_schemas.py --schema cube --pose 30 -10 5
+"""
+
+import argparse
+import json
+import math
+import os
+import socket
+import struct
+from typing import Any, Dict, List
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rotation_schemas.json')
+
+AXIS_INDEX = {'yaw': 0, 'pitch': 1, 'roll': 2}
+
+# Degrees -> transmitted value, as (gain, offset)
+UNITS = {
+    'degrees': (1.0, 0.0),
+    'radians': (math.pi / 180.0, 0.0),
+    'normalized': (1.0 / 360.0, 0.5),  # -180..180 degrees -> 0..1
+}
+
+# OSC time tag 1 = "immediately"
+BUNDLE_HEADER = b'#bundle\x00' + struct.pack('>Q', 1)
+
+
+def osc_string(value: str) -> bytes:
+    """Encode an OSC string (null terminated, padded to 4 bytes)"""
+    data = value.encode('ascii') + b'\x00'
+    return data + b'\x00' * (-len(data) % 4)
+
+
+def load_schemas(path: str = SCHEMA_FILE) -> Dict[str, Dict[str, Any]]:
+    """Load the rotation schema definitions"""
+    with open(path, 'r') as f:
+        return json.load(f)["schemas"]
+
+
+class RotationEncoder:
+    """A schema compiled into fixed OSC headers and struct packers
+
+    With a stamper (stream_integrity.SequenceStamper), every message gets two
+    extra int32 arguments: sequence number and send time in microseconds.
+    """
+
+    def __init__(self, name: str, schema: Dict[str, Any], stamper=None):
+        self.name = name
+        self.bundle = bool(schema.get('bundle', False))
+        self.addresses = [message['address'] for message in schema['messages']]
+        self.stamper = stamper
+        units = schema.get('units', 'degrees')
+        if units not in UNITS:
+            raise ValueError(f"Schema '{name}': unknown units '{units}' (choose from: {', '.join(UNITS)})")
+        gain, offset = UNITS[units]
+
+        # Each message: constant header bytes followed by its float arguments
+        messages = []
+        for message in schema['messages']:
+            slots = []
+            for arg in message['args']:
+                sign = -1.0 if arg.startswith('-') else 1.0
+                axis = arg.lstrip('+-')
+                if axis not in AXIS_INDEX:
+                    raise ValueError(f"Schema '{name}': unknown axis '{arg}' in {message['address']}")
+                slots.append((AXIS_INDEX[axis], sign * gain, offset))
+            tags = ',' + 'f' * len(slots) + ('ii' if stamper else '')
+            header = osc_string(message['address']) + osc_string(tags)
+            messages.append((header, slots))
+        stamp_fmt = 'II' if stamper else ''
+        stamp_size = 8 if stamper else 0
+
+        # Datagram entries: (pack, template args, value slots, stamp positions)
+        if self.bundle:
+            # One datagram: bundle header, then (size, header, args) per element
+            fmt = f'>{len(BUNDLE_HEADER)}s'
+            template: List[Any] = [BUNDLE_HEADER]
+            slots, stamps = [], []
+            for header, message_slots in messages:
+                fmt += f'i{len(header)}s' + 'f' * len(message_slots) + stamp_fmt
+                template += [len(header) + 4 * len(message_slots) + stamp_size, header]
+                for slot in message_slots:
+                    slots.append((len(template),) + slot)
+                    template.append(0.0)
+                if stamper:
+                    stamps.append(len(template))
+                    template += [0, 0]
+            self.datagrams = [(struct.Struct(fmt).pack, template, slots, stamps)]
+        else:
+            self.datagrams = []
+            for header, message_slots in messages:
+                fmt = f'>{len(header)}s' + 'f' * len(message_slots) + stamp_fmt
+                template = [header] + [0.0] * len(message_slots)
+                slots = [(i + 1,) + slot for i, slot in enumerate(message_slots)]
+                stamps = []
+                if stamper:
+                    stamps.append(len(template))
+                    template += [0, 0]
+                self.datagrams.append((struct.Struct(fmt).pack, template, slots, stamps))
+
+    def encode(self, yaw: float, pitch: float, roll: float) -> List[bytes]:
+        """Encode a pose (degrees) into the datagrams to send, in order"""
+        pose = (yaw, pitch, roll)
+        out = []
+        for pack, template, slots, stamps in self.datagrams:
+            args = template.copy()
+            for position, axis, gain, offset in slots:
+                args[position] = pose[axis] * gain + offset
+            for position in stamps:
+                args[position], args[position + 1] = self.stamper.next()
+            out.append(pack(*args))
+        return out
+
+
+def compile_schemas(schemas: Dict[str, Dict[str, Any]], stamper=None) -> Dict[str, RotationEncoder]:
+    """Compile every schema definition into an encoder (optionally sequence-stamped)"""
+    return {name: RotationEncoder(name, schema, stamper) for name, schema in schemas.items()}
+
+
+class RotationSender:
+    """Sends poses to a UDP target using a precompiled schema encoder"""
+
+    def __init__(self, encoder: RotationEncoder, host: str = "127.0.0.1", port: int = 9100):
+        self.encoder = encoder
+        self.target = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, yaw: float, pitch: float, roll: float) -> int:
+        """Send one pose, returning the number of datagrams sent"""
+        datagrams = self.encoder.encode(yaw, pitch, roll)
+        for datagram in datagrams:
+            self.sock.sendto(datagram, self.target)
+        return len(datagrams)
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the OSC datagrams produced by a rotation schema")
+    parser.add_argument('--schema', default='ypr', help="Schema name from data/rotation_schemas.json")
+    parser.add_argument('--pose', type=float, nargs=3, default=[30.0, -10.0, 5.0],
+                        metavar=('YAW', 'PITCH', 'ROLL'), help="Pose in degrees")
+    args = parser.parse_args()
+
+    schemas = load_schemas()
+    encoders = compile_schemas(schemas)
+    if args.schema not in encoders:
+        parser.error(f"unknown schema '{args.schema}' (choose from: {', '.join(encoders)})")
+
+    print(f"{args.schema}: {schemas[args.schema].get('description', '')}")
+    for datagram in encoders[args.schema].encode(*args.pose):
+        print(f"  {len(datagram):3d} bytes: {datagram.hex(' ')}")
+
+
+if __name__ == "__main__":
+    main()
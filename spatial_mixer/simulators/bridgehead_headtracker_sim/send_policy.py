@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Head Tracker Send Policy
+
+Change-driven sending for the head tracker: a pose is only sent when any axis
+has moved more than an angular deadband since the last sent pose, with a
+low-rate keep-alive so the receiver's view never goes stale.
+
+Usage (offline traffic report against fixed-rate sending):
+    python send_policy.py --deadband 0.5 --keepalive 1 --rate 100
+    python send_policy.py --trajectory recorded.csv --deadband 0.25
+"""
+
+import argparse
+from typing import Dict, Optional, Sequence, Tuple
+
+from pose_predictor import (AXES, Sample, TrajectoryInterpolator, load_trajectory,
+                            synthetic_trajectory, wrap_angle)
+
+# Encoded size of one /ypr message: "/ypr" (8) + ",fff" (8) + 3 float32 (12)
+YPR_MESSAGE_BYTES = 28
+
+
+class DeadbandGate:
+    """Decides whether a pose differs enough from the last sent pose to be sent"""
+
+    def __init__(self, deadband: float = 0.5, keepalive_rate: float = 1.0):
+        # deadband in degrees per axis, keepalive_rate in Hz (0 disables keep-alive)
+        self.deadband = deadband
+        self.keepalive_rate = keepalive_rate
+        self.reset()
+
+    def reset(self):
+        """Forget the last sent pose so the next pose is always sent"""
+        self.last_pose: Optional[Tuple[float, float, float]] = None
+        self.last_sent = float('-inf')
+
+    def keepalive_interval(self) -> Optional[float]:
+        """Seconds between keep-alive sends, or None if disabled"""
+        return 1.0 / self.keepalive_rate if self.keepalive_rate > 0 else None
+
+    def time_until_keepalive(self, now: float) -> Optional[float]:
+        """Seconds until the next keep-alive is due (None = wait indefinitely)"""
+        interval = self.keepalive_interval()
+        if interval is None:
+            return None
+        return max(0.0, self.last_sent + interval - now)
+
+    def should_send(self, now: float, pose: Sequence[float]) -> bool:
+        """True if the pose moved beyond the deadband or a keep-alive is due"""
+        if self.last_pose is None:
+            return True
+        interval = self.keepalive_interval()
+        if interval is not None and now - self.last_sent >= interval:
+            return True
+        deadband = self.deadband
+        last = self.last_pose
+        return (abs(wrap_angle(pose[0] - last[0])) > deadband or
+                abs(wrap_angle(pose[1] - last[1])) > deadband or
+                abs(wrap_angle(pose[2] - last[2])) > deadband)
+
+    def mark_sent(self, now: float, pose: Sequence[float]):
+        """Record that a pose was sent at time now"""
+        self.last_pose = (pose[0], pose[1], pose[2])
+        self.last_sent = now
+
+
+def simulate_traffic(samples: Sequence[Sample], rate: float, deadband: float,
+                     keepalive_rate: float) -> Dict[str, float]:
+    """Compare fixed-rate and change-driven sending over a trajectory
+
+    The trajectory is sampled at the tracker rate; fixed mode sends every
+    sample, change mode only those passing the deadband gate. Staleness is
+    the per-axis error between the true pose and the pose last sent.
+    """
+    gate = DeadbandGate(deadband, keepalive_rate)
+    pose_at = TrajectoryInterpolator(samples)
+    fixed_sent = change_sent = 0
+    max_error = 0.0
+
+    t = samples[0][0]
+    end = samples[-1][0]
+    step = 1.0 / rate
+    while t <= end:
+        pose = pose_at(t)
+        fixed_sent += 1
+        if gate.should_send(t, pose):
+            gate.mark_sent(t, pose)
+            change_sent += 1
+        else:
+            for i in range(3):
+                max_error = max(max_error, abs(wrap_angle(pose[i] - gate.last_pose[i])))
+        t += step
+
+    duration = max(end - samples[0][0], step)
+    return {
+        'duration': duration,
+        'fixed_messages': fixed_sent,
+        'change_messages': change_sent,
+        'fixed_bytes_per_s': fixed_sent * YPR_MESSAGE_BYTES / duration,
+        'change_bytes_per_s': change_sent * YPR_MESSAGE_BYTES / duration,
+        'reduction': 1.0 - change_sent / fixed_sent if fixed_sent else 0.0,
+        'max_error': max_error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report change-driven vs fixed-rate head tracker traffic")
+    parser.add_argument('--trajectory', action='append',
+                        help="t,yaw,pitch,roll CSV file (repeatable); default: synthetic sweep, turns, tremor")
+    parser.add_argument('--rate', type=float, default=100.0, help="Fixed send rate in Hz")
+    parser.add_argument('--deadband', type=float, default=0.5, help="Angular deadband in degrees")
+    parser.add_argument('--keepalive', type=float, default=1.0, help="Keep-alive floor rate in Hz (0 = off)")
+    args = parser.parse_args()
+
+    if args.trajectory:
+        trajectories = [(path, load_trajectory(path)) for path in args.trajectory]
+    else:
+        trajectories = [(kind, synthetic_trajectory(kind)) for kind in ('sweep', 'turns', 'tremor')]
+
+    print(f"Deadband {args.deadband}° per axis ({'/'.join(AXES)}), "
+          f"keep-alive {args.keepalive} Hz, fixed rate {args.rate:.0f} Hz")
+    print(f"  {'trajectory':<12}{'fixed msgs':>12}{'change msgs':>13}{'fixed B/s':>11}"
+          f"{'change B/s':>12}{'reduction':>11}{'max stale°':>12}")
+    for name, samples in trajectories:
+        r = simulate_traffic(samples, args.rate, args.deadband, args.keepalive)
+        print(f"  {name:<12}{r['fixed_messages']:>12}{r['change_messages']:>13}"
+              f"{r['fixed_bytes_per_s']:>11.0f}{r['change_bytes_per_s']:>12.0f}"
+              f"{100 * r['reduction']:>10.1f}%{r['max_error']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
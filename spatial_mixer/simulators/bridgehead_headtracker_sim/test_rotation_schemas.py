@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the head tracker OSC output
+
+Sends poses through RotationSender to a UDP socket on 127.0.0.1 (no sketch
+or head tracker hardware needed) and checks the /ypr wire format the sketch
+expects, the other rotation schemas, stamping, and encoding/loopback throughput.
+
+Usage:
+    python -m pytest test_rotation_schemas.py
+"""
+
+import os
+import socket
+import struct
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Shared simulator tooling (stream_integrity.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from rotation_schemas import RotationSender, compile_schemas, load_schemas
+from stream_integrity import SequenceStamper, parse_osc_stamps
+
+# Throughput floors, about 10x below a typical laptop
+MIN_ENCODE_RATE = 100_000    # poses per second
+MIN_LOOPBACK_RATE = 5_000    # datagrams per second
+
+
+def read_osc_string(data: bytes, offset: int):
+    end = data.index(b'\x00', offset)
+    return data[offset:end].decode('ascii'), (end + 4) & ~3
+
+
+def parse_osc_message(data: bytes):
+    """Decode a plain OSC message into (address, type tags, arguments)"""
+    address, offset = read_osc_string(data, 0)
+    tags, offset = read_osc_string(data, offset)
+    args = []
+    for tag in tags[1:]:
+        args.append(struct.unpack_from('>f' if tag == 'f' else '>i', data, offset)[0])
+        offset += 4
+    assert offset == len(data)
+    return address, tags, args
+
+
+def parse_osc_bundle(data: bytes):
+    assert data.startswith(b'#bundle\x00')
+    offset, messages = 16, []
+    while offset < len(data):
+        (size,) = struct.unpack_from('>i', data, offset)
+        messages.append(parse_osc_message(data[offset + 4:offset + 4 + size]))
+        offset += 4 + size
+    return messages
+
+
+@pytest.fixture(scope="module")
+def encoders():
+    return compile_schemas(load_schemas())
+
+
+@pytest.fixture
+def loopback():
+    """A UDP receiver on an ephemeral localhost port"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    yield sock
+    sock.close()
+
+
+def test_ypr_wire_format_over_loopback(encoders, loopback):
+    sender = RotationSender(encoders['ypr'], *loopback.getsockname())
+    try:
+        assert sender.send(30.0, -10.0, 5.0) == 1
+        data = loopback.recv(1024)
+    finally:
+        sender.close()
+
+    # /ypr carries -yaw, -pitch, roll in degrees as three float32
+    assert data == (b'/ypr\x00\x00\x00\x00,fff\x00\x00\x00\x00'
+                    + struct.pack('>fff', -30.0, 10.0, 5.0))
+    assert parse_osc_message(data) == ('/ypr', ',fff', [-30.0, 10.0, 5.0])
+
+
+def test_head_schema_sends_radians(encoders):
+    messages = [parse_osc_message(d) for d in encoders['head'].encode(90.0, -45.0, 180.0)]
+    assert [m[0] for m in messages] == ['/head/yaw', '/head/pitch', '/head/roll']
+    assert [m[2][0] for m in messages] == pytest.approx([1.5707963, -0.7853982, 3.1415927])
+
+
+def test_cube_bundle_normalizes_into_one_datagram(encoders):
+    datagrams = encoders['cube-bundle'].encode(0.0, 90.0, -180.0)
+    assert len(datagrams) == 1
+    values = {address: args[0] for address, _, args in parse_osc_bundle(datagrams[0])}
+    assert values == pytest.approx({'/cube/roll': 0.0, '/cube/yaw': 0.5, '/cube/pitch': 0.75})
+
+
+def test_stamped_ypr_appends_sequence_and_time():
+    encoder = compile_schemas(load_schemas(), SequenceStamper())['ypr']
+    first, second = encoder.encode(1.0, 2.0, 3.0)[0], encoder.encode(1.0, 2.0, 3.0)[0]
+    address, tags, args = parse_osc_message(second)
+    assert (address, tags, args[:3]) == ('/ypr', ',fffii', [-1.0, -2.0, 3.0])
+    stamps = parse_osc_stamps(first) + parse_osc_stamps(second)
+    assert [stamp[:2] for stamp in stamps] == [('/ypr', 0), ('/ypr', 1)]
+
+
+def test_encode_throughput(encoders):
+    encoder = encoders['ypr']
+    count = 50_000
+    started = time.perf_counter()
+    for i in range(count):
+        encoder.encode(i * 0.01, -i * 0.01, 0.5)
+    assert count / (time.perf_counter() - started) > MIN_ENCODE_RATE
+
+
+def test_loopback_throughput(encoders, loopback):
+    sender = RotationSender(encoders['ypr'], *loopback.getsockname())
+    count, batch, received = 5_000, 100, 0
+    started = time.perf_counter()
+    try:
+        # Send in batches and drain in between, so the receive buffer never overflows
+        for i in range(0, count, batch):
+            for j in range(batch):
+                sender.send(i + j, 0.0, 0.0)
+            for _ in range(batch):
+                loopback.recv(64)
+                received += 1
+    finally:
+        sender.close()
+    assert received == count
+    assert count / (time.perf_counter() - started) > MIN_LOOPBACK_RATE
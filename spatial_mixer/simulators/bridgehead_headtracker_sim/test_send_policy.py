@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the head tracker's change-driven send policy (DeadbandGate)
+
+Usage:
+    python -m pytest test_send_policy.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from send_policy import DeadbandGate, simulate_traffic
+from pose_predictor import synthetic_trajectory
+from sim_clock import VirtualClock
+
+
+def test_first_pose_is_always_sent():
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=0)
+    assert gate.should_send(0.0, (10.0, 0.0, 0.0))
+
+
+def test_only_moves_beyond_the_deadband_are_sent():
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=0)
+    gate.mark_sent(0.0, (10.0, 5.0, -5.0))
+    assert not gate.should_send(1.0, (10.0, 5.0, -5.0))
+    assert not gate.should_send(1.0, (10.5, 5.0, -5.0))      # exactly the deadband: not beyond it
+    assert not gate.should_send(1.0, (10.4, 5.4, -5.4))
+    assert gate.should_send(1.0, (10.6, 5.0, -5.0))
+    assert gate.should_send(1.0, (10.0, 4.4, -5.0))
+    assert gate.should_send(1.0, (10.0, 5.0, -4.4))
+
+
+def test_deadband_wraps_across_180():
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=0)
+    gate.mark_sent(0.0, (179.9, 0.0, 0.0))
+    assert not gate.should_send(1.0, (-179.9, 0.0, 0.0))     # 0.2 degrees apart
+    assert gate.should_send(1.0, (-179.0, 0.0, 0.0))
+
+
+def test_time_until_keepalive():
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=4.0)
+    assert gate.keepalive_interval() == pytest.approx(0.25)
+    assert gate.time_until_keepalive(0.0) == 0.0              # nothing sent yet: due now
+    gate.mark_sent(1.0, (0.0, 0.0, 0.0))
+    assert gate.time_until_keepalive(1.0) == pytest.approx(0.25)
+    assert gate.time_until_keepalive(1.1) == pytest.approx(0.15)
+    assert gate.time_until_keepalive(2.0) == 0.0              # overdue, never negative
+
+    assert DeadbandGate(keepalive_rate=0).time_until_keepalive(5.0) is None
+
+
+def test_keepalive_sends_a_still_pose_on_a_virtual_clock():
+    clock = VirtualClock()
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=2.0)
+    pose = (30.0, -10.0, 0.0)
+    sent = []
+
+    def tick():
+        now = clock.monotonic()
+        if gate.should_send(now, pose):
+            gate.mark_sent(now, pose)
+            sent.append(now)
+        clock.call_later(0.01, tick)
+
+    clock.call_at(0.0, tick)
+    clock.advance(2.05)
+    # The first pose at t=0, then one keep-alive every 0.5 s
+    assert sent == pytest.approx([0.0, 0.5, 1.0, 1.5, 2.0], abs=0.011)
+
+
+def test_keepalive_waits_from_the_last_send_on_a_virtual_clock():
+    clock = VirtualClock()
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=1.0)
+    gate.mark_sent(clock.monotonic(), (0.0, 0.0, 0.0))
+    clock.advance(0.6)
+    assert gate.should_send(clock.monotonic(), (1.0, 0.0, 0.0))  # a real move
+    gate.mark_sent(clock.monotonic(), (1.0, 0.0, 0.0))
+    clock.sleep(gate.time_until_keepalive(clock.monotonic()) - 0.001)
+    assert not gate.should_send(clock.monotonic(), (1.0, 0.0, 0.0))
+    clock.sleep(gate.time_until_keepalive(clock.monotonic()))
+    assert clock.monotonic() == pytest.approx(1.6)
+    assert gate.should_send(clock.monotonic(), (1.0, 0.0, 0.0))
+
+
+def test_reset_sends_the_next_pose():
+    gate = DeadbandGate(deadband=0.5, keepalive_rate=0)
+    gate.mark_sent(0.0, (0.0, 0.0, 0.0))
+    assert not gate.should_send(1.0, (0.0, 0.0, 0.0))
+    gate.reset()
+    assert gate.should_send(1.0, (0.0, 0.0, 0.0))
+
+
+def test_change_driven_traffic_stays_within_the_deadband():
+    samples = synthetic_trajectory("turns", duration=5.0)
+    report = simulate_traffic(samples, rate=100.0, deadband=0.5, keepalive_rate=1.0)
+    assert report['change_messages'] < report['fixed_messages']
+    assert report['max_error'] <= 0.5
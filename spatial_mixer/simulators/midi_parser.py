@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Streaming MIDI Parser
+
+Incremental parser for raw MIDI byte streams (loopback, UDP or file captures,
+e.g. from yamaha_02r96_sim/midi_stream.py). Chunks of any size go in, complete
+messages come out, and parser state carries over between chunks:
+- running status: data bytes after a channel message reuse its status byte
+- real-time bytes (F8-FF) are emitted where they occur, even inside a SysEx
+  or between the data bytes of a channel message, and leave running status alone
+- SysEx split across chunks is reassembled; a status byte inside an
+  unterminated SysEx ends it as an error
+
+Events are tuples: (status, data1, data2) or (status, data1) for channel and
+system common messages, (0xF0, body) for SysEx and (byte,) for real-time.
+The parser works over memoryview slices: a SysEx that arrives in one chunk
+is a slice of that chunk, not a copy (copy it if the chunk's buffer is reused),
+and its end is found with one regex scan instead of a loop per byte. Only SysEx
+split across chunks or interrupted by real-time bytes is copied.
+
+MappingCheck resolves the events through the compiled midi_mapping.json tables
+(yamaha_02r96_sim/mapping_cache.py) and counts them per action, so a recorded
+session can be checked for messages the sketch would ignore.
+
+Usage:
+    python midi_parser.py capture.bin                    # parse a capture and check it against the mappings
+    python midi_parser.py capture.bin --chunk 512 --device "Yamaha 02R96-2"
+    python midi_parser.py --udp 127.0.0.1:5004           # check live byte-stream datagrams (Ctrl+C for the summary)
+"""
+
+import argparse
+import os
+import re
+import socket
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'yamaha_02r96_sim'))
+
+from mapping_cache import MAPPING_FILE, CompiledDevice, load_device
+from stream_integrity import MIDI_STAMP_PREFIX
+
+MAX_SYSEX = 1 << 16  # longer SysEx bodies are dropped as errors
+
+# Data bytes that follow each status byte (channel messages by high nibble, then system common)
+DATA_LENGTHS = [0] * 0x80 + [2] * 0x40 + [1] * 0x20 + [2] * 0x10 + [0] * 0x10
+DATA_LENGTHS[0xF1] = 1  # MTC quarter frame
+DATA_LENGTHS[0xF2] = 2  # song position
+DATA_LENGTHS[0xF3] = 1  # song select
+
+STATUS_BYTE = re.compile(rb'[\x80-\xff]')
+
+Event = Tuple[Any, ...]
+
+
+class MidiParser:
+    """Incremental MIDI byte-stream parser: feed() chunks, get complete messages"""
+
+    def __init__(self, max_sysex: int = MAX_SYSEX):
+        self.max_sysex = max_sysex
+        self.status = 0          # running status (0: none)
+        self.needed = 0          # data bytes per message for the current status
+        self.first = -1          # first data byte of a 2-byte message, -1 while waiting for it
+        self.sysex: Optional[bytearray] = None  # SysEx carried over from an earlier chunk
+        self.oversized = False   # the carried SysEx passed max_sysex: drop it at its end
+        self.bytes = 0
+        self.errors = 0          # stray data bytes, aborted or oversized SysEx
+
+    def feed(self, chunk) -> List[Event]:
+        """Parse one chunk (any bytes-like object) and return the messages it completed"""
+        view = memoryview(chunk)
+        if view.format != 'B':
+            view = view.cast('B')
+        events: List[Event] = []
+        n = len(view)
+        self.bytes += n
+        i = self._sysex(view, 0, 0, events) if self.sysex is not None else 0
+
+        status, needed, first = self.status, self.needed, self.first
+        while i < n:
+            byte = view[i]
+            i += 1
+            if byte < 0x80:
+                if not status:
+                    self.errors += 1  # data byte without a status
+                elif needed == 2:
+                    if first < 0:
+                        first = byte
+                    else:
+                        events.append((status, first, byte))
+                        first = -1
+                        if status >= 0xF0:
+                            status = 0  # system common does not run on
+                else:
+                    events.append((status, byte))
+                    if status >= 0xF0:
+                        status = 0
+            elif byte >= 0xF8:
+                events.append((byte,))  # real-time
+            elif byte == 0xF0:
+                status, first = 0, -1
+                self.status, self.needed, self.first = status, needed, first
+                i = self._sysex(view, i - 1, i, events)
+            elif byte == 0xF7:
+                self.errors += 1  # end of SysEx without a start
+                status = 0
+            else:
+                status, needed, first = byte, DATA_LENGTHS[byte], -1
+                if needed == 0:  # tune request, undefined system common
+                    events.append((byte,))
+                    status = 0
+        self.status, self.needed, self.first = status, needed, first
+        return events
+
+    def _sysex(self, view: memoryview, start: int, scan: int, events: List[Event]) -> int:
+        """Consume a SysEx from view[start] (F0, or its continuation); return the index after it"""
+        carried = self.sysex
+        segment = start
+        n = len(view)
+        while True:
+            match = STATUS_BYTE.search(view, scan)
+            if match is None:
+                # Runs past this chunk: keep what we have (the one copy)
+                if carried is None:
+                    carried = bytearray()
+                carried += view[segment:n]
+                if len(carried) > self.max_sysex:
+                    carried.clear()  # keep consuming it, but not its bytes
+                    self.oversized = True
+                self.sysex = carried
+                return n
+            position = match.start()
+            byte = view[position]
+            if byte >= 0xF8:
+                events.append((byte,))  # real-time inside a SysEx: emit it and cut it out
+                if carried is None:
+                    carried = bytearray()
+                carried += view[segment:position]
+                segment = scan = position + 1
+                continue
+            oversized, self.sysex, self.oversized = self.oversized, None, False
+            if byte != 0xF7:
+                self.errors += 1  # another status byte before F7: the SysEx is lost
+                return position
+            if carried is None:
+                events.append((0xF0, view[segment:position + 1]))
+            else:
+                carried += view[segment:position + 1]
+                if oversized or len(carried) > self.max_sysex:
+                    self.errors += 1
+                else:
+                    events.append((0xF0, memoryview(carried)))
+            return position + 1
+
+
+class MappingCheck:
+    """Counts parsed events by the mapping action they resolve to"""
+
+    def __init__(self, device: CompiledDevice):
+        self.device = device
+        self.actions: Counter = Counter()
+        self.unmapped_cc = 0
+        self.unmatched_sysex = 0
+        self.stamps = 0
+        self.other = 0
+
+    def check(self, events: List[Event]) -> List[Tuple[Event, str, Optional[int]]]:
+        """(event, action, track index) for every event that a mapping accepts"""
+        resolved = []
+        resolve_cc, resolve_sysex = self.device.resolve_cc, self.device.resolve_sysex
+        for event in events:
+            status = event[0]
+            if 0xB0 <= status <= 0xBF:
+                match = resolve_cc(status & 0x0F, event[1])
+                if match is None:
+                    self.unmapped_cc += 1
+                    continue
+                mapping, track = match
+                resolved.append((event, mapping['action'], track))
+                self.actions[mapping['action']] += 1
+            elif status == 0xF0:
+                body = event[1]
+                if tuple(body[:len(MIDI_STAMP_PREFIX)]) == MIDI_STAMP_PREFIX:
+                    self.stamps += 1
+                    continue
+                matches = resolve_sysex(body)
+                if not matches:
+                    self.unmatched_sysex += 1
+                for mapping, track in matches:
+                    resolved.append((event, mapping['action'], track))
+                    self.actions[mapping['action']] += 1
+            else:
+                self.other += 1
+        return resolved
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'actions': dict(self.actions),
+            'unmapped_cc': self.unmapped_cc,
+            'unmatched_sysex': self.unmatched_sysex,
+            'stamps': self.stamps,
+            'other': self.other,
+        }
+
+
+def print_summary(parser: MidiParser, check: MappingCheck, elapsed: float):
+    summary = check.summary()
+    total = sum(summary['actions'].values())
+    rate = parser.bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+    print(f"✓ {parser.bytes} bytes, {total} mapped events in {elapsed:.3f} s ({rate:.1f} MB/s)")
+    for action, count in sorted(summary['actions'].items()):
+        print(f"  {action:<20} {count}")
+    print(f"  unmapped CC: {summary['unmapped_cc']}, unmatched SysEx: {summary['unmatched_sysex']}, "
+          f"stamps: {summary['stamps']}, other: {summary['other']}, stream errors: {parser.errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a raw MIDI byte stream and check it against the mappings")
+    parser.add_argument('capture', nargs='?', help="Capture file ('-' for stdin)")
+    parser.add_argument('--udp', metavar="HOST:PORT", help="Listen for byte-stream datagrams instead")
+    parser.add_argument('--device', default="Yamaha 02R96-1", help="Device entry to check against")
+    parser.add_argument('--mappings', default=MAPPING_FILE, help="Mapping JSON file")
+    parser.add_argument('--chunk', type=int, default=65536, help="Read size in bytes")
+    args = parser.parse_args()
+    if not args.capture and not args.udp:
+        parser.error("give a capture file or --udp")
+
+    midi = MidiParser()
+    check = MappingCheck(load_device(args.device, args.mappings))
+    started = time.perf_counter()
+    try:
+        if args.udp:
+            host, _, port = args.udp.rpartition(':')
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((host or '127.0.0.1', int(port)))
+            print(f"Listening on {host or '127.0.0.1'}:{port} (Ctrl+C for the summary)")
+            while True:
+                check.check(midi.feed(sock.recv(65536)))
+        else:
+            stream = sys.stdin.buffer if args.capture == '-' else open(args.capture, 'rb')
+            with stream:
+                while True:
+                    chunk = stream.read(args.chunk)
+                    if not chunk:
+                        break
+                    check.check(midi.feed(chunk))
+    except KeyboardInterrupt:
+        pass
+    print_summary(midi, check, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+UDP Network Impairment Proxy
+
+Sits between a simulator (head tracker OSC, MIDI-over-UDP) and the sketch and
+reproduces venue Wi-Fi conditions on a bench: delay, jitter, packet loss,
+duplication, reordering and bandwidth caps. Traffic is forwarded in both
+directions (replies go back to the last sender).
+
+The proxy runs on a single asyncio loop. Delayed packets are kept in a hashed
+timer wheel driven by one loop timer, and when every impairment is off packets
+are forwarded straight from the receive callback with no scheduling at all.
+
+Impairments can be changed at runtime through a UDP control port:
+    python netem_proxy.py --command "set delay=30 jitter=10 loss=0.02"
+    python netem_proxy.py --command show
+    python netem_proxy.py --command off
+
+Usage:
+    python netem_proxy.py --listen 127.0.0.1:9100 --target 127.0.0.1:9000
+    python netem_proxy.py --listen 127.0.0.1:9100 --target 127.0.0.1:9000 --delay 20 --loss 0.05
+
+Parameters (set with --<name> at startup or "set <name>=<value>" at runtime):
+    delay      one-way delay in ms
+    jitter     uniform jitter in ms (+/-), may reorder packets on its own
+    loss       drop probability (0-1)
+    duplicate  duplication probability (0-1)
+    reorder    probability (0-1) that a packet is held back by reorder_gap ms
+    reorder_gap extra delay in ms applied to reordered packets
+    rate       bandwidth cap in kbit/s (0 = unlimited)
+    queue      max queueing delay in ms behind the bandwidth cap before tail drop
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+Address = Tuple[str, int]
+
+DEFAULT_CONTROL_PORT = 9199
+
+
+class Impairments:
+    """Current impairment settings (shared by both directions)"""
+
+    # name -> (default, minimum, maximum)
+    PARAMETERS = {
+        'delay': (0.0, 0.0, 60000.0),
+        'jitter': (0.0, 0.0, 60000.0),
+        'loss': (0.0, 0.0, 1.0),
+        'duplicate': (0.0, 0.0, 1.0),
+        'reorder': (0.0, 0.0, 1.0),
+        'reorder_gap': (10.0, 0.0, 60000.0),
+        'rate': (0.0, 0.0, 10_000_000.0),
+        'queue': (200.0, 0.0, 60000.0),
+    }
+
+    def __init__(self, **values):
+        self.off()
+        self.update(**values)
+
+    def off(self):
+        """Disable every impairment"""
+        for name, (default, _, _) in self.PARAMETERS.items():
+            setattr(self, name, default)
+        self.active = False
+
+    def update(self, **values):
+        """Validate and apply new parameter values"""
+        for name, value in values.items():
+            if name not in self.PARAMETERS:
+                raise ValueError(f"Unknown parameter '{name}' (choose from: {', '.join(self.PARAMETERS)})")
+            _, low, high = self.PARAMETERS[name]
+            value = float(value)
+            if not low <= value <= high:
+                raise ValueError(f"{name} must be between {low} and {high}")
+            setattr(self, name, value)
+        # Cached so the fast path is a single attribute check per packet
+        self.active = any(getattr(self, name) for name in
+                          ('delay', 'jitter', 'loss', 'duplicate', 'reorder', 'rate'))
+
+    def describe(self) -> str:
+        if not self.active:
+            return "impairments off"
+        return " ".join(f"{name}={getattr(self, name):g}" for name in self.PARAMETERS)
+
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) scheduling, one loop timer for all pending packets"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, tick: float = 0.001, slots: int = 4096):
+        self.loop = loop
+        self.tick = tick
+        self.slots: List[List[list]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.cursor_time = 0.0
+        self.pending = 0
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+    def schedule(self, delay: float, callback: Callable, *args):
+        """Run callback(*args) after delay seconds (rounded up to the tick)"""
+        now = self.loop.time()
+        if self.pending == 0:
+            # Idle wheel: restart the time base so no catch-up ticks are needed
+            self.cursor_time = now
+        ticks = max(1, -int(-(now + delay - self.cursor_time) // self.tick))
+        rounds = (ticks - 1) // len(self.slots)
+        self.slots[(self.cursor + ticks) % len(self.slots)].append([rounds, callback, args])
+        self.pending += 1
+        if self.handle is None:
+            self.handle = self.loop.call_at(self.cursor_time + self.tick, self._advance)
+
+    def _advance(self):
+        self.handle = None
+        now = self.loop.time()
+        slot_count = len(self.slots)
+        while self.pending and self.cursor_time + self.tick <= now:
+            self.cursor = (self.cursor + 1) % slot_count
+            self.cursor_time += self.tick
+            slot = self.slots[self.cursor]
+            if not slot:
+                continue
+            due, waiting = [], []
+            for entry in slot:
+                if entry[0] == 0:
+                    due.append(entry)
+                else:
+                    entry[0] -= 1
+                    waiting.append(entry)
+            self.slots[self.cursor] = waiting
+            for _, callback, args in due:
+                self.pending -= 1
+                callback(*args)
+        if self.pending:
+            self.handle = self.loop.call_at(self.cursor_time + self.tick, self._advance)
+
+    def clear(self):
+        """Drop every pending entry"""
+        for slot in self.slots:
+            slot.clear()
+        self.pending = 0
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+
+class Link:
+    """One direction of the proxy: applies impairments, keeps counters"""
+
+    COUNTERS = ('received', 'forwarded', 'lost', 'duplicated', 'reordered', 'queue_dropped')
+
+    def __init__(self, name: str, impairments: Impairments, wheel: TimerWheel,
+                 rng: random.Random):
+        self.name = name
+        self.impairments = impairments
+        self.wheel = wheel
+        self.rng = rng
+        self.busy_until = 0.0  # when the bandwidth-capped "wire" is free again
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats: Dict[str, int] = {name: 0 for name in self.COUNTERS}
+
+    def submit(self, data: bytes, send: Callable[[bytes], None]):
+        """Forward a datagram, applying the current impairments"""
+        stats = self.stats
+        stats['received'] += 1
+        imp = self.impairments
+        if not imp.active:
+            send(data)
+            stats['forwarded'] += 1
+            return
+
+        rng = self.rng
+        if imp.loss and rng.random() < imp.loss:
+            stats['lost'] += 1
+            return
+
+        copies = 1
+        if imp.duplicate and rng.random() < imp.duplicate:
+            copies = 2
+            stats['duplicated'] += 1
+
+        now = self.wheel.loop.time()
+        for _ in range(copies):
+            delay = imp.delay
+            if imp.jitter:
+                delay += rng.uniform(-imp.jitter, imp.jitter)
+            if imp.reorder and rng.random() < imp.reorder:
+                delay += imp.reorder_gap
+                stats['reordered'] += 1
+            delay = max(delay, 0.0) / 1000.0
+
+            if imp.rate:
+                # Serialize onto a wire of the capped bandwidth; tail-drop if the queue is too long
+                start = max(now, self.busy_until)
+                if start - now > imp.queue / 1000.0:
+                    stats['queue_dropped'] += 1
+                    continue
+                self.busy_until = start + len(data) * 8 / (imp.rate * 1000.0)
+                delay += self.busy_until - now
+
+            if delay <= 0:
+                self._deliver(send, data)
+            else:
+                self.wheel.schedule(delay, self._deliver, send, data)
+
+    def _deliver(self, send: Callable[[bytes], None], data: bytes):
+        try:
+            send(data)
+            self.stats['forwarded'] += 1
+        except OSError as e:
+            print(f"✗ {self.name}: send failed: {e}")
+
+    def describe(self) -> str:
+        return f"{self.name}: " + " ".join(f"{k}={v}" for k, v in self.stats.items())
+
+
+class _Endpoint(asyncio.DatagramProtocol):
+    """Forwards every received datagram to a handler"""
+
+    def __init__(self, handler: Callable[[bytes, Address], None]):
+        self.handler = handler
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.handler(data, addr)
+
+    def error_received(self, exc):
+        # ICMP port unreachable etc.: the sketch is not listening yet
+        pass
+
+
+class NetemProxy:
+    """Bidirectional UDP proxy with runtime-adjustable impairments"""
+
+    def __init__(self, listen: Address, target: Address, impairments: Impairments,
+                 control_port: Optional[int] = DEFAULT_CONTROL_PORT, seed: Optional[int] = None,
+                 tick: float = 0.001):
+        self.listen = listen
+        self.target = target
+        self.impairments = impairments
+        self.control_port = control_port
+        self.rng = random.Random(seed)
+        self.tick = tick
+        self.client: Optional[Address] = None  # last sender, receives the replies
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.wheel = TimerWheel(loop, self.tick)
+        self.forward = Link("forward", self.impairments, self.wheel, self.rng)
+        self.reverse = Link("reverse", self.impairments, self.wheel, self.rng)
+
+        self.downstream, _ = await loop.create_datagram_endpoint(
+            lambda: _Endpoint(self._from_client), local_addr=self.listen)
+        self.upstream, _ = await loop.create_datagram_endpoint(
+            lambda: _Endpoint(self._from_target), remote_addr=self.target)
+        if self.control_port:
+            self.control, _ = await loop.create_datagram_endpoint(
+                lambda: _Endpoint(self._on_control), local_addr=(self.listen[0], self.control_port))
+
+    def _from_client(self, data: bytes, addr: Address):
+        self.client = addr
+        self.forward.submit(data, self.upstream.sendto)
+
+    def _from_target(self, data: bytes, addr: Address):
+        if self.client is not None:
+            client = self.client
+            self.reverse.submit(data, lambda d: self.downstream.sendto(d, client))
+
+    def _on_control(self, data: bytes, addr: Address):
+        reply = self.handle_command(data.decode('utf-8', 'replace'))
+        self.control.sendto(reply.encode('utf-8'), addr)
+
+    def handle_command(self, line: str) -> str:
+        """Apply a control command and return the reply text
+
+        Commands: set name=value ..., off, show, reset
+        """
+        words = line.strip().split()
+        if not words:
+            return "error: empty command"
+        command = words[0].lower()
+        try:
+            if command == 'set':
+                values = dict(word.split('=', 1) for word in words[1:])
+                self.impairments.update(**values)
+                if not self.impairments.rate:
+                    self.forward.busy_until = self.reverse.busy_until = 0.0
+            elif command == 'off':
+                self.impairments.off()
+            elif command == 'reset':
+                self.forward.reset_stats()
+                self.reverse.reset_stats()
+            elif command != 'show':
+                return f"error: unknown command '{command}' (set, off, show, reset)"
+        except ValueError as e:
+            return f"error: {e}"
+        return self.describe()
+
+    def describe(self) -> str:
+        return "\n".join([self.impairments.describe(), self.forward.describe(),
+                          self.reverse.describe(), f"pending={self.wheel.pending}"])
+
+
+def parse_address(value: str) -> Address:
+    """Parse host:port (or just a port on 127.0.0.1)"""
+    host, _, port = value.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+def send_command(command: str, control: Address, timeout: float = 1.0) -> str:
+    """Send a control command to a running proxy and return its reply"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(command.encode('utf-8'), control)
+        return sock.recv(65535).decode('utf-8')
+
+
+async def run_proxy(proxy: NetemProxy, stats_interval: float):
+    await proxy.start()
+    print(f"✓ Proxy {proxy.listen[0]}:{proxy.listen[1]} → {proxy.target[0]}:{proxy.target[1]}")
+    if proxy.control_port:
+        print(f"  Control port: {proxy.listen[0]}:{proxy.control_port}")
+    print(f"  {proxy.impairments.describe()}")
+    while True:
+        await asyncio.sleep(stats_interval if stats_interval > 0 else 3600)
+        if stats_interval > 0:
+            print(proxy.describe())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP network impairment proxy for simulator traffic")
+    parser.add_argument('--listen', default='127.0.0.1:9100', help="host:port the simulator sends to")
+    parser.add_argument('--target', default='127.0.0.1:9000', help="host:port of the sketch")
+    parser.add_argument('--control-port', type=int, default=DEFAULT_CONTROL_PORT,
+                        help="UDP port for runtime control commands (0 = disabled)")
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between stats lines (0 = quiet)")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible impairments")
+    parser.add_argument('--tick', type=float, default=1.0, help="Timer wheel resolution in ms")
+    parser.add_argument('--command', help="Send a control command to a running proxy and exit")
+    for name, (default, _, _) in Impairments.PARAMETERS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=default)
+    args = parser.parse_args()
+
+    if args.command:
+        control = (parse_address(args.listen)[0], args.control_port)
+        try:
+            print(send_command(args.command, control))
+        except socket.timeout:
+            print(f"✗ No reply from proxy control port {control[0]}:{control[1]}")
+            sys.exit(1)
+        return
+
+    impairments = Impairments(**{name: getattr(args, name) for name in Impairments.PARAMETERS})
+    proxy = NetemProxy(parse_address(args.listen), parse_address(args.target), impairments,
+                       control_port=args.control_port or None, seed=args.seed, tick=args.tick / 1000.0)
+    try:
+        asyncio.run(run_proxy(proxy, args.stats_interval))
+    except KeyboardInterrupt:
+        print("\n⏹️ Proxy stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+OSC Address Dispatcher
+
+Reference dispatcher for the sketch's OSC handlers (oscHandlers in
+spatial_mixer.pde), for the receiving side of the simulators: monitors, and a
+DAW stand-in that takes the sketch's /track/N/... output.
+
+The sketch keys its handlers by patterns like "/track/*/volume" and, for every
+message, builds a log string, then tries each key in turn with String.matches
+(a regex compiled on every call) and parses the track number out of the
+address again in the handler. OscDispatcher compiles the patterns once into a
+trie of address segments instead:
+- a literal segment costs one dict lookup; '*' matches any one non-empty segment
+- literal children are tried before '*', so the most specific pattern wins
+  (the sketch's choice between overlapping keys depends on HashMap order)
+- each segment a '*' matched is captured, as an int when it is a number, so
+  handlers get the track number without parsing the address
+Dispatch cost grows with the address depth, not with the number of patterns.
+benchmark() measures it against a linear scan of per-pattern regexes (the
+sketch's approach, compiled once here) and one combined alternation regex.
+
+Usage:
+    python osc_dispatch.py --bench                 # dispatch rate at 50-800 patterns
+    python osc_dispatch.py --udp 127.0.0.1:8100    # DAW stand-in for the sketch (Ctrl+C for the summary)
+"""
+
+import argparse
+import random
+import re
+import socket
+import struct
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# What the sketch sends to the DAW (Track.pde, spatial_mixer.pde), and what it handles itself
+DAW_PATTERNS = ["/track/*/volume", "/track/*/pan", "/track/*/mute", "/track/*/solo",
+                "/track/*/azimuth", "/track/*/zenith", "/track/*/radius", "/track/*/yaw"]
+SKETCH_PATTERNS = ["/track/*/volume", "/track/*/vu", "/track/*/mute", "/track/*/solo"]
+
+BENCH_PARAMS = ["volume", "pan", "mute", "solo", "azimuth", "zenith", "radius", "vu"]
+BENCH_PATTERN_COUNTS = [50, 200, 800]
+
+# handler(captures, args): captures holds what each '*' matched (int for numbers)
+Handler = Callable[[Tuple[Any, ...], Sequence[Any]], Any]
+Match = Tuple[Handler, str, Tuple[Any, ...]]  # (handler, pattern, captures)
+
+# Trie node slots (a list per node: cheaper to index than attributes)
+CHILDREN, WILDCARD, HANDLER, PATTERN = range(4)
+
+
+def _node() -> list:
+    return [{}, None, None, None]
+
+
+def _capture(segment: str):
+    return int(segment) if segment.isdigit() else segment
+
+
+class OscDispatcher:
+    """OSC handler patterns compiled into a segment trie with '*' captures"""
+
+    def __init__(self):
+        self.root = _node()
+        self.patterns = 0
+        self.dispatched = 0
+        self.unhandled = 0
+
+    def add(self, pattern: str, handler: Handler):
+        """Register a handler for a pattern; '*' must be a whole segment"""
+        if not pattern.startswith('/'):
+            raise ValueError(f"OSC pattern must start with '/': '{pattern}'")
+        node = self.root
+        for segment in pattern[1:].split('/'):
+            if segment == '*':
+                if node[WILDCARD] is None:
+                    node[WILDCARD] = _node()
+                node = node[WILDCARD]
+            elif not segment or any(c in segment for c in '*?[]{}'):
+                raise ValueError(f"unsupported segment '{segment}' in '{pattern}' (use literals or a whole '*')")
+            else:
+                node = node[CHILDREN].setdefault(segment, _node())
+        if node[HANDLER] is not None:
+            raise ValueError(f"duplicate OSC pattern '{pattern}'")
+        node[HANDLER] = handler
+        node[PATTERN] = pattern
+        self.patterns += 1
+
+    def match(self, address: str) -> Optional[Match]:
+        """(handler, pattern, captures) for an address, or None"""
+        if not address.startswith('/'):
+            return None
+        segments = address[1:].split('/')
+        return self._match(self.root, segments, 0, len(segments))
+
+    def _match(self, node: list, segments: List[str], index: int, end: int) -> Optional[Match]:
+        if index == end:
+            return (node[HANDLER], node[PATTERN], ()) if node[HANDLER] is not None else None
+        segment = segments[index]
+        child = node[CHILDREN].get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, end)
+            if found is not None:
+                return found
+        wildcard = node[WILDCARD]
+        if wildcard is not None and segment:
+            found = self._match(wildcard, segments, index + 1, end)
+            if found is not None:
+                return found[0], found[1], (_capture(segment),) + found[2]
+        return None
+
+    def dispatch(self, address: str, args: Sequence[Any] = ()) -> bool:
+        """Call the handler for an address; False if no pattern matches"""
+        found = self.match(address)
+        if found is None:
+            self.unhandled += 1
+            return False
+        self.dispatched += 1
+        found[0](found[2], args)
+        return True
+
+
+def _pattern_regex(pattern: str) -> str:
+    """The sketch's translation of a handler key: '*' -> one segment (captured here)"""
+    return '/'.join('([^/]+)' if segment == '*' else re.escape(segment) for segment in pattern.split('/'))
+
+
+class LinearDispatcher:
+    """Baseline: try each pattern's regex in turn (the sketch's findOscHandler)"""
+
+    def __init__(self):
+        self.entries: List[Tuple[Any, Handler, str]] = []
+
+    def add(self, pattern: str, handler: Handler):
+        self.entries.append((re.compile(_pattern_regex(pattern)), handler, pattern))
+
+    def match(self, address: str) -> Optional[Match]:
+        for regex, handler, pattern in self.entries:
+            found = regex.fullmatch(address)
+            if found:
+                return handler, pattern, tuple(_capture(group) for group in found.groups())
+        return None
+
+
+class RegexDispatcher:
+    """Baseline: every pattern as one alternative of a single compiled regex"""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, Handler, str]] = []
+        self.regex = None
+        self.groups: Dict[str, Tuple[Handler, str, range]] = {}
+
+    def add(self, pattern: str, handler: Handler):
+        self.entries.append((_pattern_regex(pattern), handler, pattern))
+        self.regex = None
+
+    def compile(self):
+        alternatives = []
+        group = 1
+        for i, (regex, handler, pattern) in enumerate(self.entries):
+            captures = regex.count('([^/]+)')
+            alternatives.append(f"(?P<p{i}>{regex})")
+            self.groups[f"p{i}"] = (handler, pattern, range(group + 1, group + 1 + captures))
+            group += 1 + captures
+        self.regex = re.compile('|'.join(alternatives))
+
+    def match(self, address: str) -> Optional[Match]:
+        if self.regex is None:
+            self.compile()
+        found = self.regex.fullmatch(address)
+        if not found:
+            return None
+        handler, pattern, groups = self.groups[found.lastgroup]
+        return handler, pattern, tuple(_capture(found.group(i)) for i in groups)
+
+
+# OSC packets
+
+def _read_string(data: bytes, offset: int) -> Tuple[str, int]:
+    end = data.index(b'\0', offset)
+    return data[offset:end].decode('utf-8', 'replace'), (end + 4) & ~3
+
+
+def parse_osc_packet(data: bytes) -> List[Tuple[str, Tuple[Any, ...]]]:
+    """(address, arguments) of each message in an OSC message or (nested) bundle
+
+    Raises ValueError or struct.error for a malformed packet.
+    """
+    if data.startswith(b'#bundle\0'):
+        messages = []
+        offset = 16  # '#bundle\0' and the 8-byte time tag
+        while offset + 4 <= len(data):
+            size, = struct.unpack_from('>i', data, offset)
+            if not 0 <= size <= len(data) - offset - 4:
+                raise ValueError(f"bundle element size {size} at offset {offset} does not fit the packet")
+            messages += parse_osc_packet(data[offset + 4:offset + 4 + size])
+            offset += 4 + size
+        return messages
+    address, offset = _read_string(data, 0)
+    if offset >= len(data):
+        return [(address, ())]
+    tags, offset = _read_string(data, offset)
+    args: List[Any] = []
+    for tag in tags[1:]:
+        if tag in 'if':
+            args.append(struct.unpack_from('>i' if tag == 'i' else '>f', data, offset)[0])
+            offset += 4
+        elif tag in 'hd':
+            args.append(struct.unpack_from('>q' if tag == 'h' else '>d', data, offset)[0])
+            offset += 8
+        elif tag == 's':
+            value, offset = _read_string(data, offset)
+            args.append(value)
+        elif tag == 'b':
+            size, = struct.unpack_from('>i', data, offset)
+            args.append(data[offset + 4:offset + 4 + size])
+            offset += (4 + size + 3) & ~3
+        elif tag in 'TFN':
+            args.append({'T': True, 'F': False, 'N': None}[tag])
+        else:
+            raise ValueError(f"unsupported OSC type tag '{tag}' in {address}")
+    return [(address, tuple(args))]
+
+
+# Benchmark
+
+def benchmark_patterns(count: int) -> List[str]:
+    """count distinct handler patterns: the sketch's /track ones, then /<group>N/*/<param>"""
+    patterns = list(dict.fromkeys(SKETCH_PATTERNS + DAW_PATTERNS))
+    group = 0
+    while len(patterns) < count:
+        patterns += [f"/group{group}/*/{param}" for param in BENCH_PARAMS]
+        group += 1
+    return patterns[:count]
+
+
+def benchmark_addresses(patterns: List[str], count: int = 1000, miss: float = 0.1,
+                        seed: int = 1) -> List[str]:
+    """Addresses for the patterns with tracks 1-48, plus a share that matches nothing"""
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(count):
+        if rng.random() < miss:
+            addresses.append(f"/unknown/{rng.randint(1, 48)}/volume")
+        else:
+            addresses.append(rng.choice(patterns).replace('*', str(rng.randint(1, 48))))
+    return addresses
+
+
+DISPATCHERS = {'trie': OscDispatcher, 'regex': RegexDispatcher, 'linear': LinearDispatcher}
+
+
+def build_dispatcher(kind: str, patterns: List[str]):
+    dispatcher = DISPATCHERS[kind]()
+    for pattern in patterns:
+        dispatcher.add(pattern, lambda captures, args: None)
+    return dispatcher
+
+
+def dispatch_rate(dispatcher, addresses: List[str], seconds: float = 0.2) -> float:
+    """Addresses matched per second (handler lookup and captures, no handler work)"""
+    match = dispatcher.match
+    done = 0
+    started = time.perf_counter()
+    while True:
+        for address in addresses:
+            match(address)
+        done += len(addresses)
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return done / elapsed
+
+
+def benchmark(counts: Sequence[int] = BENCH_PATTERN_COUNTS, seconds: float = 0.2) -> Dict[int, Dict[str, float]]:
+    """Dispatch rate (addresses/s) of each dispatcher at each pattern count"""
+    results = {}
+    for count in counts:
+        patterns = benchmark_patterns(count)
+        addresses = benchmark_addresses(patterns)
+        results[count] = {kind: dispatch_rate(build_dispatcher(kind, patterns), addresses, seconds)
+                          for kind in DISPATCHERS}
+    return results
+
+
+# DAW stand-in
+
+class DawStandIn:
+    """Receives the sketch's per-track OSC output and keeps the latest value of each control"""
+
+    def __init__(self, patterns: Sequence[str] = DAW_PATTERNS):
+        self.dispatcher = OscDispatcher()
+        self.state: Dict[Tuple[str, Any], Any] = {}
+        self.counts: Counter = Counter()
+        self.unhandled: Counter = Counter()
+        self.malformed = 0  # datagrams that were not valid OSC (dropped whole)
+        for pattern in patterns:
+            control = pattern.rsplit('/', 1)[1]
+            self.dispatcher.add(pattern, self._setter(pattern, control))
+
+    def _setter(self, pattern: str, control: str) -> Handler:
+        def handle(captures, args):
+            self.counts[pattern] += 1
+            self.state[(control, captures[0] if captures else None)] = args[0] if len(args) == 1 else args
+        return handle
+
+    def receive(self, datagram: bytes):
+        try:
+            messages = parse_osc_packet(datagram)
+        except (ValueError, struct.error):
+            self.malformed += 1
+            return
+        for address, args in messages:
+            if not self.dispatcher.dispatch(address, args):
+                self.unhandled[address] += 1
+
+
+def print_daw_summary(daw: DawStandIn, elapsed: float):
+    total = sum(daw.counts.values())
+    print(f"✓ {total} messages handled in {elapsed:.1f} s, {len(daw.state)} controls set")
+    for pattern, count in sorted(daw.counts.items()):
+        print(f"  {pattern:<20} {count}")
+    if daw.unhandled:
+        print(f"  unhandled: {', '.join(f'{a} ({n})' for a, n in daw.unhandled.most_common(5))}")
+    if daw.malformed:
+        print(f"  malformed datagrams dropped: {daw.malformed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC pattern dispatch: benchmark, or a DAW stand-in for the sketch")
+    parser.add_argument('--bench', action='store_true', help="Compare trie, regex and linear dispatch rates")
+    parser.add_argument('--patterns', type=int, nargs='+', default=BENCH_PATTERN_COUNTS,
+                        help="Pattern counts to benchmark")
+    parser.add_argument('--udp', metavar="HOST:PORT", help="Receive the sketch's OSC output on this address")
+    args = parser.parse_args()
+    if not args.bench and not args.udp:
+        parser.error("give --bench or --udp")
+
+    if args.bench:
+        print(f"{'patterns':>8}  " + "  ".join(f"{kind:>14}" for kind in DISPATCHERS) + "   (addresses/s)")
+        for count, rates in benchmark(args.patterns).items():
+            print(f"{count:>8}  " + "  ".join(f"{rates[kind]:>14,.0f}" for kind in DISPATCHERS)
+                  + f"   trie {rates['trie'] / rates['linear']:.0f}x linear")
+        return
+
+    host, _, port = args.udp.rpartition(':')
+    daw = DawStandIn()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host or '127.0.0.1', int(port)))
+    print(f"DAW stand-in on {host or '127.0.0.1'}:{port} (Ctrl+C for the summary)")
+    started = time.perf_counter()
+    try:
+        while True:
+            daw.receive(sock.recv(65536))
+    except KeyboardInterrupt:
+        pass
+    print_daw_summary(daw, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Scenario Runner
+
+Drives the head tracker and Yamaha 02R96-1 simulators together from one
+declarative JSON scenario, e.g. "tracker sweeping at 250 Hz while faders 1-48
+ramp and positions orbit". Every generator runs on one asyncio event loop and
+schedules its ticks at absolute offsets from a shared monotonic start time, so
+the combined message timeline is reproducible and each send's lateness is
+measured.
+
+Generator types:
+- head_sweep:      sinusoidal yaw/pitch/roll sent with a rotation schema (OSC)
+- ramp:            volume or pan ramps over a range of tracks (MIDI CC)
+- orbit:           X/Y positions circling the origin for a range of tracks (MIDI SysEx)
+- events:          one-shot commands at given times (mute, solo, volume, master, pan, posx, posy)
+
+Usage:
+    python scenario_runner.py scenarios/tracker_sweep_fader_ramps.json
+    python scenario_runner.py scenarios/tracker_sweep_fader_ramps.json --dry-run --timeline out.csv
+
+See scenarios/ for examples.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'bridgehead_headtracker_sim'))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'yamaha_02r96_sim'))
+
+from rotation_schemas import RotationSender, compile_schemas, load_schemas
+from sim_clock import VirtualClock
+
+
+def parse_tracks(spec) -> List[int]:
+    """Parse a track selection: 5, [1, 2, 3], "1-48" or "1-8,12,20-24" """
+    if isinstance(spec, int):
+        return [spec]
+    if isinstance(spec, list):
+        return [int(t) for t in spec]
+    tracks = []
+    for part in str(spec).split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            tracks.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            tracks.append(int(part))
+    return tracks
+
+
+def wave(shape: str, phase: float) -> float:
+    """Periodic waveform in [0, 1] for a phase in cycles"""
+    phase %= 1.0
+    if shape == 'triangle':
+        return 1.0 - abs(2.0 * phase - 1.0)
+    if shape == 'saw':
+        return phase
+    if shape == 'sine':
+        return 0.5 - 0.5 * math.cos(2 * math.pi * phase)
+    if shape == 'square':
+        return 1.0 if phase < 0.5 else 0.0
+    raise ValueError(f"Unknown shape '{shape}' (choose from: triangle, saw, sine, square)")
+
+
+class ScenarioClock:
+    """Shared monotonic clock: every generator schedules against one start time"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, lead_in: float = 0.1):
+        self.loop = loop
+        self.start = loop.time() + lead_in
+
+    def now(self) -> float:
+        """Seconds since the scenario start"""
+        return self.loop.time() - self.start
+
+    async def sleep_until(self, t: float):
+        delay = self.start + t - self.loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Generator:
+    """Base generator: ticks at a fixed rate between start and stop offsets"""
+
+    def __init__(self, spec: Dict[str, Any], outputs: 'Outputs', duration: float):
+        self.name = spec.get('name', spec['type'])
+        self.rate = float(spec.get('rate', 50.0))
+        self.start = float(spec.get('start', 0.0))
+        self.stop = min(float(spec.get('stop', duration)), duration)
+        self.outputs = outputs
+        self.ticks = 0
+        self.late_sum = 0.0
+        self.late_max = 0.0
+
+    def schedule(self) -> List[float]:
+        """Tick times (seconds from scenario start)"""
+        count = max(0, math.ceil((self.stop - self.start) * self.rate - 1e-9))
+        return [self.start + n / self.rate for n in range(count)]
+
+    async def run(self, clock: ScenarioClock):
+        for t in self.schedule():
+            await clock.sleep_until(t)
+            late = max(0.0, clock.now() - t)
+            self.late_sum += late
+            self.late_max = max(self.late_max, late)
+            self.outputs.at = t
+            self.tick(t - self.start)
+            self.ticks += 1
+
+    def tick(self, t: float):
+        raise NotImplementedError
+
+    def report(self) -> str:
+        mean = self.late_sum / self.ticks if self.ticks else 0.0
+        return (f"{self.name:<20} ticks={self.ticks:<7} late mean={mean * 1000:.3f} ms "
+                f"max={self.late_max * 1000:.3f} ms")
+
+
+class HeadSweepGenerator(Generator):
+    """Sinusoidal head motion: per axis amplitude (deg), frequency (Hz), phase (cycles), offset (deg)"""
+
+    def __init__(self, spec, outputs, duration):
+        super().__init__(spec, outputs, duration)
+        self.schema = spec.get('schema', 'ypr')
+        self.axes = [spec.get(axis, {}) for axis in ('yaw', 'pitch', 'roll')]
+
+    def tick(self, t: float):
+        pose = [axis.get('offset', 0.0) + axis.get('amplitude', 0.0) *
+                math.sin(2 * math.pi * (axis.get('frequency', 0.0) * t + axis.get('phase', 0.0)))
+                for axis in self.axes]
+        self.outputs.send_pose(self.schema, *pose)
+
+
+class RampGenerator(Generator):
+    """Volume or pan ramps across tracks; track_phase staggers tracks (cycles per track)"""
+
+    def __init__(self, spec, outputs, duration):
+        super().__init__(spec, outputs, duration)
+        self.parameter = spec.get('parameter', 'volume')
+        if self.parameter not in ('volume', 'pan'):
+            raise ValueError(f"ramp '{self.name}': parameter must be volume or pan")
+        self.tracks = parse_tracks(spec.get('tracks', '1-48'))
+        self.low = int(spec.get('from', 0))
+        self.high = int(spec.get('to', 127))
+        self.period = float(spec.get('period', 4.0))
+        self.shape = spec.get('shape', 'triangle')
+        self.track_phase = float(spec.get('track_phase', 0.0))
+        wave(self.shape, 0.0)  # validate shape up front
+
+    def tick(self, t: float):
+        send = self.outputs.mixer_call
+        for i, track in enumerate(self.tracks):
+            level = wave(self.shape, t / self.period + i * self.track_phase)
+            value = round(self.low + (self.high - self.low) * level)
+            send(f"send_track_{self.parameter}", track, value)
+
+
+class OrbitGenerator(Generator):
+    """X/Y positions circling the origin; tracks are spread evenly around the circle"""
+
+    def __init__(self, spec, outputs, duration):
+        super().__init__(spec, outputs, duration)
+        self.tracks = parse_tracks(spec.get('tracks', '1-8'))
+        self.radius = float(spec.get('radius', 40))
+        self.period = float(spec.get('period', 8.0))
+
+    def tick(self, t: float):
+        send = self.outputs.mixer_call
+        count = len(self.tracks)
+        for i, track in enumerate(self.tracks):
+            angle = 2 * math.pi * (t / self.period + i / count)
+            send("send_position_x", track, round(self.radius * math.cos(angle)))
+            send("send_position_y", track, round(self.radius * math.sin(angle)))
+
+
+class EventsGenerator(Generator):
+    """One-shot commands: {"at": seconds, "command": "mute", "track": 3, "value": true}"""
+
+    COMMANDS = {
+        'volume': 'send_track_volume', 'pan': 'send_track_pan', 'mute': 'send_track_mute',
+        'solo': 'send_track_solo', 'posx': 'send_position_x', 'posy': 'send_position_y',
+        'master': 'send_master_volume',
+    }
+
+    def __init__(self, spec, outputs, duration):
+        super().__init__(spec, outputs, duration)
+        self.events = sorted(spec['events'], key=lambda e: e['at'])
+        for event in self.events:
+            if event['command'] not in self.COMMANDS:
+                raise ValueError(f"events '{self.name}': unknown command '{event['command']}'")
+
+    def schedule(self) -> List[float]:
+        return [self.start + e['at'] for e in self.events if self.start + e['at'] < self.stop]
+
+    def tick(self, t: float):
+        event = self.events[self.ticks]
+        method = self.COMMANDS[event['command']]
+        if event['command'] == 'master':
+            self.outputs.mixer_call(method, event['value'])
+        else:
+            for track in parse_tracks(event['track']):
+                self.outputs.mixer_call(method, track, event['value'])
+
+
+GENERATORS = {
+    'head_sweep': HeadSweepGenerator,
+    'ramp': RampGenerator,
+    'orbit': OrbitGenerator,
+    'events': EventsGenerator,
+}
+
+MIDI_GENERATORS = ('ramp', 'orbit', 'events')
+
+
+class Outputs:
+    """Message sinks shared by all generators (real ports, or recorded in dry-run)"""
+
+    def __init__(self, scenario: Dict[str, Any], dry_run: bool = False, record: bool = False):
+        self.dry_run = dry_run
+        self.timeline: Optional[List[Tuple[float, str, tuple]]] = [] if (dry_run or record) else None
+        self.counts: Dict[str, int] = {}
+        self.at = 0.0  # scheduled time of the tick being sent
+
+        osc = scenario.get('osc', {})
+        self.encoders = compile_schemas(load_schemas())
+        self.senders: Dict[str, RotationSender] = {}
+        self.osc_target = (osc.get('host', '127.0.0.1'), int(osc.get('port', 9100)))
+
+        self.mixer = None
+        if not dry_run and any(g['type'] in MIDI_GENERATORS for g in scenario['generators']):
+            # Only open a MIDI port (and import rtmidi) when the scenario actually sends MIDI
+            from yamaha_02r96_simulator import YamahaSimulator
+            self.mixer = YamahaSimulator(verbose=False)
+            self.mixer.connect_to_midi_port()
+
+    def send_pose(self, schema: str, yaw: float, pitch: float, roll: float):
+        self._record(f"osc:{schema}", (yaw, pitch, roll))
+        if self.dry_run:
+            return
+        sender = self.senders.get(schema)
+        if sender is None:
+            sender = self.senders[schema] = RotationSender(self.encoders[schema], *self.osc_target)
+        sender.send(yaw, pitch, roll)
+
+    def mixer_call(self, method: str, *args):
+        self._record(f"midi:{method}", args)
+        if self.mixer is not None:
+            getattr(self.mixer, method)(*args)
+
+    def _record(self, kind: str, args: tuple):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if self.timeline is not None:
+            self.timeline.append((self.at, kind, args))
+
+    def close(self):
+        for sender in self.senders.values():
+            sender.close()
+        if self.mixer is not None:
+            self.mixer.close()
+
+
+def load_scenario(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        scenario = json.load(f)
+    for spec in scenario['generators']:
+        if spec['type'] not in GENERATORS:
+            raise ValueError(f"Unknown generator type '{spec['type']}' (choose from: {', '.join(GENERATORS)})")
+    return scenario
+
+
+def build_generators(scenario: Dict[str, Any], outputs: Outputs) -> List[Generator]:
+    duration = float(scenario['duration'])
+    return [GENERATORS[spec['type']](spec, outputs, duration) for spec in scenario['generators']]
+
+
+async def run_scenario(scenario: Dict[str, Any], outputs: Outputs) -> List[Generator]:
+    """Run every generator concurrently against one shared clock"""
+    generators = build_generators(scenario, outputs)
+    clock = ScenarioClock(asyncio.get_running_loop())
+    await asyncio.gather(*(g.run(clock) for g in generators))
+    return generators
+
+
+def dry_run_scenario(scenario: Dict[str, Any], outputs: Outputs,
+                     clock: Optional[VirtualClock] = None) -> List[Generator]:
+    """Run every generator in virtual time: ticks run in scheduled-time order, instantly"""
+    clock = clock or VirtualClock()
+    generators = build_generators(scenario, outputs)
+    start = clock.monotonic()
+
+    def tick(generator: Generator, t: float):
+        outputs.at = t
+        generator.tick(t - generator.start)
+        generator.ticks += 1
+
+    # Ticks due at the same time run in generator order
+    for generator in generators:
+        for t in generator.schedule():
+            clock.call_at(start + t, lambda generator=generator, t=t: tick(generator, t))
+    clock.advance(float(scenario['duration']))
+    return generators
+
+
+def write_timeline(path: str, timeline: List[Tuple[float, str, tuple]]):
+    """Write the message timeline as CSV (time, kind, args...)"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['t', 'kind', 'args'])
+        for t, kind, args in sorted(timeline, key=lambda e: e[0]):
+            writer.writerow([f"{t:.6f}", kind, ' '.join(str(round(a, 4)) for a in args)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a combined simulator scenario on one shared clock")
+    parser.add_argument('scenario', help="Scenario JSON file")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Build the message timeline in virtual time without opening ports")
+    parser.add_argument('--timeline', help="Write the scheduled message timeline to a CSV file")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    print(f"▶ Scenario: {scenario.get('name', args.scenario)} ({scenario['duration']} s)")
+
+    outputs = Outputs(scenario, dry_run=args.dry_run, record=bool(args.timeline))
+    try:
+        if args.dry_run:
+            generators = dry_run_scenario(scenario, outputs)
+        else:
+            generators = asyncio.run(run_scenario(scenario, outputs))
+    except KeyboardInterrupt:
+        print("\n⏹️ Scenario stopped")
+        return
+    finally:
+        outputs.close()
+
+    for generator in generators:
+        print(f"  {generator.report()}")
+    for kind, count in sorted(outputs.counts.items()):
+        print(f"  {kind:<28} {count} messages")
+    if args.timeline:
+        write_timeline(args.timeline, outputs.timeline)
+        print(f"✓ Timeline written to {args.timeline}")
+
+
+if __name__ == "__main__":
+    main()
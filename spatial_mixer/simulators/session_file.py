@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Session Files
+
+Compact timestamped binary recordings of a mixer session (fader automation,
+head pose, meters) that can be replayed to the sketch in real time or
+faster. session_generator.py writes them offline with NumPy.
+
+Layout (little-endian):
+
+    header   28 bytes: magic 'SMSF', version, record size, record count,
+                       duration (us), metadata length
+    metadata JSON (how the session was made), zero-padded to a multiple of 16
+    records  16 bytes each, sorted by time:
+             t_us   uint64  microseconds from the session start
+             kind   uint8   1 fader, 2 pose, 3 meter
+             track  uint8   1-48 (0 for the pose)
+             a b c  int16   fader: a = volume 0-127
+                            pose:  a b c = yaw pitch roll in centidegrees
+                            meter: a = level in centi-dBFS (-6000 = -60 dB)
+
+The records map directly onto a NumPy structured array (RECORD_DTYPE), so a
+session of any size is read with one np.fromfile, or memory-mapped.
+
+Replay sends the sketch's own inputs: /track/N/volume and /track/N/vu (0-1)
+to its DAW input, /ypr to its head tracker input.
+
+Usage:
+    python session_file.py info session.smsf
+    python session_file.py replay session.smsf --speed 4
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'bridgehead_headtracker_sim'))
+
+from rotation_schemas import compile_schemas, load_schemas, osc_string
+from sim_clock import REAL_CLOCK
+
+try:
+    import numpy as np
+except ImportError:  # only needed to read or write sessions
+    np = None
+
+MAGIC = b'SMSF'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQI')
+RECORD_SIZE = struct.calcsize('<QBBhhh')  # one record, as laid out above
+ALIGN = 16
+
+KIND_FADER, KIND_POSE, KIND_METER = 1, 2, 3
+KINDS = {KIND_FADER: 'fader', KIND_POSE: 'pose', KIND_METER: 'meter'}
+RECORD_FIELDS = [('t_us', '<u8'), ('kind', 'u1'), ('track', 'u1'), ('a', '<i2'), ('b', '<i2'), ('c', '<i2')]
+RECORD_DTYPE = np.dtype(RECORD_FIELDS) if np else None
+
+METER_RANGE_DB = 60.0  # the sketch's 0-1 VU spans -60..0 dBFS
+# The sketch's OSC inputs (spatial_mixer.pde): DAW on 8000, head tracker on 9000
+DAW_TARGET = ("127.0.0.1", 8000)
+TRACKER_TARGET = ("127.0.0.1", 9000)
+REPLAY_CHUNK = 65536  # records converted to Python values at a time
+
+
+class SessionError(ValueError):
+    """Not a session file, or one this version cannot read"""
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for session files: pip install numpy")
+
+
+def write_session(path: str, records, metadata: Optional[Dict[str, Any]] = None):
+    """Write records (a RECORD_DTYPE array, sorted by t_us) with their metadata"""
+    require_numpy()
+    records = np.asarray(records, dtype=RECORD_DTYPE)
+    meta = json.dumps(metadata or {}, sort_keys=True).encode('utf-8')
+    meta += b'\0' * (-(HEADER.size + len(meta)) % ALIGN)
+    duration = int(records['t_us'][-1]) if len(records) else 0
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, len(records), duration, len(meta)))
+        f.write(meta)
+        records.tofile(f)
+
+
+def read_header(path: str) -> Tuple[Dict[str, Any], int, int, int]:
+    """(metadata, record count, duration in us, offset of the first record)"""
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise SessionError(f"{path}: too short for a session file")
+        magic, version, record_size, count, duration, meta_size = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise SessionError(f"{path}: not a session file")
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise SessionError(f"{path}: session format version {version} is not supported")
+        metadata = json.loads(f.read(meta_size).rstrip(b'\0') or b'{}')
+    return metadata, count, duration, HEADER.size + meta_size
+
+
+def read_session(path: str, mmap: bool = False):
+    """(metadata, records): the records as a RECORD_DTYPE array, memory-mapped if asked"""
+    require_numpy()
+    metadata, count, _, offset = read_header(path)
+    if mmap:
+        return metadata, np.memmap(path, RECORD_DTYPE, 'r', offset, (count,))
+    return metadata, np.fromfile(path, RECORD_DTYPE, count, offset=offset)
+
+
+def summarize(records) -> Dict[str, Any]:
+    kinds, counts = np.unique(records['kind'], return_counts=True)
+    seconds = float(records['t_us'][-1]) / 1e6 if len(records) else 0.0
+    return {'records': len(records), 'seconds': seconds,
+            'bytes': len(records) * RECORD_SIZE,
+            'per_kind': {KINDS.get(int(kind), str(kind)): int(count) for kind, count in zip(kinds, counts)}}
+
+
+class OscReplayTarget:
+    """Sends replayed records as the sketch's OSC inputs"""
+
+    def __init__(self, daw=DAW_TARGET, tracker=TRACKER_TARGET, schema: str = "ypr"):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.daw, self.tracker = daw, tracker
+        self.pose_encoder = compile_schemas({schema: load_schemas()[schema]})[schema]
+        pack = struct.Struct('>f').pack
+        # Fixed address/type-tag headers per track, built once
+        volume = [osc_string(f"/track/{track}/volume") + osc_string(",f") for track in range(256)]
+        vu = [osc_string(f"/track/{track}/vu") + osc_string(",f") for track in range(256)]
+        self.encoders = {
+            KIND_FADER: lambda track, a, b, c: [volume[track] + pack(a / 127.0)],
+            KIND_METER: lambda track, a, b, c: [vu[track] + pack(
+                min(1.0, max(0.0, (a / 100.0 + METER_RANGE_DB) / METER_RANGE_DB)))],
+            KIND_POSE: lambda track, a, b, c: self.pose_encoder.encode(a / 100.0, b / 100.0, c / 100.0),
+        }
+
+    def __call__(self, kind: int, track: int, a: int, b: int, c: int) -> int:
+        target = self.tracker if kind == KIND_POSE else self.daw
+        datagrams = self.encoders[kind](track, a, b, c)
+        for datagram in datagrams:
+            self.sock.sendto(datagram, target)
+        return len(datagrams)
+
+    def close(self):
+        self.sock.close()
+
+
+def replay(records, send: Callable[[int, int, int, int, int], Any], clock=REAL_CLOCK,
+           speed: float = 1.0) -> Dict[str, Any]:
+    """Call send(kind, track, a, b, c) for every record at its time (divided by speed; 0 = back to back)"""
+    start = clock.monotonic()
+    sent = late_total = 0
+    max_late = 0.0
+    for first in range(0, len(records), REPLAY_CHUNK):
+        for t_us, kind, track, a, b, c in records[first:first + REPLAY_CHUNK].tolist():
+            if speed:
+                due = start + t_us / 1e6 / speed
+                now = clock.monotonic()
+                if due > now:
+                    clock.sleep_until(due)
+                else:
+                    late = now - due
+                    late_total += late
+                    max_late = max(max_late, late)
+            send(kind, track, a, b, c)
+            sent += 1
+    return {'records': sent, 'seconds': clock.monotonic() - start,
+            'mean_late_ms': late_total / sent * 1e3 if sent else 0.0, 'max_late_ms': max_late * 1e3}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a session file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help="Print the metadata and record counts")
+    info.add_argument('path')
+    play = commands.add_parser('replay', help="Send the session to the sketch's OSC inputs")
+    play.add_argument('path')
+    play.add_argument('--speed', type=float, default=1.0, help="Replay speed factor (0 = as fast as possible)")
+    play.add_argument('--host', default="127.0.0.1", help="Host running the sketch")
+    play.add_argument('--schema', default="ypr", help="Rotation schema for the pose")
+    args = parser.parse_args()
+
+    try:
+        metadata, records = read_session(args.path, mmap=True)
+    except (OSError, SessionError, ImportError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    summary = summarize(records)
+    print(f"📼 {args.path}: {summary['records']:,} records, {summary['seconds']:.1f} s, "
+          f"{summary['bytes'] / 1e6:.1f} MB")
+    print("   " + ", ".join(f"{kind} {count:,}" for kind, count in summary['per_kind'].items()))
+    if args.command == 'info':
+        print(json.dumps(metadata, indent=2, sort_keys=True))
+        return
+
+    target = OscReplayTarget((args.host, DAW_TARGET[1]), (args.host, TRACKER_TARGET[1]), args.schema)
+    print(f"▶️ Replaying at {args.speed:g}x" if args.speed else "▶️ Replaying back to back")
+    try:
+        report = replay(records, target, speed=args.speed)
+        print(f"✓ Replayed {report['records']:,} records in {report['seconds']:.1f} s "
+              f"(late mean {report['mean_late_ms']:.3f} ms, max {report['max_late_ms']:.3f} ms)")
+    except KeyboardInterrupt:
+        print("\n⏹️ Replay stopped")
+    finally:
+        target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Sharded Sender
+
+Stress-tests an OSC receiver with more streams than one Python thread can
+send (it tops out at some tens of thousands of UDP datagrams per second).
+The streams are split round-robin across a pool of worker processes, each
+pinned to its own core where the OS allows it (os.sched_setaffinity), so the
+aggregate send rate grows close to linearly with the number of cores.
+
+Workloads:
+- trackers: a fleet of head trackers, each sending its own moving pose with a
+            rotation schema (bridgehead_headtracker_sim/rotation_schemas.py)
+- daw:      a DAW feeding automation, one stream per track parameter
+            (/track/N/volume, pan, azimuth, zenith, radius), as the sketch's
+            DAW input receives it
+
+Every worker builds its streams and opens its socket, then waits until all
+are ready; the parent then hands out one shared start time (perf_counter is
+system-wide, so it means the same instant in every process) and the workers
+send on the same tick grid. Each returns its counts and a lateness
+histogram (sim_metrics.Histogram), which are merged into one report.
+
+Usage:
+    python sharded_sender.py --workload trackers --streams 1000 --rate 500 --workers 4
+    python sharded_sender.py --workload daw --streams 240 --rate 0 --duration 3    # as fast as possible
+    python sharded_sender.py --workload daw --streams 240 --scaling 1,2,4          # rate per worker count
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'bridgehead_headtracker_sim'))
+
+from rotation_schemas import compile_schemas, load_schemas, osc_string
+from sim_clock import REAL_CLOCK, SPIN_SECONDS
+from sim_metrics import Histogram
+
+# The sketch's OSC inputs (spatial_mixer.pde): head tracker on 9000, DAW on 8000
+DEFAULT_PORTS = {'trackers': 9000, 'daw': 8000}
+FEEDER_PARAMS = ("volume", "pan", "azimuth", "zenith", "radius")
+MOTION_HZ = 0.2     # head/automation movement frequency
+START_LEAD = 0.05   # seconds between the last worker becoming ready and the shared start
+READY_TIMEOUT = 30.0
+
+# encode(t) -> datagrams to send at t seconds after the start
+Stream = Callable[[float], List[bytes]]
+
+
+def tracker_streams(indices: Sequence[int], schema: str = "ypr") -> List[Stream]:
+    """One head tracker per index, each moving with its own phase"""
+    encoder = compile_schemas({schema: load_schemas()[schema]})[schema]
+
+    def tracker(phase: float) -> Stream:
+        def encode(t: float) -> List[bytes]:
+            angle = 2 * math.pi * MOTION_HZ * t + phase
+            return encoder.encode(60.0 * math.sin(angle), 20.0 * math.sin(2 * angle), 10.0 * math.cos(angle))
+        return encode
+    return [tracker(index * 0.618) for index in indices]
+
+
+def daw_streams(indices: Sequence[int]) -> List[Stream]:
+    """One automated parameter per index: track index // 5 + 1, parameter index % 5"""
+    pack = struct.Struct('>f').pack
+
+    def automation(index: int) -> Stream:
+        track, param = divmod(index, len(FEEDER_PARAMS))
+        header = osc_string(f"/track/{track + 1}/{FEEDER_PARAMS[param]}") + osc_string(",f")
+        phase = index * 0.618
+
+        def encode(t: float) -> List[bytes]:
+            return [header + pack(0.5 + 0.5 * math.sin(2 * math.pi * MOTION_HZ * t + phase))]
+        return encode
+    return [automation(index) for index in indices]
+
+
+# Workload -> stream builder taking (indices, rotation schema); only trackers use the schema
+WORKLOADS = {'trackers': tracker_streams, 'daw': lambda indices, schema: daw_streams(indices)}
+
+
+def shard(streams: int, workers: int) -> List[List[int]]:
+    """Round-robin stream indices per worker (sizes differ by at most one)"""
+    return [list(range(worker, streams, workers)) for worker in range(workers)]
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_to_core(core: Optional[int]) -> bool:
+    """Restrict this process to one core; False where the OS offers no affinity call"""
+    if core is None or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(0, {core})
+        return True
+    except OSError:
+        return False
+
+
+def send_shard(streams: List[Stream], target, start: float, duration: float, rate: float,
+               spin: float = SPIN_SECONDS) -> Dict[str, Any]:
+    """Send every stream once per tick (rate Hz, 0 = back to back) from start for duration seconds
+
+    Waits spin on perf_counter before each tick (sim_clock.RealClock.sleep_until):
+    once the tick interval is no longer than the spin, the worker never sleeps
+    and keeps its core 100% busy.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sendto = sock.sendto
+    monotonic = REAL_CLOCK.monotonic
+    lateness = Histogram()
+    interval = 1.0 / rate if rate else 0.0
+    end = start + duration
+    grid = round(duration * rate)  # ticks on the grid start + k * interval
+    sent = sent_bytes = errors = ticks = tick = max_late = 0
+    REAL_CLOCK.sleep_until(start)
+    try:
+        while True:
+            if interval:
+                if tick >= grid:
+                    break
+                due = start + tick * interval
+                REAL_CLOCK.sleep_until(due, spin)
+                now = monotonic()
+                late = int((now - due) * 1e9)
+                lateness.record(late)
+                max_late = max(max_late, late)
+                # Fell more than a tick behind: skip to the next grid tick, don't burst
+                tick = max(tick + 1, int((now - start) / interval) + 1)
+            else:
+                now = monotonic()
+                if now >= end:
+                    break
+            t = now - start
+            for encode in streams:
+                for datagram in encode(t):
+                    try:
+                        sendto(datagram, target)
+                        sent += 1
+                        sent_bytes += len(datagram)
+                    except OSError:
+                        errors += 1
+            ticks += 1
+    finally:
+        sock.close()
+    missed = tick - ticks if interval else 0
+    return {'sent': sent, 'bytes': sent_bytes, 'errors': errors, 'ticks': ticks, 'missed': missed,
+            'seconds': monotonic() - start, 'late_counts': lateness.counts, 'late_sum': lateness.sum,
+            'max_late_ns': max_late}
+
+
+def _worker(worker: int, core: Optional[int], workload: str, indices: List[int], schema: str,
+            target, rate: float, duration: float, spin: float, ready, go, start, results):
+    """Process body: pin, build the shard's streams, wait for the shared start, send, report"""
+    try:
+        pinned = pin_to_core(core)
+        streams = WORKLOADS[workload](indices, schema)
+        ready.wait(READY_TIMEOUT)
+        go.wait(READY_TIMEOUT)
+        report = send_shard(streams, target, start.value, duration, rate, spin)
+        report.update(worker=worker, core=core if pinned else None, streams=len(indices))
+    except Exception as e:
+        report = {'worker': worker, 'error': f"{type(e).__name__}: {e}"}
+    results.put(report)
+
+
+def aggregate(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the worker reports: totals, the aggregate rate and the merged lateness histogram"""
+    lateness = Histogram()
+    for report in reports:
+        lateness.counts = [a + b for a, b in zip(lateness.counts, report['late_counts'])]
+        lateness.sum += report['late_sum']
+    total = {key: sum(report[key] for report in reports)
+             for key in ('streams', 'sent', 'bytes', 'errors', 'ticks', 'missed')}
+    seconds = max(report['seconds'] for report in reports)
+    count = sum(lateness.counts)
+    total.update(
+        workers=len(reports), seconds=seconds, rate=total['sent'] / seconds if seconds > 0 else 0.0,
+        mean_late_ms=lateness.sum / count / 1e6 if count else 0.0,
+        p99_late_ms=lateness.percentile(99) / 1e6 if count else 0.0,
+        max_late_ms=max(report['max_late_ns'] for report in reports) / 1e6,
+        per_worker=[{key: report[key] for key in ('worker', 'core', 'streams', 'sent')}
+                    | {'rate': report['sent'] / report['seconds'] if report['seconds'] > 0 else 0.0}
+                    for report in sorted(reports, key=lambda report: report['worker'])])
+    return total
+
+
+def run_sharded(workload: str, streams: int, workers: int, target=None, rate: float = 0.0,
+                duration: float = 5.0, schema: str = "ypr", pin: bool = True,
+                spin: float = SPIN_SECONDS) -> Dict[str, Any]:
+    """Send streams from a pool of worker processes with one shared start; the aggregated report"""
+    if workload not in WORKLOADS:
+        raise ValueError(f"unknown workload '{workload}' (choose from {', '.join(WORKLOADS)})")
+    if workload == 'trackers' and schema not in load_schemas():
+        raise ValueError(f"unknown rotation schema '{schema}'")
+    workers = max(1, min(workers, streams))
+    target = target or ("127.0.0.1", DEFAULT_PORTS[workload])
+    context = multiprocessing.get_context('spawn')  # same behaviour on Linux and Windows
+    ready, go = context.Barrier(workers + 1), context.Event()
+    start, results = context.Value('d', 0.0), context.Queue()
+    cores = available_cores()
+    processes = [context.Process(target=_worker, daemon=True,
+                                 args=(worker, cores[worker % len(cores)] if pin else None, workload,
+                                       indices, schema, target, rate, duration, spin, ready, go, start, results))
+                 for worker, indices in enumerate(shard(streams, workers))]
+    for process in processes:
+        process.start()
+    try:
+        try:
+            ready.wait(READY_TIMEOUT)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("a sender worker did not start") from None
+        start.value = REAL_CLOCK.monotonic() + START_LEAD
+        go.set()
+        reports = [results.get(timeout=START_LEAD + duration + READY_TIMEOUT) for _ in processes]
+    finally:
+        for process in processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+    failed = [report for report in reports if 'error' in report]
+    if failed:
+        raise RuntimeError(f"sender worker {failed[0]['worker']} failed: {failed[0]['error']}")
+    return aggregate(reports)
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"✓ {report['sent']:,} datagrams ({report['bytes'] / 1e6:.1f} MB) from {report['streams']} streams "
+          f"on {report['workers']} workers in {report['seconds']:.2f} s: {report['rate']:,.0f} /s")
+    if report['ticks'] and report['mean_late_ms']:
+        print(f"  tick lateness mean {report['mean_late_ms']:.3f} ms, p99 {report['p99_late_ms']:.3f} ms, "
+              f"max {report['max_late_ms']:.3f} ms, {report['missed']} ticks missed")
+    if report['errors']:
+        print(f"✗ {report['errors']} send errors")
+    for worker in report['per_worker']:
+        core = f"core {worker['core']}" if worker['core'] is not None else "unpinned"
+        print(f"  worker {worker['worker']:>2} ({core}): {worker['streams']} streams, {worker['rate']:,.0f} /s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send many OSC streams from a pool of pinned worker processes")
+    parser.add_argument('--workload', default='trackers', choices=list(WORKLOADS), help="Kind of streams")
+    parser.add_argument('--streams', type=int, default=100, help="Number of trackers / automated parameters")
+    parser.add_argument('--workers', type=int, default=len(available_cores()), help="Worker processes")
+    parser.add_argument('--rate', type=float, default=100.0, help="Sends per stream per second (0 = unpaced)")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds to send")
+    parser.add_argument('--spin', type=float, default=SPIN_SECONDS * 1000,
+                        help="Milliseconds each worker spins before a tick instead of sleeping; at --rate 500 "
+                             "and above (ticks 2 ms apart or less) the default keeps every worker's core 100%% "
+                             "busy, a smaller spin (e.g. 0.2) trades some lateness for idle time")
+    parser.add_argument('--schema', default='ypr', help="Rotation schema for the trackers workload")
+    parser.add_argument('--target', metavar="HOST:PORT",
+                        help="Receiver (default: the sketch's head tracker or DAW input on 127.0.0.1)")
+    parser.add_argument('--no-pin', action='store_true', help="Do not pin workers to cores")
+    parser.add_argument('--scaling', metavar="N,N,...",
+                        help="Run unpaced once per worker count and compare the aggregate rates")
+    args = parser.parse_args()
+
+    target = None
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        target = (host or "127.0.0.1", int(port))
+
+    try:
+        if not args.scaling:
+            print(f"▶️ {args.streams} streams ({args.workload}) at {args.rate:g} Hz on {args.workers} workers...")
+            print_report(run_sharded(args.workload, args.streams, args.workers, target, args.rate,
+                                     args.duration, args.schema, not args.no_pin, args.spin / 1000.0))
+            return
+        baseline = None
+        for workers in [int(count) for count in args.scaling.split(',')]:
+            report = run_sharded(args.workload, args.streams, workers, target, 0.0,
+                                 args.duration, args.schema, not args.no_pin)
+            baseline = baseline or report['rate'] / report['workers']
+            print(f"  {workers:>3} workers: {report['rate']:>12,.0f} /s  "
+                  f"({report['rate'] / baseline:.2f}x one worker)")
+    except (ValueError, RuntimeError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Simulator Clocks
+
+Injectable time source for the simulators. Code that paces itself calls
+clock.sleep(), clock.monotonic() and clock.wait(event, timeout) instead of the
+time/threading functions directly:
+- RealClock:    wall-clock time (the default everywhere)
+- VirtualClock: sleeping advances virtual time instantly, and callbacks can be
+                scheduled at virtual times (move a slider at t=2 s, stop at t=5 s)
+
+Under a VirtualClock, multi-second demo and stress sequences run in
+milliseconds while producing exactly the same message timeline, which a
+RecordingMidiOut captures as (virtual time, message) pairs.
+
+SendScheduler runs timed sends from several sources (e.g. cascaded consoles)
+on one thread in due-time order, on either clock, and reports how late they ran.
+It waits with clock.sleep_until(deadline): the real clock sleeps coarsely until
+SPIN_SECONDS before the deadline and spins on perf_counter for the rest, so a
+send goes out within microseconds of its timestamp instead of whenever the OS
+scheduler wakes the thread up (a millisecond or more after a plain sleep).
+
+Usage (run the CLI simulator's demo sequence in virtual time):
+    python sim_clock.py
+    python sim_clock.py --jitter        # lateness of 1 kHz real-time sends: sleep vs sleep_until
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sim_metrics import Histogram
+
+SPIN_SECONDS = 0.002  # sleep_until spins through the last 2 ms (OS sleep overshoot is about 0.1-2 ms)
+
+
+class RealClock:
+    """Wall-clock time source"""
+
+    def monotonic(self) -> float:
+        # perf_counter: the finest monotonic clock everywhere (time.monotonic ticks
+        # every 15.6 ms on Windows before Python 3.13)
+        return time.perf_counter()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def sleep_until(self, deadline: float, spin: float = SPIN_SECONDS):
+        """Return as soon as monotonic() reaches deadline: coarse sleep, then spin"""
+        remaining = deadline - time.perf_counter()
+        if remaining > spin:
+            time.sleep(remaining - spin)
+        while time.perf_counter() < deadline:
+            pass
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        """Block until the event is set or the timeout elapses"""
+        return event.wait(timeout)
+
+
+REAL_CLOCK = RealClock()
+
+
+class VirtualTimeDeadlock(RuntimeError):
+    """Raised when virtual code waits forever with nothing scheduled to wake it"""
+
+
+class VirtualClock:
+    """Virtual time: sleep() returns immediately after advancing the clock
+
+    Meant to drive a simulator from a single thread. Callbacks scheduled with
+    call_at/call_later run (on the calling thread) as virtual time passes them.
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        self.now = start
+        self.epoch = epoch  # wall-clock time() at virtual time 0
+        self.timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self.counter = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        """Run callback once virtual time reaches `when`"""
+        heapq.heappush(self.timers, (when, next(self.counter), callback))
+
+    def call_later(self, delay: float, callback: Callable[[], None]):
+        self.call_at(self.now + delay, callback)
+
+    def advance(self, seconds: float):
+        """Move virtual time forward, running due callbacks in time order"""
+        target = self.now + max(0.0, seconds)
+        while self.timers and self.timers[0][0] <= target:
+            when, _, callback = heapq.heappop(self.timers)
+            self.now = max(self.now, when)
+            callback()
+        self.now = target
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def sleep_until(self, deadline: float, spin: float = SPIN_SECONDS):
+        self.advance(deadline - self.now)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        """Advance through scheduled callbacks until the event is set or the timeout elapses"""
+        deadline = None if timeout is None else self.now + timeout
+        while not event.is_set():
+            if self.timers and (deadline is None or self.timers[0][0] <= deadline):
+                self.advance(self.timers[0][0] - self.now)
+            elif deadline is None:
+                raise VirtualTimeDeadlock("wait() without timeout and no scheduled callbacks")
+            else:
+                self.advance(deadline - self.now)
+                break
+        return event.is_set()
+
+
+class SendScheduler:
+    """Runs callbacks in due-time order from a single thread, on any clock
+
+    Senders that share one scheduler interleave by due time instead of racing
+    on separate threads; callbacks due at the same time run in the order they
+    were scheduled. Lateness is how long after its due time a callback started;
+    every callback's lateness goes into a histogram (late_percentile), and it
+    grows once the callbacks cost more than the time between them.
+    """
+
+    def __init__(self, clock=REAL_CLOCK, spin: float = SPIN_SECONDS):
+        self.clock = clock
+        self.spin = spin
+        self.queue: List[Tuple[float, int, Callable, tuple]] = []
+        self.counter = itertools.count()
+        self.ran = 0
+        self.total_late = 0.0
+        self.max_late = 0.0
+        self.late = Histogram()  # nanoseconds
+
+    def call_at(self, when: float, callback: Callable, *args):
+        """Run callback(*args) once clock.monotonic() reaches `when`"""
+        heapq.heappush(self.queue, (when, next(self.counter), callback, args))
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        self.call_at(self.clock.monotonic() + delay, callback, *args)
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Run until nothing is scheduled (or stop is set)"""
+        queue = self.queue
+        while queue and not (stop and stop.is_set()):
+            when = queue[0][0]
+            late = self.clock.monotonic() - when
+            if late < 0:
+                self.clock.sleep_until(when, self.spin)
+                continue  # something earlier may have been scheduled meanwhile
+            _, _, callback, args = heapq.heappop(queue)
+            self.ran += 1
+            self.total_late += late
+            if late > self.max_late:
+                self.max_late = late
+            self.late.record(int(late * 1e9))
+            callback(*args)
+
+    @property
+    def mean_late(self) -> float:
+        return self.total_late / self.ran if self.ran else 0.0
+
+    def late_percentile(self, q: float) -> float:
+        """Lateness in seconds that q percent of the callbacks stayed within (12.5% resolution)"""
+        return self.late.percentile(q) / 1e9
+
+    def report(self) -> Dict[str, float]:
+        return {
+            'ran': self.ran,
+            'mean_late_ms': self.mean_late * 1000,
+            'p99_late_ms': self.late_percentile(99) * 1000,
+            'max_late_ms': self.max_late * 1000,
+        }
+
+
+class RecordingMidiOut:
+    """Stand-in for rtmidi.MidiOut that records (clock time, message) pairs"""
+
+    def __init__(self, clock=REAL_CLOCK):
+        self.clock = clock
+        self.messages: List[Tuple[float, List[int]]] = []
+
+    def send_message(self, message):
+        self.messages.append((self.clock.monotonic(), list(message)))
+
+    def get_ports(self) -> List[str]:
+        return []
+
+    def close_port(self):
+        pass
+
+
+def jitter_report(count: int = 1000, interval: float = 0.001):
+    """Lateness of `count` real-time callbacks `interval` apart: plain sleep vs sleep_until"""
+    class SleepingClock(RealClock):
+        def sleep_until(self, deadline: float, spin: float = SPIN_SECONDS):
+            self.sleep(max(0.0, deadline - time.perf_counter()))
+
+    for name, clock in (("time.sleep", SleepingClock()), ("sleep_until (spin)", REAL_CLOCK)):
+        scheduler = SendScheduler(clock)
+        start = clock.monotonic() + 0.05
+        for n in range(count):
+            scheduler.call_at(start + n * interval, lambda: None)
+        scheduler.run()
+        report = scheduler.report()
+        print(f"  {name:<20} mean {report['mean_late_ms'] * 1000:7.1f} us  "
+              f"p99 {report['p99_late_ms'] * 1000:7.1f} us  max {report['max_late_ms'] * 1000:7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the demo sequence in virtual time, or measure send jitter")
+    parser.add_argument("--jitter", action="store_true",
+                        help="Measure how late 1 kHz real-time sends run with a plain sleep and with sleep_until")
+    args = parser.parse_args()
+    if args.jitter:
+        print("Lateness of 1000 callbacks scheduled 1 ms apart:")
+        jitter_report()
+        return
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yamaha_02r96_sim'))
+    from yamaha_02r96_simulator import YamahaSimulator
+
+    clock = VirtualClock()
+    midiout = RecordingMidiOut(clock)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+
+    started = time.perf_counter()
+    simulator.demo_sequence()
+    elapsed = time.perf_counter() - started
+
+    for t, message in midiout.messages:
+        print(f"{t:8.3f}s  {' '.join(f'{b:02X}' for b in message)}")
+    print(f"\n✓ {len(midiout.messages)} messages over {clock.monotonic():.1f} s of virtual time "
+          f"in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
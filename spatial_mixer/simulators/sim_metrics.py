@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Simulator Metrics
+
+Live counters and latency histograms for the simulators, served over HTTP in
+the Prometheus text exposition format so long soak runs can be scraped or
+watched with curl:
+- simulator_messages_total:          messages sent, per simulator and message type
+- simulator_send_errors_total:       sends that failed or had no connected port
+- simulator_send_duration_seconds:   time spent inside the output's send call
+- simulator_send_interval_seconds:   time between consecutive sends of one type
+
+Histograms are log-linear (HDR-style): 8 sub-buckets per power of two of the
+value in nanoseconds, so any value is kept within 12.5% without a fixed range.
+Recording is a few integer operations and list increments, without locks:
+each series is meant to have one writer thread, and a racing writer can at
+worst lose an increment. Exposition collapses the fine buckets onto a 1-2-5
+scale of `le` boundaries.
+
+Usage (serve an empty registry, e.g. to check the endpoint):
+    python sim_metrics.py --port 9464
+    curl http://127.0.0.1:9464/metrics
+
+The simulators start the endpoint with --metrics-port.
+"""
+
+import argparse
+import threading
+import time
+from typing import Dict, List, Tuple
+
+SUB_BITS = 3                 # 2^3 = 8 sub-buckets per power of two
+MAX_BITS = 40                # values up to 2^40 ns (~18 minutes); larger ones land in the last bucket
+BUCKET_COUNT = ((MAX_BITS - SUB_BITS - 1) << SUB_BITS) + (1 << (SUB_BITS + 1))
+
+# Exported `le` boundaries in seconds: 1 us .. 10 s on a 1-2-5 scale
+EXPORT_BOUNDS = [m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)] + [10.0]
+
+
+def bucket_index(value: int) -> int:
+    """Fine bucket for a non-negative integer value"""
+    shift = value.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return value
+    return min((shift << SUB_BITS) + (value >> shift), BUCKET_COUNT - 1)
+
+
+def bucket_upper(index: int) -> int:
+    """Largest value that falls into a fine bucket"""
+    shift = max(0, (index >> SUB_BITS) - 1)
+    top = index - (shift << SUB_BITS)
+    return ((top + 1) << shift) - 1
+
+
+def _export_slots() -> List[int]:
+    """Map every fine bucket to the first exported boundary that contains it"""
+    bounds_ns = [bound * 1e9 for bound in EXPORT_BOUNDS]
+    slots = []
+    for index in range(BUCKET_COUNT):
+        upper = bucket_upper(index)
+        slot = next((i for i, bound in enumerate(bounds_ns) if upper <= bound), len(bounds_ns))
+        slots.append(slot)
+    return slots
+
+
+EXPORT_SLOTS = _export_slots()
+
+
+class Histogram:
+    """Log-linear histogram of nanosecond values"""
+
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.sum = 0
+
+    def record(self, value: int):
+        shift = value.bit_length() - SUB_BITS - 1
+        index = value if shift <= 0 else (shift << SUB_BITS) + (value >> shift)
+        if index >= BUCKET_COUNT:
+            index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.sum += value
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th percentile (0-100)"""
+        counts = self.counts.copy()
+        target = sum(counts) * q / 100.0
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= target:
+                return bucket_upper(index)
+        return 0
+
+    def export(self) -> Tuple[List[int], int, int]:
+        """Cumulative counts per exported boundary (+Inf last), total count and sum (ns)"""
+        counts = self.counts.copy()
+        total = self.sum
+        exported = [0] * (len(EXPORT_BOUNDS) + 1)
+        for index, count in enumerate(counts):
+            if count:
+                exported[EXPORT_SLOTS[index]] += count
+        cumulative = 0
+        for i, count in enumerate(exported):
+            cumulative += count
+            exported[i] = cumulative
+        return exported, cumulative, total
+
+
+class MessageMetrics:
+    """Counters and histograms for one (simulator, message type) series"""
+
+    __slots__ = ('errors', 'last_ns', 'duration', 'interval')
+
+    def __init__(self):
+        self.errors = 0
+        self.last_ns = 0
+        self.duration = Histogram()
+        self.interval = Histogram()
+
+    def record(self, started_ns: int, finished_ns: int):
+        """Record one send that ran from started_ns to finished_ns (time.perf_counter_ns)"""
+        # Histogram.record, inlined: this runs once per message
+        value = finished_ns - started_ns
+        shift = value.bit_length() - SUB_BITS - 1
+        index = value if shift <= 0 else (shift << SUB_BITS) + (value >> shift)
+        histogram = self.duration
+        histogram.counts[index if index < BUCKET_COUNT else BUCKET_COUNT - 1] += 1
+        histogram.sum += value
+
+        last = self.last_ns
+        self.last_ns = started_ns
+        if last:
+            value = started_ns - last
+            shift = value.bit_length() - SUB_BITS - 1
+            index = value if shift <= 0 else (shift << SUB_BITS) + (value >> shift)
+            histogram = self.interval
+            histogram.counts[index if index < BUCKET_COUNT else BUCKET_COUNT - 1] += 1
+            histogram.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.duration.counts)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """All metric series of a process, rendered together for scraping"""
+
+    def __init__(self):
+        self.series: Dict[Tuple[str, str], MessageMetrics] = {}
+        self.lock = threading.Lock()  # only taken when a series is created
+        self.started = time.time()
+
+    def message(self, simulator: str, kind: str) -> MessageMetrics:
+        """Get or create the series for a simulator's message type"""
+        key = (simulator, kind)
+        series = self.series.get(key)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(key, MessageMetrics())
+        return series
+
+    def render(self) -> str:
+        """Prometheus text exposition (version 0.0.4)"""
+        with self.lock:
+            items = sorted(self.series.items())
+        lines = [
+            '# HELP simulator_start_time_seconds Unix time the simulator process started',
+            '# TYPE simulator_start_time_seconds gauge',
+            f'simulator_start_time_seconds {self.started:.3f}',
+            '# HELP simulator_messages_total Messages sent',
+            '# TYPE simulator_messages_total counter',
+        ]
+        exports = {key: (series.duration.export(), series.interval.export()) for key, series in items}
+        for (simulator, kind), ((_, count, _), _) in exports.items():
+            lines.append(f'simulator_messages_total{{simulator="{simulator}",type="{kind}"}} {count}')
+        lines += ['# HELP simulator_send_errors_total Sends that failed or had no connected output',
+                  '# TYPE simulator_send_errors_total counter']
+        for (simulator, kind), series in items:
+            lines.append(f'simulator_send_errors_total{{simulator="{simulator}",type="{kind}"}} {series.errors}')
+
+        for name, position, help_text in (
+                ('simulator_send_duration_seconds', 0, 'Time spent inside the output send call'),
+                ('simulator_send_interval_seconds', 1, 'Time between consecutive sends of one message type')):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (simulator, kind), histograms in exports.items():
+                cumulative, count, total = histograms[position]
+                labels = {'simulator': simulator, 'type': kind}
+                for bound, value in zip(EXPORT_BOUNDS, cumulative):
+                    lines.append(f'{name}_bucket{{{_format_labels(labels)},le="{bound:g}"}} {value}')
+                lines.append(f'{name}_bucket{{{_format_labels(labels)},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{_format_labels(labels)}}} {total / 1e9:.9f}')
+                lines.append(f'{name}_count{{{_format_labels(labels)}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Serves a registry at http://host:port/metrics from a daemon thread"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        # http.server costs more to import than the rest of the simulator core: only load it to serve
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the simulator console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def start(self) -> 'MetricsServer':
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> MetricsRegistry:
+    """Create a registry and serve it on the given port (used by the simulators' --metrics-port)"""
+    registry = MetricsRegistry()
+    server = MetricsServer(registry, host, port).start()
+    print(f"Metrics at http://{server.address[0]}:{server.address[1]}/metrics")
+    return registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an empty simulator metrics registry")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=9464)
+    args = parser.parse_args()
+
+    start_metrics_server(args.port, args.host)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
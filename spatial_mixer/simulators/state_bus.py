@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory State Bus
+
+Live simulator state in one named shared memory block
+(multiprocessing.shared_memory), so monitors, recorders and renderers in
+other local processes can read the current head pose and mixer state
+directly, without a socket hop or a serialization step, at kHz update rates.
+
+Fixed layout (little-endian, every field naturally aligned):
+
+    offset  size         section
+    0       16           header: magic 'SMSB', version, track count
+    16      48           pose:   seq, time ns, yaw, pitch, roll (degrees), poses published
+    64      48           mixer:  seq, time ns, changes, held, outages, master volume
+    112     8 x tracks   tracks: volume, pan, mute, solo, x, y (one 8-byte slot per track)
+
+Each section has one writer (the head tracker for the pose, the mixer
+simulator for the mixer) and is guarded by a seqlock: the writer makes seq
+odd, updates the section and makes seq even again; a reader copies the
+section and retries if seq was odd or changed meanwhile. Readers never block
+the writer, and never see half an update. The "time ns" fields are
+time.time_ns() of the last update, comparable across local processes.
+
+Publishers (the simulators' --state-bus) attach to the bus, or create it if
+it does not exist yet (two started at once end up on the same bus); readers
+(--watch, attach()) only ever attach, and wait for a publisher if they start first. The publisher that created the block
+owns it and removes it when it closes, so the owner must outlive the other
+processes: start the publisher that runs longest first and stop it last.
+Processes still attached keep working on a removed block, but nothing started
+afterwards can find it (a publisher started then creates a new, separate bus).
+
+Usage:
+    python state_bus.py --watch              # print the live pose and the first tracks
+    python state_bus.py --bench              # publish/read rates, and a torn-read check across processes
+    python ../bridgehead_headtracker_sim/head_tracker_simulator.py --state-bus
+"""
+
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+DEFAULT_NAME = "spatial_mixer_state"
+MAGIC = b'SMSB'
+VERSION = 1
+DEFAULT_TRACKS = 48
+
+HEADER = struct.Struct('<4sHH8x')
+POSE = struct.Struct('<qdddQ')         # after seq: time ns, yaw, pitch, roll, published
+MIXER = struct.Struct('<qQQQB7x')      # after seq: time ns, changes, held, outages, master
+TRACK = struct.Struct('<BBBBbb2x')     # volume, pan, mute, solo, x, y
+SEQ = struct.Struct('<Q')
+
+POSE_OFFSET = HEADER.size
+MIXER_OFFSET = POSE_OFFSET + SEQ.size + POSE.size
+TRACKS_OFFSET = MIXER_OFFSET + SEQ.size + MIXER.size
+
+# Simulator action (console_core control keys) -> (field of the track slot, lowest, highest value)
+# The limits are the encoders': what the console receives for an out-of-range value
+TRACK_FIELDS = {'setTrackVolume': (0, 0, 127), 'setPan': (1, 0, 127), 'toggleMute': (2, 0, 1),
+                'toggleSolo': (3, 0, 1), 'setPositionX': (4, -63, 63), 'setPositionY': (5, -63, 63)}
+READ_TIMEOUT = 0.1  # seconds a reader retries before giving up on a stalled writer
+ATTACH_INTERVAL = 0.2  # seconds between attempts while a reader waits for the bus to be created
+CREATE_INTERVAL = 0.01  # seconds between attempts when two publishers start at once
+CREATE_TIMEOUT = 1.0    # how long a publisher waits for another one to finish creating the bus
+
+Pose = namedtuple('Pose', 'time_ns yaw pitch roll published')
+TrackState = namedtuple('TrackState', 'volume pan mute solo x y')
+Mixer = namedtuple('Mixer', 'time_ns changes held outages master tracks')
+
+
+def _clamp(value, low: int, high: int) -> int:
+    return max(low, min(high, int(value)))
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without letting this process's resource tracker remove it at exit"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    # Before 3.13 every attaching process registers the block for removal. Unregistering
+    # afterwards is no fix: a spawned child shares its parent's tracker, and would drop
+    # the creator's registration too, so skip the registration instead.
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class StateBus:
+    """Named shared memory block with seqlock-guarded pose and mixer sections"""
+
+    def __init__(self, name: str = DEFAULT_NAME, create: Optional[bool] = None, tracks: int = DEFAULT_TRACKS):
+        """create: True to create, False to attach, None to attach or else create"""
+        deadline = time.monotonic() + CREATE_TIMEOUT
+        while True:
+            try:
+                self._open(name, create, tracks)
+                break
+            except (FileExistsError, FileNotFoundError):
+                # With create=None either error means another publisher is creating the
+                # bus right now (it created first, or has not written the header yet)
+                if create is not None or time.monotonic() >= deadline:
+                    raise
+                time.sleep(CREATE_INTERVAL)
+        self.name = name
+        # Writer-side copies of the seq counters (each section has one writer)
+        self.pose_seq = SEQ.unpack_from(self.buf, POSE_OFFSET)[0]
+        self.mixer_seq = SEQ.unpack_from(self.buf, MIXER_OFFSET)[0]
+
+    def _open(self, name: str, create: Optional[bool], tracks: int):
+        self.block = None
+        if create is not True:
+            try:
+                self.block = _attach(name)
+            except FileNotFoundError:
+                if create is False:
+                    raise
+        self.owner = self.block is None
+        if self.owner:
+            self.block = shared_memory.SharedMemory(name, create=True, size=TRACKS_OFFSET + TRACK.size * tracks)
+            HEADER.pack_into(self.block.buf, 0, MAGIC, VERSION, tracks)
+        self.buf = self.block.buf
+        magic, version, self.tracks = HEADER.unpack_from(self.buf, 0)
+        if magic == bytes(len(MAGIC)):
+            self.close()  # attached between the creator's create and its header write
+            raise FileNotFoundError(f"state bus '{name}' is still being created")
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"shared memory '{name}' is not a version {VERSION} state bus")
+
+    # Pose section (written by the head tracker)
+
+    def publish_pose(self, yaw: float, pitch: float, roll: float):
+        buf = self.buf
+        seq = self.pose_seq
+        published = POSE.unpack_from(buf, POSE_OFFSET + 8)[4]
+        SEQ.pack_into(buf, POSE_OFFSET, seq + 1)
+        POSE.pack_into(buf, POSE_OFFSET + 8, time.time_ns(), yaw, pitch, roll, published + 1)
+        SEQ.pack_into(buf, POSE_OFFSET, seq + 2)
+        self.pose_seq = seq + 2
+
+    def read_pose(self) -> Pose:
+        return Pose(*self._read(POSE_OFFSET, lambda buf: POSE.unpack_from(buf, POSE_OFFSET + 8)))
+
+    # Mixer section (written by the mixer simulator)
+
+    def _begin_mixer(self) -> int:
+        seq = self.mixer_seq
+        SEQ.pack_into(self.buf, MIXER_OFFSET, seq + 1)
+        return seq
+
+    def _end_mixer(self, seq: int, held: bool, outages: Optional[int], master: Optional[int] = None):
+        buf = self.buf
+        _, changes, held_count, last_outages, last_master = MIXER.unpack_from(buf, MIXER_OFFSET + 8)
+        MIXER.pack_into(buf, MIXER_OFFSET + 8, time.time_ns(), changes + 1, held_count + held,
+                        last_outages if outages is None else outages,
+                        last_master if master is None else master)
+        SEQ.pack_into(buf, MIXER_OFFSET, seq + 2)
+        self.mixer_seq = seq + 2
+
+    def apply(self, control: Hashable, args: Sequence[Any], held: bool = False, outages: Optional[int] = None):
+        """Record a sent (or held) control change: control is the console_core control key
+        (("setPan", 5), ("setMasterVolume",), ("recallScene", first track)) and args the
+        encoder's arguments, the value last; raw SysEx data is not state and is skipped"""
+        action, value = control[0], args[-1]
+        # Values are clamped as the encoders clamp them, and the seq is always made even
+        # again: a write that fails halfway must not leave every reader timing out
+        if action == 'recallScene':
+            seq = self._begin_mixer()
+            try:
+                for track, state in enumerate(args[0], control[1]):
+                    if 1 <= track <= self.tracks:
+                        TRACK.pack_into(self.buf, TRACKS_OFFSET + (track - 1) * TRACK.size,
+                                        _clamp(state['volume'], 0, 127), _clamp(state['pan'], 0, 127),
+                                        bool(state['mute']), bool(state['solo']),
+                                        _clamp(state['x'], -63, 63), _clamp(state['y'], -63, 63))
+            finally:
+                self._end_mixer(seq, held, outages, _clamp(value, 0, 127))
+        elif not isinstance(value, int):
+            return
+        elif action == 'setMasterVolume':
+            self._end_mixer(self._begin_mixer(), held, outages, _clamp(value, 0, 127))
+        elif action in TRACK_FIELDS and 1 <= control[1] <= self.tracks:
+            field, low, high = TRACK_FIELDS[action]
+            seq = self._begin_mixer()
+            try:
+                # One byte; positions are stored two's complement, so masking keeps their sign
+                self.buf[TRACKS_OFFSET + (control[1] - 1) * TRACK.size + field] = _clamp(value, low, high) & 0xFF
+            finally:
+                self._end_mixer(seq, held, outages)
+
+    def read_mixer(self) -> Mixer:
+        def copy(buf):
+            head = MIXER.unpack_from(buf, MIXER_OFFSET + 8)
+            tracks = [TrackState(v, p, bool(m), bool(s), x, y) for v, p, m, s, x, y in
+                      TRACK.iter_unpack(buf[TRACKS_OFFSET:TRACKS_OFFSET + TRACK.size * self.tracks])]
+            return head + (tracks,)
+        return Mixer(*self._read(MIXER_OFFSET, copy))
+
+    def _read(self, offset: int, copy) -> tuple:
+        """Seqlock read: copy the section until no write overlapped the copy"""
+        buf = self.buf
+        deadline = None
+        while True:
+            before = SEQ.unpack_from(buf, offset)[0]
+            if not before & 1:
+                values = copy(buf)
+                if SEQ.unpack_from(buf, offset)[0] == before:
+                    return values
+            if deadline is None:
+                deadline = time.perf_counter() + READ_TIMEOUT
+            elif time.perf_counter() > deadline:
+                raise TimeoutError(f"state bus '{self.name}': writer stalled in the middle of an update")
+            time.sleep(0)  # let the writer finish
+
+    def close(self):
+        self.buf = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+def attach(name: str = DEFAULT_NAME, timeout: Optional[float] = None,
+           interval: float = ATTACH_INTERVAL) -> StateBus:
+    """Attach a reader, waiting until a publisher has created the bus (FileNotFoundError after timeout)"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            return StateBus(name, create=False)
+        except FileNotFoundError:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
+            time.sleep(interval)
+
+
+# Demos
+
+def _pose_writer(name: str, count: int):
+    """Publish count poses with yaw == pitch == roll, as fast as possible (benchmark/test writer)"""
+    bus = StateBus(name, create=False)
+    try:
+        for i in range(1, count + 1):
+            bus.publish_pose(float(i), float(i), float(i))
+    finally:
+        bus.close()
+
+
+def torn_read_check(name: str, count: int = 200000) -> Dict[str, Any]:
+    """Read the pose while another process publishes it: every read must be one whole update"""
+    bus = StateBus(name, create=True)
+    writer = multiprocessing.get_context('spawn').Process(target=_pose_writer, args=(name, count))
+    try:
+        writer.start()
+        reads = torn = 0
+        while writer.is_alive() or reads == 0:
+            pose = bus.read_pose()
+            reads += 1
+            if not pose.yaw == pose.pitch == pose.roll:
+                torn += 1
+        writer.join()
+        return {'reads': reads, 'torn': torn, 'published': bus.read_pose().published}
+    finally:
+        bus.close()
+
+
+def bench(name: str, number: int = 100000) -> Dict[str, float]:
+    bus = StateBus(name, create=True)
+    try:
+        started = time.perf_counter()
+        for i in range(number):
+            bus.publish_pose(i * 0.001, 0.0, 0.0)
+        pose_write = number / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(number):
+            bus.read_pose()
+        pose_read = number / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for i in range(number):
+            bus.apply(('setTrackVolume', i % 48 + 1), (i % 48 + 1, i & 0x7F))
+        control_write = number / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(number // 10):
+            bus.read_mixer()
+        mixer_read = number // 10 / (time.perf_counter() - started)
+    finally:
+        bus.close()
+    return {'pose_write': pose_write, 'pose_read': pose_read,
+            'control_write': control_write, 'mixer_read': mixer_read}
+
+
+def watch(name: str, interval: float = 0.1, tracks: int = 8):
+    try:
+        bus = StateBus(name, create=False)
+    except FileNotFoundError:
+        print(f"Waiting for a simulator to create state bus '{name}' (--state-bus)...")
+        try:
+            bus = attach(name)
+        except KeyboardInterrupt:
+            return
+    try:
+        while True:
+            pose, mixer = bus.read_pose(), bus.read_mixer()
+            age = (time.time_ns() - max(pose.time_ns, mixer.time_ns)) / 1e6 if pose.time_ns or mixer.time_ns else 0
+            line = (f"ypr {pose.yaw:7.2f} {pose.pitch:7.2f} {pose.roll:7.2f} ({pose.published} poses)  "
+                    f"master {mixer.master:3d}  "
+                    + " ".join(f"{t.volume:3d}{'M' if t.mute else ' '}{'S' if t.solo else ' '}"
+                               for t in mixer.tracks[:tracks])
+                    + f"  changes {mixer.changes} held {mixer.held}  {age:6.0f} ms ago")
+            print(f"\r{line}", end="", flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        bus.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or benchmark the shared-memory simulator state bus")
+    parser.add_argument('--name', default=DEFAULT_NAME, help="Shared memory block name")
+    parser.add_argument('--watch', action='store_true', help="Print the live state")
+    parser.add_argument('--bench', action='store_true', help="Measure publish/read rates")
+    args = parser.parse_args()
+    if not args.watch and not args.bench:
+        parser.error("give --watch or --bench")
+
+    if args.watch:
+        watch(args.name)
+        return
+    name = f"{args.name}_bench_{os.getpid()}"
+    for key, rate in bench(name).items():
+        print(f"  {key:<14} {rate:12,.0f} /s")
+    check = torn_read_check(name)
+    print(f"{'✓' if not check['torn'] else '✗'} {check['reads']} reads during {check['published']} "
+          f"publishes from another process, {check['torn']} torn")
+
+
+if __name__ == "__main__":
+    main()
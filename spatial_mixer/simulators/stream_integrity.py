@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Stream Integrity Statistics
+
+Sequence stamping for simulator output, and a receiver-side checker that
+measures loss, reordering, duplication and one-way delay with constant memory.
+
+Stamps:
+- OSC:  two extra int32 arguments appended to each message: sequence number
+        and send time (microseconds, modulo 2^32)
+- MIDI: a non-commercial SysEx sent right after each message:
+        F0 7D 01 [seq: 4 x 7 bits] [send time µs: 5 x 7 bits] F7
+
+Send and receive times come from time.time_ns(), so one-way delay is exact
+on one host and includes the clock offset between hosts otherwise.
+
+Usage (receiver side, prints one line per window):
+    python stream_integrity.py osc --port 9000
+    python stream_integrity.py midi --port "Yamaha 02R96-1"
+"""
+
+import argparse
+import itertools
+import socket
+import struct
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+OSC_SEQ_BITS = 32
+OSC_TIME_BITS = 32
+
+MIDI_STAMP_PREFIX = (0xF0, 0x7D, 0x01)  # 0x7D = non-commercial manufacturer ID
+MIDI_STAMP_LENGTH = 13
+MIDI_SEQ_BITS = 28
+MIDI_TIME_BITS = 35
+
+
+def now_us() -> int:
+    """Wall-clock time in microseconds (comparable across local processes)"""
+    return time.time_ns() // 1000
+
+
+class SequenceStamper:
+    """Hands out (sequence, send time) stamps for one outgoing stream"""
+
+    def __init__(self, seq_bits: int = OSC_SEQ_BITS, time_bits: int = OSC_TIME_BITS, clock=None):
+        self.seq_mask = (1 << seq_bits) - 1
+        self.time_mask = (1 << time_bits) - 1
+        self.counter = itertools.count()  # next() is atomic under the GIL
+        self.clock = clock  # sim_clock clock; None = wall clock
+
+    def next(self) -> Tuple[int, int]:
+        send_us = int(self.clock.time() * 1_000_000) if self.clock else now_us()
+        return next(self.counter) & self.seq_mask, send_us & self.time_mask
+
+
+# MIDI stamp SysEx
+
+def encode_midi_stamp(seq: int, send_us: int) -> List[int]:
+    """Build the stamp SysEx for a (sequence, send time) pair"""
+    return [*MIDI_STAMP_PREFIX,
+            (seq >> 21) & 0x7F, (seq >> 14) & 0x7F, (seq >> 7) & 0x7F, seq & 0x7F,
+            (send_us >> 28) & 0x7F, (send_us >> 21) & 0x7F, (send_us >> 14) & 0x7F,
+            (send_us >> 7) & 0x7F, send_us & 0x7F,
+            0xF7]
+
+
+def decode_midi_stamp(message) -> Optional[Tuple[int, int]]:
+    """Return (sequence, send time) if message is a stamp SysEx, else None"""
+    if len(message) != MIDI_STAMP_LENGTH or tuple(message[:3]) != MIDI_STAMP_PREFIX:
+        return None
+    seq = 0
+    for b in message[3:7]:
+        seq = (seq << 7) | b
+    send_us = 0
+    for b in message[7:12]:
+        send_us = (send_us << 7) | b
+    return seq, send_us
+
+
+# OSC stamps
+
+def _osc_stamp(message: bytes) -> Optional[Tuple[str, int, int]]:
+    """(address, seq, send time) of one OSC message whose last two args are int32"""
+    end = message.find(b'\x00')
+    if end <= 0:
+        return None
+    address = message[:end].decode('ascii', 'replace')
+    tags_start = (end + 4) & ~3
+    tags_end = message.find(b'\x00', tags_start)
+    if tags_end < 0 or not message[tags_end - 2:tags_end] == b'ii':
+        return None
+    seq, send_us = struct.unpack_from('>II', message, len(message) - 8)
+    return address, seq, send_us
+
+
+def parse_osc_stamps(datagram: bytes) -> List[Tuple[str, int, int]]:
+    """Extract (address, seq, send time) from a stamped OSC message or bundle"""
+    if not datagram.startswith(b'#bundle\x00'):
+        stamp = _osc_stamp(datagram)
+        return [stamp] if stamp else []
+    stamps = []
+    offset = 16
+    while offset + 4 <= len(datagram):
+        (size,) = struct.unpack_from('>i', datagram, offset)
+        if not 0 <= size <= len(datagram) - offset - 4:
+            break  # malformed bundle: keep the stamps read so far
+        stamps.extend(parse_osc_stamps(datagram[offset + 4:offset + 4 + size]))
+        offset += 4 + size
+    return stamps
+
+
+# Receiver-side checker
+
+# Delay histogram bucket upper bounds in µs (1-2-5 steps from 10 µs to 10 s)
+DELAY_BUCKETS = [m * 10 ** e for e in range(1, 7) for m in (1, 2, 5)] + [10_000_000]
+
+
+class WindowStats:
+    """Counters for one time window (fixed size, no per-packet storage)"""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.received = 0
+        self.unique = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.too_old = 0
+        self.restarts = 0
+        self.expected = 0
+        self.delay_count = 0
+        self.delay_sum = 0
+        self.delay_min: Optional[int] = None
+        self.delay_max: Optional[int] = None
+        self.histogram = [0] * (len(DELAY_BUCKETS) + 1)
+
+    def add_delay(self, delay: int):
+        self.delay_count += 1
+        self.delay_sum += delay
+        if self.delay_min is None or delay < self.delay_min:
+            self.delay_min = delay
+        if self.delay_max is None or delay > self.delay_max:
+            self.delay_max = delay
+        for i, bound in enumerate(DELAY_BUCKETS):
+            if delay <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def delay_percentile(self, fraction: float) -> Optional[int]:
+        """Upper bucket bound containing the given fraction of delays (clamped to min/max)"""
+        if not self.delay_count:
+            return None
+        target = fraction * self.delay_count
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target and i < len(DELAY_BUCKETS):
+                return max(self.delay_min, min(DELAY_BUCKETS[i], self.delay_max))
+        return self.delay_max
+
+    def summary(self) -> Dict[str, float]:
+        lost = max(0, self.expected - self.unique)
+        return {
+            'start': self.start,
+            'received': self.received,
+            'expected': self.expected,
+            'lost': lost,
+            'loss_rate': lost / self.expected if self.expected else 0.0,
+            'duplicates': self.duplicates,
+            'reordered': self.reordered,
+            'too_old': self.too_old,
+            'restarts': self.restarts,
+            'delay_min_us': self.delay_min,
+            'delay_mean_us': self.delay_sum / self.delay_count if self.delay_count else None,
+            'delay_p50_us': self.delay_percentile(0.5),
+            'delay_p99_us': self.delay_percentile(0.99),
+            'delay_max_us': self.delay_max,
+        }
+
+
+class StreamChecker:
+    """Loss, reordering, duplication and one-way delay for one sequenced stream
+
+    Memory is constant: duplicates are detected with a bitmap covering the
+    last reorder_window sequence numbers, and only the most recent `history`
+    closed windows are kept.
+
+    Windows are tumbling (roll() closes one and opens the next) rather than
+    sliding: each report line counts every packet exactly once, so the lines
+    add up to the totals, and a window is a handful of counters. A sliding
+    window would have to keep every packet of the last `window` seconds to
+    expire it again; the closed windows in history give the longer view.
+
+    With restart_gap set, a sequence number that jumps back by at least that
+    much is taken as a new session of the sender (restarted, counting from
+    0 again) instead of a very late packet: tracking starts over from it.
+    """
+
+    def __init__(self, seq_bits: int = OSC_SEQ_BITS, time_bits: int = OSC_TIME_BITS,
+                 window: float = 1.0, history: int = 60, reorder_window: int = 1024,
+                 restart_gap: Optional[int] = None):
+        self.seq_modulus = 1 << seq_bits
+        self.time_modulus = 1 << time_bits
+        self.window = window
+        self.reorder_window = reorder_window
+        self.restart_gap = restart_gap
+        self.bitmap_mask = (1 << reorder_window) - 1
+        self.history: Deque[Dict[str, float]] = deque(maxlen=history)
+        self.highest: Optional[int] = None
+        self.bitmap = 0  # bit i set = sequence (highest - i) was received
+        self.totals = WindowStats(0.0)
+        self.current: Optional[WindowStats] = None
+
+    def _signed(self, value: int, modulus: int) -> int:
+        value %= modulus
+        return value - modulus if value >= modulus // 2 else value
+
+    def observe(self, seq: int, send_us: int, recv_us: Optional[int] = None,
+                recv_time: Optional[float] = None):
+        """Record one received stamp"""
+        if recv_us is None:
+            recv_us = now_us()
+        if recv_time is None:
+            recv_time = recv_us / 1e6
+        if self.current is None:
+            self.current = WindowStats(recv_time)
+        elif recv_time - self.current.start >= self.window:
+            self.roll(recv_time)
+
+        windows = (self.current, self.totals)
+        for w in windows:
+            w.received += 1
+
+        ahead = 0 if self.highest is None else self._signed(seq - self.highest, self.seq_modulus)
+        if self.restart_gap is not None and ahead <= -self.restart_gap:
+            self.highest = None
+            for w in windows:
+                w.restarts += 1
+
+        if self.highest is None:
+            self.highest = seq
+            self.bitmap = 1
+            for w in windows:
+                w.unique += 1
+                w.expected += 1
+        elif ahead > 0:
+            self.highest = seq
+            if ahead >= self.reorder_window:
+                self.bitmap = 1  # nothing in the old bitmap is still in range
+            else:
+                self.bitmap = ((self.bitmap << ahead) | 1) & self.bitmap_mask
+            for w in windows:
+                w.unique += 1
+                w.expected += ahead
+        elif -ahead < self.reorder_window:
+            bit = 1 << -ahead
+            if self.bitmap & bit:
+                for w in windows:
+                    w.duplicates += 1
+            else:
+                self.bitmap |= bit
+                for w in windows:
+                    w.unique += 1
+                    w.reordered += 1
+        else:
+            # Older than the bitmap: cannot tell late from duplicate
+            for w in windows:
+                w.too_old += 1
+
+        delay = self._signed(recv_us - send_us, self.time_modulus)
+        for w in windows:
+            w.add_delay(delay)
+
+    def roll(self, now: float) -> Optional[Dict[str, float]]:
+        """Close the current window (if one is open) and start a new one"""
+        closed = None
+        if self.current is not None:
+            closed = self.current.summary()
+            self.history.append(closed)
+        self.current = WindowStats(now)
+        return closed
+
+    def summary(self) -> Dict[str, float]:
+        """Statistics over everything observed so far"""
+        return self.totals.summary()
+
+
+def format_summary(label: str, s: Dict[str, float]) -> str:
+    def ms(value):
+        return "-" if value is None else f"{value / 1000:.2f}"
+    return (f"{label}: rx={s['received']} lost={s['lost']} ({100 * s['loss_rate']:.2f}%) "
+            f"dup={s['duplicates']} reord={s['reordered']} old={s['too_old']} restarts={s['restarts']} "
+            f"delay ms min/p50/p99/max={ms(s['delay_min_us'])}/{ms(s['delay_p50_us'])}/"
+            f"{ms(s['delay_p99_us'])}/{ms(s['delay_max_us'])}")
+
+
+def run_osc_receiver(host: str, port: int, window: float):
+    """Check stamped OSC streams arriving on a UDP port (one stream per sender)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    sock.settimeout(window)
+    checkers: Dict[Tuple[str, int], StreamChecker] = {}
+    print(f"Listening for stamped OSC on {host}:{port}")
+    next_report = time.time() + window
+    while True:
+        try:
+            data, addr = sock.recvfrom(65535)
+            recv_us = now_us()
+            try:
+                stamps = parse_osc_stamps(data)
+            except (ValueError, struct.error):
+                stamps = []  # not a stamped OSC datagram
+            for _, seq, send_us in stamps:
+                checker = checkers.get(addr)
+                if checker is None:
+                    checker = checkers[addr] = StreamChecker(window=window)
+                checker.observe(seq, send_us, recv_us)
+        except socket.timeout:
+            pass
+        if time.time() >= next_report:
+            next_report += window
+            for addr, checker in checkers.items():
+                closed = checker.roll(time.time())
+                if closed:
+                    print(format_summary(f"{addr[0]}:{addr[1]}", closed))
+
+
+def run_midi_receiver(port_name: str, window: float):
+    """Check stamped MIDI arriving on an input port
+
+    The port carries one sender at a time, so a sender restarted under the
+    same port name shows up as its sequence jumping back to 0: a jump back of
+    more than the reorder window (MIDI is never reordered that far) starts a
+    new session instead of counting every following stamp as too old.
+    """
+    import rtmidi
+    midiin = rtmidi.MidiIn()
+    midiin.ignore_types(sysex=False)
+    ports = midiin.get_ports()
+    index = next((i for i, p in enumerate(ports) if port_name in p), None)
+    if index is None:
+        print(f"✗ No MIDI input matching '{port_name}'. Available: {ports}")
+        return
+    midiin.open_port(index)
+    checker = StreamChecker(MIDI_SEQ_BITS, MIDI_TIME_BITS, window=window, restart_gap=1024)
+    print(f"Listening for stamped MIDI on {ports[index]}")
+    next_report = time.time() + window
+    while True:
+        event = midiin.get_message()
+        if event:
+            stamp = decode_midi_stamp(event[0])
+            if stamp:
+                checker.observe(*stamp)
+        else:
+            time.sleep(0.0005)
+        if time.time() >= next_report:
+            next_report += window
+            closed = checker.roll(time.time())
+            if closed:
+                print(format_summary("midi", closed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receiver-side stream integrity checker")
+    parser.add_argument('--window', type=float, default=1.0, help="Report window in seconds")
+    sub = parser.add_subparsers(dest='transport', required=True)
+    osc = sub.add_parser('osc', help="Check stamped OSC on a UDP port")
+    osc.add_argument('--host', default='127.0.0.1')
+    osc.add_argument('--port', type=int, default=9000)
+    midi = sub.add_parser('midi', help="Check stamped MIDI on an input port")
+    midi.add_argument('--port', default='Yamaha 02R96-1', help="Substring of the MIDI input port name")
+    args = parser.parse_args()
+
+    try:
+        if args.transport == 'osc':
+            run_osc_receiver(args.host, args.port, args.window)
+        else:
+            run_midi_receiver(args.port, args.window)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark runner and result comparison
+
+Usage:
+    python -m pytest test_benchmarks.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmarks import compare_results, run_benchmarks
+
+
+def document(**values):
+    return {'results': {name: {'value': value, 'unit': unit, 'higher_is_better': unit == 'msg/s'}
+                        for name, (value, unit) in values.items()}}
+
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = document(cc_encode=(500.0, 'ns/op'), loopback_send_max=(100000.0, 'msg/s'),
+                        mapping_load=(60000.0, 'ns/op'))
+    current = document(cc_encode=(600.0, 'ns/op'), loopback_send_max=(80000.0, 'msg/s'),
+                       mapping_load=(30000.0, 'ns/op'))
+    rows = {row['name']: row for row in compare_results(baseline, current, threshold=10.0)}
+
+    assert rows['cc_encode']['change'] == 20.0           # slower encoding is worse
+    assert rows['loopback_send_max']['change'] == 20.0   # lower throughput is worse
+    assert rows['mapping_load']['change'] == -50.0
+    assert [name for name, row in rows.items() if row['regression']] == ['cc_encode', 'loopback_send_max']
+
+
+def test_compare_skips_benchmarks_missing_from_either_file():
+    rows = compare_results(document(a=(1.0, 'ns/op'), b=(1.0, 'ns/op')), document(b=(1.05, 'ns/op')))
+    assert [(row['name'], row['regression']) for row in rows] == [('b', False)]
+
+
+def test_quick_run_produces_results_and_metadata():
+    results = run_benchmarks(only=['sysex_solo', 'osc_ypr_encode', 'loopback_send_1000'],
+                             number=200, repeat=2, rates=[1000], duration=0.05, verbose=False)
+
+    assert set(results['results']) == {'sysex_solo_encode', 'osc_ypr_encode', 'loopback_send_1000'}
+    assert results['environment']['python']
+    assert results['results']['sysex_solo_encode']['value'] > 0
+    loopback = results['results']['loopback_send_1000']
+    assert loopback['sent'] > 0 and loopback['received'] == loopback['sent']
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming MIDI parser
+
+Usage:
+    python -m pytest test_midi_parser.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yamaha_02r96_sim'))
+from midi_parser import MappingCheck, MidiParser
+from mapping_cache import load_device
+from midi_stream import CaptureTransport, MidiStreamOut
+from sim_clock import VirtualClock
+from yamaha_02r96_simulator import YamahaSimulator
+
+MIN_EVENT_RATE = 250_000  # running-status CCs per second, about 10x below a typical laptop
+
+STREAM = bytes([
+    0xB0, 1, 10, 2, 20,                      # running status
+    0xF8,                                    # clock between messages
+    0xB1, 1, 0xFA, 10,                       # start between the data bytes
+    0xF0, 0x43, 0x10, 0xF8, 0x3E, 0xF7,      # clock inside a SysEx
+    0xC0, 5, 6,                              # one data byte per message
+    0xF2, 0x10, 0x20, 0xF6,                  # system common
+    0xB0, 7, 100,
+])
+EXPECTED = [(0xB0, 1, 10), (0xB0, 2, 20), (0xF8,), (0xFA,), (0xB1, 1, 10), (0xF8,),
+            (0xF0, b'\xF0\x43\x10\x3E\xF7'), (0xC0, 5), (0xC0, 6), (0xF2, 0x10, 0x20), (0xF6,), (0xB0, 7, 100)]
+
+
+def parse(data, size):
+    parser = MidiParser()
+    events = []
+    for i in range(0, len(data), size):
+        events += [(e[0], bytes(e[1])) if e[0] == 0xF0 else e for e in parser.feed(data[i:i + size])]
+    return events, parser
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, len(STREAM)])
+def test_any_chunking_gives_the_same_messages(size):
+    events, parser = parse(STREAM, size)
+    assert events == EXPECTED
+    assert parser.errors == 0
+
+
+def test_sysex_in_one_chunk_is_not_copied():
+    chunk = bytes([0xB0, 1, 2, 0xF0, 0x7D, 0x01, 0xF7])
+    (_, body), = MidiParser().feed(chunk)[1:]
+    assert isinstance(body, memoryview) and body.obj is chunk and body.tobytes() == chunk[3:]
+
+
+def test_broken_input_is_counted_and_skipped():
+    parser = MidiParser(max_sysex=8)
+    events = parser.feed(bytes([0x01, 0x02, 0xF0, 0x43, 0xB0, 1, 2, 0xF7]))
+    events += parser.feed(bytes([0xF0] + [0x10] * 6))
+    events += parser.feed(bytes([0x10] * 6 + [0xF7, 0xB0, 3, 4]))
+    # two stray data bytes, SysEx cut by a status byte, stray F7, oversized SysEx
+    assert parser.errors == 5
+    assert events == [(0xB0, 1, 2), (0xB0, 3, 4)]
+
+
+def test_recorded_simulator_session_resolves_through_the_mappings():
+    clock = VirtualClock()
+    transport = CaptureTransport(clock, datagram=False)
+    simulator = YamahaSimulator(stamp=True, verbose=False, clock=clock, midiout=MidiStreamOut(transport))
+    simulator.demo_sequence()
+    capture = b''.join(data for _, data in transport.writes)
+
+    check = MappingCheck(load_device("Yamaha 02R96-1"))
+    resolved = check.check(parse(capture, 64)[0])
+
+    assert check.summary() == {
+        'actions': {'setTrackVolume': 7, 'setMasterVolume': 4, 'toggleMute': 6, 'toggleSolo': 6,
+                    'setPan': 12, 'setPositionX': 8, 'setPositionY': 8},
+        'unmapped_cc': 0, 'unmatched_sysex': 0, 'stamps': 51, 'other': 0}
+    assert [track for _, action, track in resolved if action == 'setPan'] == [0] * 4 + [1] * 4 + [2] * 4
+
+
+def test_parse_rate_floor():
+    data = bytes([0xB0]) + bytes([1, 64]) * 100_000
+    parser = MidiParser()
+    started = time.perf_counter()
+    count = sum(len(parser.feed(data[i:i + 4096])) for i in range(0, len(data), 4096))
+    rate = count / (time.perf_counter() - started)
+    assert count == 100_000
+    assert rate > MIN_EVENT_RATE
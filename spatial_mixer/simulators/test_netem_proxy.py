@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the UDP impairment proxy's links and timer wheel
+
+The links run on a stand-in event loop whose time only moves when the test
+advances it, so delays are checked exactly and every run is the same.
+
+Usage:
+    python -m pytest test_netem_proxy.py
+"""
+
+import heapq
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from netem_proxy import Impairments, Link, NetemProxy, TimerWheel
+
+TICK = 0.001
+SEED = 1234
+PACKETS = 20_000
+
+
+class _Handle:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class ManualLoop:
+    """The part of an asyncio loop TimerWheel uses, with time moved by advance()"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+        self.counter = itertools.count()
+
+    def time(self) -> float:
+        return self.now
+
+    def call_at(self, when, callback, *args):
+        handle = _Handle()
+        heapq.heappush(self.timers, (when, next(self.counter), handle, callback, args))
+        return handle
+
+    def advance(self, seconds: float):
+        target = self.now + seconds
+        while self.timers and self.timers[0][0] <= target:
+            when, _, handle, callback, args = heapq.heappop(self.timers)
+            self.now = max(self.now, when)
+            if not handle.cancelled:
+                callback(*args)
+        self.now = target
+
+
+def make_link(**impairments):
+    loop = ManualLoop()
+    link = Link("forward", Impairments(**impairments), TimerWheel(loop, TICK), random.Random(SEED))
+    delivered = []
+    send = lambda data: delivered.append((loop.time(), data))
+    return loop, link, send, delivered
+
+
+def test_no_impairments_forward_immediately_without_scheduling():
+    loop, link, send, delivered = make_link()
+    for n in range(100):
+        link.submit(bytes([n]), send)
+    assert [data for _, data in delivered] == [bytes([n]) for n in range(100)]
+    assert all(t == 0.0 for t, _ in delivered)
+    assert link.wheel.pending == 0 and not loop.timers
+    assert link.stats['received'] == link.stats['forwarded'] == 100
+
+
+def test_delay_is_applied_to_the_tick():
+    loop, link, send, delivered = make_link(delay=20)
+    link.submit(b'x', send)
+    loop.advance(0.0195)
+    assert not delivered
+    loop.advance(0.001)
+    assert len(delivered) == 1
+    assert 0.020 <= delivered[0][0] <= 0.020 + TICK
+
+
+def test_jitter_stays_within_its_bounds_and_reorders():
+    loop, link, send, delivered = make_link(delay=20, jitter=5)
+    sent_at = {}
+    for n in range(1000):
+        data = n.to_bytes(2, 'big')
+        sent_at[data] = loop.time()
+        link.submit(data, send)
+        loop.advance(0.0005)
+    loop.advance(0.1)
+    assert len(delivered) == 1000
+    delays = [t - sent_at[data] for t, data in delivered]
+    assert min(delays) >= 0.015 - 1e-9
+    assert max(delays) <= 0.025 + TICK + 1e-9
+    assert max(delays) - min(delays) > 0.008  # the jitter spans most of its range
+    order = [int.from_bytes(data, 'big') for _, data in delivered]
+    assert order != sorted(order)
+    assert link.wheel.pending == 0
+
+
+@pytest.mark.parametrize("name,counter", [("loss", "lost"), ("duplicate", "duplicated")])
+def test_loss_and_duplicate_ratios(name, counter):
+    loop, link, send, delivered = make_link(**{name: 0.2})
+    for _ in range(PACKETS):
+        link.submit(b'x', send)
+    ratio = link.stats[counter] / PACKETS
+    assert 0.18 < ratio < 0.22
+    expected = PACKETS - link.stats['lost'] + link.stats['duplicated']
+    assert len(delivered) == link.stats['forwarded'] == expected
+
+
+def test_same_seed_gives_the_same_impairments():
+    runs = []
+    for _ in range(2):
+        loop, link, send, delivered = make_link(loss=0.3, duplicate=0.1, jitter=5, delay=10)
+        for n in range(500):
+            link.submit(n.to_bytes(2, 'big'), send)
+            loop.advance(0.001)
+        loop.advance(0.1)
+        runs.append(delivered)
+    assert runs[0] == runs[1]
+
+
+def test_turning_impairments_off_restores_the_fast_path():
+    proxy = NetemProxy(("127.0.0.1", 0), ("127.0.0.1", 0), Impairments(delay=10), control_port=None)
+    loop = ManualLoop()
+    proxy.wheel = TimerWheel(loop, TICK)
+    proxy.forward = Link("forward", proxy.impairments, proxy.wheel, random.Random(SEED))
+    proxy.reverse = Link("reverse", proxy.impairments, proxy.wheel, random.Random(SEED))
+    delivered = []
+    proxy.forward.submit(b'a', delivered.append)
+    assert not delivered and proxy.wheel.pending == 1
+
+    assert proxy.handle_command("off").startswith("impairments off")
+    proxy.forward.submit(b'b', delivered.append)
+    assert delivered == [b'b']
+    assert proxy.handle_command("set loss=2").startswith("error:")
+    assert proxy.handle_command("set bogus=1").startswith("error:")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled OSC address dispatcher
+
+Usage:
+    python -m pytest test_osc_dispatch.py
+"""
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from osc_dispatch import (DISPATCHERS, DawStandIn, OscDispatcher, benchmark, benchmark_addresses,
+                          benchmark_patterns, build_dispatcher, parse_osc_packet)
+
+
+def osc_string(text: str) -> bytes:
+    data = text.encode() + b'\0'
+    return data + b'\0' * (-len(data) % 4)
+
+
+def osc_message(address: str, *floats: float) -> bytes:
+    return osc_string(address) + osc_string(',' + 'f' * len(floats)) + struct.pack(f'>{len(floats)}f', *floats)
+
+
+def test_trie_agrees_with_the_regex_baselines():
+    patterns = benchmark_patterns(300)
+    addresses = benchmark_addresses(patterns, count=2000) + ["/track/7", "/track//volume", "track/1/pan"]
+    dispatchers = {kind: build_dispatcher(kind, patterns) for kind in DISPATCHERS}
+    for address in addresses:
+        results = {kind: dispatcher.match(address) for kind, dispatcher in dispatchers.items()}
+        expected = results['linear'] and results['linear'][1:]
+        assert all((found and found[1:]) == expected for found in results.values()), address
+
+
+def test_literal_segments_win_and_captures_are_typed():
+    calls = []
+    dispatcher = OscDispatcher()
+    dispatcher.add("/track/*/volume", lambda captures, args: calls.append(('track', captures, args)))
+    dispatcher.add("/track/master/volume", lambda captures, args: calls.append(('master', captures, args)))
+    dispatcher.add("/*/*/zenith", lambda captures, args: calls.append(('any', captures, args)))
+
+    assert dispatcher.dispatch("/track/master/volume", (0.5,))
+    assert dispatcher.dispatch("/track/12/volume", (0.25,))
+    assert dispatcher.dispatch("/track/12/zenith", (1.0,))   # backtracks from the literal 'track'
+    assert not dispatcher.dispatch("/track/12/volume/extra")
+    assert calls == [('master', (), (0.5,)), ('track', (12,), (0.25,)), ('any', ('track', 12), (1.0,))]
+    assert (dispatcher.dispatched, dispatcher.unhandled) == (3, 1)
+
+    for bad in ("track/*", "/track/1*/volume", "/track//volume"):
+        with pytest.raises(ValueError):
+            dispatcher.add(bad, print)
+    with pytest.raises(ValueError, match="duplicate"):
+        dispatcher.add("/track/*/volume", print)
+
+
+def test_daw_stand_in_keeps_the_latest_value_per_track():
+    daw = DawStandIn()
+    bundle = b'#bundle\0' + bytes(8)
+    for element in (osc_message("/track/3/azimuth", 0.25), osc_message("/track/3/zenith", 0.75)):
+        bundle += struct.pack('>i', len(element)) + element
+    daw.receive(osc_message("/track/3/volume", 0.5))
+    daw.receive(osc_message("/track/3/volume", 0.125))
+    daw.receive(bundle)
+    daw.receive(osc_message("/ypr", 1.0, 2.0, 3.0))
+
+    assert daw.state == {('volume', 3): 0.125, ('azimuth', 3): 0.25, ('zenith', 3): 0.75}
+    assert daw.counts["/track/*/volume"] == 2 and daw.unhandled == {"/ypr": 1}
+    assert parse_osc_packet(osc_message("/ypr", 1.0, 2.0, 3.0)) == [("/ypr", (1.0, 2.0, 3.0))]
+
+
+def test_daw_stand_in_drops_malformed_datagrams_and_keeps_receiving():
+    daw = DawStandIn()
+    good = osc_message("/track/2/volume", 0.5)
+    oversized = b'#bundle\0' + bytes(8) + struct.pack('>i', 1000) + good
+    negative = b'#bundle\0' + bytes(8) + struct.pack('>i', -4) + good
+    for datagram in (good[:-2],                                    # truncated float
+                     b'/track/2/volume',                           # unterminated address
+                     osc_string("/track/2/volume") + osc_string(",x") + bytes(4),  # unknown type tag
+                     oversized, negative):
+        daw.receive(datagram)
+    daw.receive(good)
+    assert daw.malformed == 5
+    assert daw.state == {('volume', 2): 0.5}
+    with pytest.raises(ValueError):
+        parse_osc_packet(negative)
+
+
+def test_trie_rate_does_not_fall_with_the_pattern_count():
+    few, many = (rates for _, rates in sorted(benchmark([50, 800], seconds=0.05).items()))
+    # 16x the patterns: the trie keeps its rate (within noise), the linear scan does not
+    assert many['trie'] > 0.5 * few['trie']
+    assert many['linear'] < 0.5 * few['linear']
+    # and it beats both baselines by a wide margin (the factor varies by machine)
+    assert many['trie'] > 3 * many['linear'] and many['trie'] > 3 * many['regex']
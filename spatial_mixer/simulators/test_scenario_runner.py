@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the scenario runner, dry on a VirtualClock (no ports opened)
+
+Usage:
+    python -m pytest test_scenario_runner.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scenario_runner import Outputs, dry_run_scenario, load_scenario, parse_tracks, write_timeline
+from sim_clock import VirtualClock
+
+SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios',
+                        'tracker_sweep_fader_ramps.json')
+
+
+@pytest.fixture(scope="module")
+def run():
+    scenario = load_scenario(SCENARIO)
+    outputs = Outputs(scenario, dry_run=True)
+    clock = VirtualClock()
+    generators = dry_run_scenario(scenario, outputs, clock)
+    return scenario, outputs, clock, generators
+
+
+def test_message_counts(run):
+    scenario, outputs, clock, generators = run
+    # 30 s: tracker 250 Hz, 48 faders at 20 Hz, 8 orbiting tracks (x and y) at 30 Hz, 4 events
+    assert outputs.counts == {
+        'osc:ypr': 7500,
+        'midi:send_track_volume': 600 * 48,
+        'midi:send_position_x': 900 * 8,
+        'midi:send_position_y': 900 * 8,
+        'midi:send_track_mute': 8,
+        'midi:send_track_solo': 2,
+    }
+    assert {g.name: g.ticks for g in generators} == {
+        'tracker': 7500, 'faders': 600, 'positions': 900, 'mutes': 4}
+    assert clock.monotonic() == pytest.approx(scenario['duration'])
+
+
+def test_timeline_is_in_time_order(run):
+    _, outputs, _, _ = run
+    times = [t for t, _, _ in outputs.timeline]
+    assert times == sorted(times)
+    # At t=0 every periodic generator ticks, in scenario order
+    first = [kind for t, kind, _ in outputs.timeline if t == 0.0]
+    assert first[0] == 'osc:ypr'
+    assert first[1:49] == ['midi:send_track_volume'] * 48
+    assert first[49:] == ['midi:send_position_x', 'midi:send_position_y'] * 8
+
+
+def test_events_land_at_their_times(run):
+    _, outputs, _, _ = run
+    events = [(t, kind, args) for t, kind, args in outputs.timeline
+              if kind in ('midi:send_track_mute', 'midi:send_track_solo')]
+    assert events == (
+        [(5.0, 'midi:send_track_mute', (track, True)) for track in range(1, 5)] +
+        [(10.0, 'midi:send_track_mute', (track, False)) for track in range(1, 5)] +
+        [(15.0, 'midi:send_track_solo', (8, True)), (20.0, 'midi:send_track_solo', (8, False))])
+
+
+def test_dry_run_is_deterministic(run, tmp_path):
+    scenario, outputs, _, _ = run
+    again = Outputs(scenario, dry_run=True)
+    dry_run_scenario(scenario, again, VirtualClock())
+    assert again.timeline == outputs.timeline
+
+    path = tmp_path / "timeline.csv"
+    write_timeline(str(path), outputs.timeline)
+    assert len(path.read_text().splitlines()) == len(outputs.timeline) + 1
+
+
+def test_parse_tracks():
+    assert parse_tracks(5) == [5]
+    assert parse_tracks([1, 2]) == [1, 2]
+    assert parse_tracks("1-3,8,10-11") == [1, 2, 3, 8, 10, 11]
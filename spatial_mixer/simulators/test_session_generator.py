@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic session generator and session files
+
+Usage:
+    python -m pytest test_session_generator.py
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from session_file import (KIND_FADER, KIND_METER, KIND_POSE, SessionError, read_session, replay,
+                          summarize, write_session)
+from session_generator import generate_session
+from sim_clock import VirtualClock
+
+
+def test_generated_session_follows_its_settings():
+    records, metadata = generate_session(duration=60.0, tracks=8, pose_hz=200.0, meter_hz=30.0, yaw_sd=20.0)
+    assert np.all(np.diff(records['t_us'].astype(np.int64)) >= 0)
+    assert records['t_us'][-1] < 60_000_000
+
+    pose = records[records['kind'] == KIND_POSE]
+    meters = records[records['kind'] == KIND_METER]
+    faders = records[records['kind'] == KIND_FADER]
+    assert len(pose) == 60 * 200 and len(meters) == 60 * 30 * 8
+    assert 10.0 < pose['a'].std() / 100 < 30.0  # yaw in centidegrees, 20 degrees spread
+    assert meters['a'].min() >= -6000 and meters['a'].max() <= 0
+    assert set(faders['track']) == set(range(1, 9)) and faders['a'].max() <= 127
+    assert list(faders['t_us'][:8]) == [0] * 8  # every fader starts at t=0
+    assert metadata['settings']['seed'] == 0
+
+    again, _ = generate_session(duration=60.0, tracks=8, pose_hz=200.0, meter_hz=30.0, yaw_sd=20.0)
+    assert np.array_equal(records, again)
+    with pytest.raises(ValueError, match="unknown"):
+        generate_session(pose_rate=10)
+
+
+def test_session_file_round_trip(tmp_path):
+    records, metadata = generate_session(duration=10.0, tracks=4)
+    path = str(tmp_path / "session.smsf")
+    write_session(path, records, metadata)
+    assert os.path.getsize(path) < 16 * len(records) + 1024
+
+    for mmap in (False, True):
+        loaded_metadata, loaded = read_session(path, mmap=mmap)
+        assert loaded_metadata == metadata and np.array_equal(loaded, records)
+    assert summarize(loaded)['per_kind']['pose'] == 5000
+
+    (tmp_path / "other.bin").write_bytes(b"not a session" * 4)
+    with pytest.raises(SessionError):
+        read_session(str(tmp_path / "other.bin"))
+
+
+def test_replay_sends_each_record_at_its_time():
+    records, _ = generate_session(duration=2.0, tracks=2, pose_hz=50.0, meter_hz=10.0)
+    clock = VirtualClock()
+    sent = []
+    report = replay(records, lambda *record: sent.append((clock.monotonic(), record)), clock, speed=2.0)
+    assert report['records'] == len(records) == len(sent)
+    assert all(abs(when - t_us / 2e6) < 1e-9 for (when, _), t_us in zip(sent, records['t_us'].tolist()))
+    assert report['max_late_ms'] == 0.0
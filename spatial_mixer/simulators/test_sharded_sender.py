@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-pool sharded sender
+
+Usage:
+    python -m pytest test_sharded_sender.py
+"""
+
+import os
+import socket
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from osc_dispatch import parse_osc_packet
+from sharded_sender import daw_streams, run_sharded, shard, tracker_streams
+
+
+def test_shards_cover_every_stream_once():
+    shards = shard(10, 3)
+    assert sorted(index for indices in shards for index in indices) == list(range(10))
+    assert [len(indices) for indices in shards] == [4, 3, 3]
+
+
+def test_workloads_encode_the_sketch_addresses():
+    (volume,), (azimuth,) = daw_streams([0])[0](0.0), daw_streams([7])[0](0.0)
+    assert parse_osc_packet(volume)[0][0] == "/track/1/volume"
+    assert parse_osc_packet(azimuth)[0][0] == "/track/2/azimuth"
+    address, args = parse_osc_packet(tracker_streams([3])[0](1.0)[0])[0]
+    assert address == "/ypr" and len(args) == 3
+
+
+def test_workers_share_a_start_and_report_together():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1.0)
+    received = []
+
+    def receive():
+        try:
+            while True:
+                received.append(parse_osc_packet(receiver.recv(2048))[0][0])
+        except OSError:
+            pass
+    thread = threading.Thread(target=receive, daemon=True)
+    thread.start()
+
+    report = run_sharded('daw', streams=10, workers=2, target=receiver.getsockname(), rate=50, duration=0.4)
+    thread.join(3.0)
+    receiver.close()
+
+    assert report['workers'] == 2 and report['streams'] == 10 and report['errors'] == 0
+    assert [worker['streams'] for worker in report['per_worker']] == [5, 5]
+    # 20 ticks per worker of 5 streams each, minus any tick skipped on a loaded host
+    assert report['sent'] == 5 * report['ticks'] and report['ticks'] + report['missed'] == 40
+    assert len(received) == report['sent']
+    assert set(received) == {f"/track/{track}/{param}" for track in (1, 2)
+                             for param in ("volume", "pan", "azimuth", "zenith", "radius")}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the simulator clocks and the send scheduler
+
+Usage:
+    python -m pytest test_sim_clock.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from sim_clock import REAL_CLOCK, RecordingMidiOut, SendScheduler, VirtualClock, VirtualTimeDeadlock
+
+MAX_MEDIAN_LATE = 0.0005  # seconds; a spinning wait typically lands within tens of microseconds
+
+
+def test_virtual_sleep_runs_callbacks_in_time_order():
+    clock = VirtualClock(epoch=1000.0)
+    ran = []
+    clock.call_at(0.3, lambda: ran.append(('c', clock.monotonic())))
+    clock.call_at(0.1, lambda: ran.append(('a', clock.monotonic())))
+    clock.call_later(0.1, lambda: ran.append(('a2', clock.monotonic())))  # same time: FIFO
+    clock.sleep(0.2)
+    assert ran == [('a', 0.1), ('a2', 0.1)] and clock.monotonic() == 0.2
+    clock.sleep(1.0)
+    assert ran[-1] == ('c', 0.3) and clock.monotonic() == 1.2 and clock.time() == 1001.2
+
+
+def test_virtual_wait_wakes_on_a_scheduled_set_or_times_out():
+    clock = VirtualClock()
+    event = threading.Event()
+    clock.call_at(2.0, event.set)
+    assert clock.wait(event, timeout=5.0) and clock.monotonic() == 2.0
+
+    assert not clock.wait(threading.Event(), timeout=0.5) and clock.monotonic() == 2.5
+    with pytest.raises(VirtualTimeDeadlock):
+        clock.wait(threading.Event())
+
+
+def test_recording_midi_out_stamps_messages_with_clock_time():
+    clock = VirtualClock()
+    midiout = RecordingMidiOut(clock)
+    midiout.send_message([0xB0, 1, 100])
+    clock.sleep(0.25)
+    midiout.send_message((0xB0, 1, 90))
+    assert midiout.messages == [(0.0, [0xB0, 1, 100]), (0.25, [0xB0, 1, 90])]
+    assert midiout.get_ports() == []
+
+
+def test_events_run_in_timestamp_order():
+    clock = VirtualClock()
+    scheduler = SendScheduler(clock)
+    ran = []
+    for when, name in ((0.3, 'c'), (0.1, 'a'), (0.2, 'b1'), (0.2, 'b2'), (0.0, 'now')):
+        scheduler.call_at(when, lambda name=name: ran.append((clock.monotonic(), name)))
+    scheduler.run()
+
+    assert ran == [(0.0, 'now'), (0.1, 'a'), (0.2, 'b1'), (0.2, 'b2'), (0.3, 'c')]
+    assert scheduler.report() == {'ran': 5, 'mean_late_ms': 0.0, 'p99_late_ms': 0.0, 'max_late_ms': 0.0}
+
+
+def test_real_clock_sends_land_on_their_timestamps():
+    scheduler = SendScheduler(REAL_CLOCK)
+    start = REAL_CLOCK.monotonic() + 0.01
+    for n in range(100):
+        scheduler.call_at(start + n * 0.002, lambda: None)
+    scheduler.run()
+
+    assert scheduler.ran == 100
+    assert 0 <= scheduler.late_percentile(50) < MAX_MEDIAN_LATE
+    assert REAL_CLOCK.monotonic() >= start + 99 * 0.002
+
+
+def test_sleep_until_never_returns_early():
+    for delay in (0.0, 0.0005, 0.003):
+        deadline = time.perf_counter() + delay
+        REAL_CLOCK.sleep_until(deadline)
+        assert time.perf_counter() >= deadline
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the live simulator metrics
+
+Usage:
+    python -m pytest test_sim_metrics.py
+"""
+
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yamaha_02r96_sim'))
+from sim_metrics import (BUCKET_COUNT, EXPORT_BOUNDS, Histogram, MetricsRegistry, MetricsServer,
+                         bucket_index, bucket_upper)
+from sim_clock import RecordingMidiOut
+from yamaha_02r96_simulator import YamahaSimulator
+
+MAX_RECORD_NS = 1000  # instrumentation budget per message
+
+
+def test_buckets_are_contiguous_and_within_an_eighth():
+    rng = random.Random(1)
+    values = list(range(4096)) + [rng.randrange(1 << 39) for _ in range(5000)]
+    for value in values:
+        index = bucket_index(value)
+        assert bucket_upper(index) >= value
+        assert index == 0 or bucket_upper(index - 1) < value
+        assert bucket_upper(index) <= value * 1.125 + 1
+    assert bucket_index(1 << 60) == BUCKET_COUNT - 1
+
+
+def test_histogram_export_is_cumulative():
+    histogram = Histogram()
+    for value in (500, 1500, 1500, 30_000_000, 20_000_000_000):  # 0.5 us .. 20 s
+        histogram.record(value)
+    cumulative, count, total = histogram.export()
+    assert count == 5 and total == sum((500, 1500, 1500, 30_000_000, 20_000_000_000))
+    assert cumulative[EXPORT_BOUNDS.index(1e-06)] == 1
+    assert cumulative[EXPORT_BOUNDS.index(2e-06)] == 3
+    assert cumulative[EXPORT_BOUNDS.index(0.05)] == 4
+    assert cumulative[-2] == 4 and cumulative[-1] == 5  # 20 s only in +Inf
+    assert histogram.percentile(50) == bucket_upper(bucket_index(1500))
+
+
+def test_simulator_sends_are_counted_per_type():
+    registry = MetricsRegistry()
+    simulator = YamahaSimulator(verbose=False, midiout=RecordingMidiOut(), metrics=registry)
+    for track in range(1, 49):
+        simulator.send_track_volume(track, 100)
+        simulator.send_position_x(track, -5)
+    simulator.send_track_solo(1, True)
+    simulator.connected = False
+    simulator.send_track_pan(1, 64)
+
+    cc, sysex = registry.message("yamaha", "cc"), registry.message("yamaha", "sysex")
+    assert (cc.count, sysex.count) == (48, 49)
+    assert (cc.errors, sysex.errors) == (1, 0)
+    assert sum(cc.interval.counts) == 47
+
+
+def test_endpoint_serves_prometheus_text():
+    registry = MetricsRegistry()
+    registry.message("head_tracker", "osc").record(1_000, 3_000)
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.address[1]}/metrics", timeout=2) as response:
+            content_type = response.headers['Content-Type']
+            body = response.read().decode('utf-8')
+    finally:
+        server.close()
+
+    assert content_type.startswith('text/plain; version=0.0.4')
+    assert 'simulator_messages_total{simulator="head_tracker",type="osc"} 1' in body
+    assert '# TYPE simulator_send_duration_seconds histogram' in body
+    assert 'simulator_send_duration_seconds_bucket{simulator="head_tracker",type="osc",le="5e-06"} 1' in body
+    assert 'simulator_send_duration_seconds_sum{simulator="head_tracker",type="osc"} 0.000002000' in body
+
+
+def test_record_overhead_under_budget():
+    metrics = MetricsRegistry().message("yamaha", "cc")
+    clock = time.perf_counter_ns
+    count = 20_000
+
+    def per_message(instrumented):
+        started = clock()
+        for _ in range(count):
+            sent = clock()
+            finished = clock()
+            if instrumented:
+                metrics.record(sent, finished)
+        return (clock() - started) / count
+
+    # Best of several runs: the budget is about the code, not a busy machine
+    overhead = min(per_message(True) for _ in range(5)) - min(per_message(False) for _ in range(5))
+    assert overhead < MAX_RECORD_NS
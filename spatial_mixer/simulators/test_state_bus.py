@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory state bus
+
+Usage:
+    python -m pytest test_state_bus.py
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "yamaha_02r96_sim"))
+from sim_clock import RecordingMidiOut
+import state_bus
+from state_bus import StateBus, TrackState, attach, torn_read_check
+from console_core import encode_position
+from scene_sysex import decode_scene
+from yamaha_02r96_simulator import YamahaSimulator
+
+
+@pytest.fixture
+def bus_name(request):
+    return f"test_state_bus_{os.getpid()}_{request.node.name}"[:30]
+
+
+def test_readers_see_the_writers_pose_and_mixer(bus_name):
+    writer = StateBus(bus_name)
+    reader = StateBus(bus_name, create=False)
+    try:
+        assert writer.owner and not reader.owner
+        writer.publish_pose(10.0, -5.0, 2.5)
+        writer.apply(("setTrackVolume", 3), (3, 100))
+        writer.apply(("setPositionX", 3), (3, -20))
+        writer.apply(("toggleMute", 3), (3, True), held=True, outages=1)
+        writer.apply(("setMasterVolume",), (90,))
+        writer.apply(("setPan", 49), (49, 64))  # beyond the bus: a cascaded console's track
+
+        pose, mixer = reader.read_pose(), reader.read_mixer()
+        assert (pose.yaw, pose.pitch, pose.roll, pose.published) == (10.0, -5.0, 2.5, 1)
+        assert mixer.tracks[2] == TrackState(100, 0, True, False, -20, 0)
+        assert (mixer.changes, mixer.held, mixer.outages, mixer.master) == (4, 1, 1, 90)
+    finally:
+        reader.close()
+        writer.close()
+    with pytest.raises(FileNotFoundError):
+        StateBus(bus_name, create=False)  # removed with its creator
+
+
+def test_readers_wait_for_a_publisher_and_never_own_the_bus(bus_name):
+    with pytest.raises(FileNotFoundError):
+        attach(bus_name, timeout=0.05, interval=0.01)  # a reader alone never creates the bus
+
+    created = []
+    timer = threading.Timer(0.1, lambda: created.append(StateBus(bus_name)))
+    timer.start()
+    reader = attach(bus_name, timeout=5.0, interval=0.01)
+    timer.join()
+    writer = created[0]
+    try:
+        assert writer.owner and not reader.owner
+        writer.publish_pose(1.0, 2.0, 3.0)
+        assert reader.read_pose().yaw == 1.0
+    finally:
+        reader.close()  # a reader leaving does not remove the bus
+        second = StateBus(bus_name)
+        assert not second.owner
+        second.close()
+        writer.close()
+
+
+def test_publishers_starting_together_share_one_bus(bus_name, monkeypatch):
+    first = []
+    attach_block = state_bus._attach
+
+    def lose_the_race(name):
+        # The other publisher creates the bus between this one's attach and its create
+        monkeypatch.setattr(state_bus, "_attach", attach_block)
+        first.append(StateBus(name, create=True))
+        raise FileNotFoundError(name)
+
+    monkeypatch.setattr(state_bus, "_attach", lose_the_race)
+    second = StateBus(bus_name)
+    try:
+        assert first[0].owner and not second.owner
+        first[0].publish_pose(1.0, 2.0, 3.0)
+        assert second.read_pose().yaw == 1.0
+    finally:
+        second.close()
+        first[0].close()
+
+
+def test_simulator_publishes_sent_and_scene_state(bus_name):
+    bus = StateBus(bus_name)
+    try:
+        simulator = YamahaSimulator(verbose=False, midiout=RecordingMidiOut(), state_bus=bus)
+        simulator.send_track_pan(5, 30)
+        simulator.send_track_solo(5, True)
+        tracks = [dict(volume=track, pan=64, mute=False, solo=False, x=-track, y=track) for track in range(48)]
+        simulator.send_scene(tracks, 77)
+        simulator.send_track_mute(48, True)
+
+        mixer = bus.read_mixer()
+        assert mixer.tracks[4] == TrackState(4, 64, False, False, -4, 4)  # the scene replaced track 5
+        assert mixer.tracks[47] == TrackState(47, 64, True, False, -47, 47)
+        assert (mixer.changes, mixer.held, mixer.master) == (4, 0, 77)
+    finally:
+        bus.close()
+
+
+def test_out_of_range_values_are_published_as_sent(bus_name):
+    bus = StateBus(bus_name)
+    try:
+        midiout = RecordingMidiOut()
+        simulator = YamahaSimulator(verbose=False, midiout=midiout, state_bus=bus)
+        simulator.send_position_x(2, -100)
+        simulator.send_position_y(2, 100)
+        track = bus.read_mixer().tracks[1]
+        assert midiout.messages[0][1][-5:-1] == encode_position(track.x) == encode_position(-63)
+        assert midiout.messages[1][1][-5:-1] == encode_position(track.y) == encode_position(63)
+
+        tracks = [dict(volume=200, pan=-5, mute=True, solo=False, x=200, y=-100)] * 48
+        simulator.send_scene(tracks, 300)
+        _, master, sent = decode_scene(midiout.messages[-1][1])
+        mixer = bus.read_mixer()
+        assert mixer.master == master == 127
+        assert mixer.tracks[0] == TrackState(**sent[0]) == TrackState(127, 0, True, False, 63, -63)
+
+        with pytest.raises(KeyError):  # a write that fails halfway still ends the update
+            bus.apply(("recallScene", 1), ([dict(volume=1)], 5))
+        assert bus.read_mixer().master == 5
+    finally:
+        bus.close()
+
+
+def test_reads_are_never_torn_across_processes(bus_name):
+    check = torn_read_check(bus_name, count=50000)
+    assert check['published'] == 50000 and check['reads'] > 0
+    assert check['torn'] == 0
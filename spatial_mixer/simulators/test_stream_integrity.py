@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the receiver-side stream integrity checker
+
+Usage:
+    python -m pytest test_stream_integrity.py
+"""
+
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stream_integrity import (MIDI_SEQ_BITS, MIDI_TIME_BITS, StreamChecker, decode_midi_stamp,
+                              encode_midi_stamp, parse_osc_stamps)
+
+
+def observe_all(checker, seqs, start_us=1_000_000):
+    for n, seq in enumerate(seqs):
+        checker.observe(seq, start_us + n * 1000, start_us + n * 1000 + 500, recv_time=0.0)
+    return checker.summary()
+
+
+def test_in_order_stream_has_no_loss():
+    s = observe_all(StreamChecker(), range(100))
+    assert (s['received'], s['expected'], s['lost']) == (100, 100, 0)
+    assert s['delay_min_us'] == s['delay_max_us'] == 500
+
+
+def test_loss_reorder_and_duplicates_are_counted():
+    s = observe_all(StreamChecker(), [0, 1, 3, 2, 2, 5, 6])
+    assert s['lost'] == 1          # 4 never arrived
+    assert s['reordered'] == 1     # 2 after 3
+    assert s['duplicates'] == 1    # 2 again
+
+
+def test_large_forward_jump_clears_the_bitmap():
+    checker = StreamChecker()
+    observe_all(checker, [5, 2_000_000_000])
+    assert checker.bitmap == 1
+    assert checker.bitmap.bit_length() <= checker.reorder_window
+    s = observe_all(checker, [2_000_000_000 - 1])
+    assert s['reordered'] == 1 and s['duplicates'] == 0
+    assert s['expected'] == 2_000_000_000 - 5 + 1
+
+
+def test_sequence_wraps_around():
+    checker = StreamChecker(seq_bits=8)
+    s = observe_all(checker, [254, 255, 0, 1])
+    assert (s['expected'], s['lost'], s['too_old']) == (4, 0, 0)
+
+
+def test_restart_gap_starts_a_new_session():
+    checker = StreamChecker(MIDI_SEQ_BITS, MIDI_TIME_BITS, restart_gap=1024)
+    s = observe_all(checker, list(range(5000)) + list(range(100)))
+    assert s['restarts'] == 1
+    assert (s['lost'], s['duplicates'], s['too_old']) == (0, 0, 0)
+    assert s['expected'] == 5100
+
+    # Without restart_gap the new session is just too old
+    s = observe_all(StreamChecker(MIDI_SEQ_BITS, MIDI_TIME_BITS), list(range(5000)) + list(range(100)))
+    assert s['restarts'] == 0 and s['too_old'] == 100
+
+
+def test_windows_tumble_and_add_up_to_the_totals():
+    checker = StreamChecker(window=1.0)
+    for n in range(30):
+        checker.observe(n, 0, 1000, recv_time=n * 0.1)
+    checker.roll(3.0)
+    assert [w['received'] for w in checker.history] == [10, 10, 10]
+    assert sum(w['received'] for w in checker.history) == checker.summary()['received']
+
+
+def test_midi_stamp_round_trip():
+    stamp = ((1 << MIDI_SEQ_BITS) - 2, (1 << MIDI_TIME_BITS) - 3)
+    assert decode_midi_stamp(encode_midi_stamp(*stamp)) == stamp
+    assert decode_midi_stamp([0x90, 60, 100]) is None
+
+
+def test_malformed_bundle_sizes_end_parsing():
+    message = b'/ypr\0\0\0\0,ii\0' + struct.pack('>II', 7, 1234)
+    for size in (-4, 1000):
+        bundle = b'#bundle\0' + bytes(8) + struct.pack('>i', len(message)) + message + struct.pack('>i', size)
+        assert parse_osc_stamps(bundle + message) == [('/ypr', 7, 1234)]
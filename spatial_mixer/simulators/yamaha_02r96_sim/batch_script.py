@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Batch Scripts for the CLI Simulator
+
+Non-interactive command scripts, read from a file or stdin, for driving
+stress tests from shell pipelines. A script is parsed and compiled once into
+a timeline of (time, command, track, value) events; loops are unrolled and
+track ranges expanded at compile time, so running it is a plain walk over the
+timeline, either at full speed or on schedule (sim_clock.SendScheduler).
+
+Script syntax (one command per line, '#' starts a comment):
+    vol 1-48 100            track commands take a track list: 5, 1-8, 1,3,5-7 or * (all)
+    pan * 64
+    mute 3,5 on             on/off (or 1/0) for mute and solo
+    posx 1-8 -20            positions -63..63, volume/pan 0..127
+    master 100
+    scene                   bulk scene frame with the default scene ('scene each': per parameter)
+    wait 250ms              advance the script clock (ms, s, or plain seconds)
+    repeat 4                repeat the block up to the matching 'end' (blocks nest)
+      vol 1 0
+      wait 0.1
+      vol 1 127
+      wait 0.1
+    end
+
+Commands between two waits share one timestamp and run in script order.
+
+Usage:
+    python batch_script.py stress.txt        # check a script: events, duration, commands
+    python yamaha_02r96_simulator.py --batch stress.txt
+    cat stress.txt | python yamaha_02r96_simulator.py --batch - --fast
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from scene_sysex import DEFAULT_TRACK
+from sim_clock import SendScheduler
+
+# command -> value range, or None for on/off switches
+TRACK_COMMANDS: Dict[str, Optional[Tuple[int, int]]] = {
+    'vol': (0, 127),
+    'pan': (0, 127),
+    'posx': (-63, 63),
+    'posy': (-63, 63),
+    'mute': None,
+    'solo': None,
+}
+SWITCH_VALUES = {'on': True, '1': True, 'off': False, '0': False}
+DURATION = re.compile(r'^(\d+(?:\.\d*)?|\.\d+)(ms|s)?$')
+START_LEAD = 0.05  # seconds between scheduling a timeline and its first event
+MAX_EVENTS = 10_000_000  # unrolled loops beyond this are a script error, not an out-of-memory
+MAX_ITERATIONS = 10_000_000  # loop passes in all; loops of only waits never reach MAX_EVENTS
+
+Event = Tuple[float, str, int, object]  # (seconds from start, command, track or 0, value)
+
+
+class ScriptError(ValueError):
+    """A script line that cannot be compiled"""
+
+
+def parse_tracks(text: str, tracks: Sequence[int]) -> List[int]:
+    """'*', '5', '1-8' or '1,3,5-7' -> track numbers, checked against the console's tracks"""
+    if text == '*':
+        return list(tracks)
+    selected = []
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        first_track, last_track = int(first), int(last or first)
+        if first_track > last_track or first_track not in tracks or last_track not in tracks:
+            raise ValueError(f"tracks must be within {tracks[0]}-{tracks[-1]}, got '{part}'")
+        selected += range(first_track, last_track + 1)
+    return selected
+
+
+def parse_duration(text: str) -> float:
+    match = DURATION.match(text)
+    if not match:
+        raise ValueError(f"bad duration '{text}' (e.g. 250ms, 0.5s, 2)")
+    value = float(match.group(1))
+    return value / 1000 if match.group(2) == 'ms' else value
+
+
+def compile_script(text: str, tracks: Sequence[int] = range(1, 49)) -> List[Event]:
+    """Parse a script and unroll it into a timeline sorted by time (script order on ties)"""
+    # Parse into a tree of blocks: [(line number, words) or (line number, count, block)]
+    root: List = []
+    stack = [(0, root)]
+    for number, line in enumerate(text.splitlines(), 1):
+        words = line.split('#', 1)[0].lower().split()
+        if not words:
+            continue
+        try:
+            if words[0] == 'repeat':
+                if len(words) != 2 or int(words[1]) < 0:
+                    raise ValueError("usage: repeat <count>")
+                block: List = []
+                stack[-1][1].append((number, int(words[1]), block))
+                stack.append((number, block))
+            elif words[0] == 'end':
+                if len(stack) == 1:
+                    raise ValueError("'end' without 'repeat'")
+                stack.pop()
+            else:
+                stack[-1][1].append((number, _parse_command(words, tracks)))
+        except ValueError as e:
+            raise ScriptError(f"line {number}: {e}") from None
+    if len(stack) > 1:
+        raise ScriptError(f"line {stack[-1][0]}: 'repeat' without 'end'")
+
+    timeline: List[Event] = []
+    iterations = 0
+
+    def unroll(block: List, now: float) -> float:
+        nonlocal iterations
+        for item in block:
+            if len(item) == 3:
+                iterations += item[1]
+                if iterations > MAX_ITERATIONS:
+                    raise ScriptError(f"line {item[0]}: script unrolls to more than {MAX_ITERATIONS} loop passes")
+                for _ in range(item[1]):
+                    now = unroll(item[2], now)
+                continue
+            command = item[1]
+            if command[0] == 'wait':
+                now += command[1]
+            else:
+                for track in command[1]:
+                    timeline.append((now, command[0], track, command[2]))
+                if len(timeline) > MAX_EVENTS:
+                    raise ScriptError(f"line {item[0]}: script unrolls to more than {MAX_EVENTS} events")
+        return now
+
+    unroll(root, 0.0)
+    return timeline  # already in time order: the script clock only moves forward
+
+
+def _parse_command(words: List[str], tracks: Sequence[int]):
+    command = words[0]
+    if command == 'wait':
+        if len(words) != 2:
+            raise ValueError("usage: wait <duration>")
+        return 'wait', parse_duration(words[1])
+    if command == 'master':
+        if len(words) != 2 or not 0 <= int(words[1]) <= 127:
+            raise ValueError("usage: master <0-127>")
+        return 'master', [0], int(words[1])
+    if command == 'scene':
+        if len(words) > 2 or words[1:] not in ([], ['bulk'], ['each']):
+            raise ValueError("usage: scene [bulk|each]")
+        return 'scene', [0], words[1:] != ['each']
+    if command not in TRACK_COMMANDS:
+        raise ValueError(f"unknown command '{command}'")
+    if len(words) != 3:
+        raise ValueError(f"usage: {command} <tracks> <value>")
+    limits = TRACK_COMMANDS[command]
+    if limits is None:
+        if words[2] not in SWITCH_VALUES:
+            raise ValueError(f"{command} takes on/off, got '{words[2]}'")
+        value = SWITCH_VALUES[words[2]]
+    else:
+        value = int(words[2])
+        if not limits[0] <= value <= limits[1]:
+            raise ValueError(f"{command} value must be {limits[0]}..{limits[1]}, got {value}")
+    return command, parse_tracks(words[1], tracks), value
+
+
+def summarize(timeline: List[Event]) -> Dict[str, object]:
+    return {
+        'events': len(timeline),
+        'duration': timeline[-1][0] if timeline else 0.0,
+        'commands': dict(Counter(event[1] for event in timeline)),
+    }
+
+
+def bind(simulator, timeline: List[Event]) -> List[Tuple[float, object, int, object]]:
+    """Resolve each event's command to the simulator method that sends it"""
+    scene = [dict(DEFAULT_TRACK) for _ in range(simulator.first_track, simulator.last_track + 1)]
+    handlers = {
+        'vol': simulator.send_track_volume,
+        'pan': simulator.send_track_pan,
+        'mute': simulator.send_track_mute,
+        'solo': simulator.send_track_solo,
+        'posx': simulator.send_position_x,
+        'posy': simulator.send_position_y,
+        'master': lambda _, value: simulator.send_master_volume(value),
+        'scene': lambda _, bulk: simulator.send_scene(scene, 100, bulk),
+    }
+    return [(when, handlers[command], track, value) for when, command, track, value in timeline]
+
+
+def run_timeline(simulator, timeline: List[Event], fast: bool = False) -> Dict[str, float]:
+    """Send a compiled timeline through the simulator, back to back (fast) or on schedule"""
+    bound = bind(simulator, timeline)
+    started = time.perf_counter()
+    report: Dict[str, float] = {'events': len(bound)}
+    if fast:
+        for _, send, track, value in bound:
+            send(track, value)
+    else:
+        def send_group(events):
+            for _, send, track, value in events:
+                send(track, value)
+
+        # One callback per timestamp: events that share a time go out back to back
+        scheduler = SendScheduler(simulator.clock)
+        start = simulator.clock.monotonic() + START_LEAD
+        for when, events in itertools.groupby(bound, key=itemgetter(0)):
+            scheduler.call_at(start + when, send_group, list(events))
+        scheduler.run()
+        report.update(scheduler.report())
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a batch script and summarize its timeline")
+    parser.add_argument('script', help="Script file ('-' for stdin)")
+    args = parser.parse_args()
+
+    try:
+        with (sys.stdin if args.script == '-' else open(args.script, encoding='utf-8')) as script:
+            summary = summarize(compile_script(script.read()))
+    except (OSError, ScriptError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"✓ {summary['events']} events, the last at {summary['duration']:.3f} s")
+    for command, count in sorted(summary['commands'].items()):
+        print(f"  {command:<8} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Cascaded Console Simulator
+
+Simulates several Yamaha 02R96 consoles cascaded into one desk (48 input
+channels each) to load the Processing sketch with 96-288 tracks:
+- console k has its own device entry "Yamaha 02R96-k" in data/midi_mapping.json
+  and its own MIDI port of the same name (or an injected output)
+- track numbers continue across consoles: console 2 sends tracks 49-96, ...
+- --udp sends each console's frames as batched MIDI byte-stream datagrams
+  (midi_stream.py) to consecutive UDP ports instead of MIDI ports
+- every console's sends run on one shared scheduler thread (sim_clock.SendScheduler),
+  so the report shows how late frames ran once the wire or the host falls behind
+
+Entries for consoles 2+ are derived from "Yamaha 02R96-1" with --write-mappings:
+the same messages, with trackOffset moved on by 48 per console for the per-track
+mappings. SysEx track bytes stay 00-2F on every console, so their offset is
+carried as a "trackOffset" on the SysEx mapping too.
+
+The load is a sweep: every `rate` Hz, each track gets a fader value and an X/Y
+position moving around a circle (3 messages per track per frame).
+
+Usage:
+    python console_cascade.py --write-mappings 6           # device entries for consoles 2-6
+    python console_cascade.py --tracks 128 --rate 30 --duration 10
+    python console_cascade.py --tracks 96 --udp 127.0.0.1:5004 --din   # ports 5004, 5005
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sim_clock import REAL_CLOCK, SendScheduler
+from sim_metrics import start_metrics_server
+from mapping_cache import MAPPING_FILE, MappingError, load_compiled
+from midi_stream import MidiStreamOut, UdpTransport, parse_address
+from console_core import CONSOLE_TRACKS
+from yamaha_02r96_simulator import YamahaSimulator
+
+CONSOLE_PREFIX = "Yamaha 02R96-"
+BASE_DEVICE = CONSOLE_PREFIX + "1"
+MAX_CONSOLES = 6  # 288 tracks
+# Mappings whose track index moves with the console (the master section does not)
+TRACK_ACTIONS = ('setTrackVolume', 'toggleMute', 'toggleSolo', 'setPan', 'setPositionX', 'setPositionY',
+                 'recallScene')
+
+
+def console_device_name(number: int) -> str:
+    """Device entry and port name of the number-th console (1-based)"""
+    return f"{CONSOLE_PREFIX}{number}"
+
+
+def console_count(tracks: int) -> int:
+    return -(-tracks // CONSOLE_TRACKS)
+
+
+def cascade_mappings(base: List[Dict[str, Any]], number: int) -> List[Dict[str, Any]]:
+    """The base console's mappings, moved to the tracks of the number-th console"""
+    shift = CONSOLE_TRACKS * (number - 1)
+
+    def renumber(text: str) -> str:  # "Faders 25-48" -> "Faders 73-96"
+        return re.sub(r'\b(\d+)-(\d+)\b', lambda m: f"{int(m.group(1)) + shift}-{int(m.group(2)) + shift}", text)
+
+    mappings = []
+    for mapping in base:
+        mapping = copy.deepcopy(mapping)
+        if mapping['action'] in TRACK_ACTIONS:
+            moved = {}
+            for key, value in mapping.items():
+                if key == 'description':
+                    moved['trackOffset'] = mapping.get('trackOffset', 0) + shift
+                    value = renumber(value)
+                elif key == 'name':
+                    value = renumber(value)
+                elif key == 'trackOffset':
+                    continue
+                moved[key] = value
+            moved.setdefault('trackOffset', mapping.get('trackOffset', 0) + shift)
+            mapping = moved
+        mappings.append(mapping)
+    return mappings
+
+
+def format_mapping_json(data: Dict[str, Any]) -> str:
+    """JSON in the mapping file's layout: 2-space indents, lists of numbers or names on one line"""
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    return re.sub(r'\[\s+((?:-?\d+|"\w+")(?:,\s+(?:-?\d+|"\w+"))*)\s+\]',
+                  lambda m: '[' + ', '.join(part.strip() for part in m.group(1).split(',')) + ']', text)
+
+
+def write_cascade_mappings(consoles: int, path: str = MAPPING_FILE) -> List[str]:
+    """Add (or refresh) device entries for consoles 2..consoles, derived from the first console"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    devices = data['devices']
+    base = devices[BASE_DEVICE]['midiMappings']
+    written = []
+    for number in range(2, consoles + 1):
+        name = console_device_name(number)
+        devices[name] = {'midiMappings': cascade_mappings(base, number)}
+        written.append(name)
+    # Keep the consoles together and in order, ahead of the other devices
+    consoles = sorted((name for name in devices if name.startswith(CONSOLE_PREFIX)),
+                      key=lambda name: int(name[len(CONSOLE_PREFIX):]))
+    others = [name for name in devices if not name.startswith(CONSOLE_PREFIX)]
+    data['devices'] = {name: devices[name] for name in consoles + others}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(format_mapping_json(data))
+    return written
+
+
+class ConsoleCascade:
+    """Cascaded consoles (one YamahaSimulator, device entry and port each) on one scheduler"""
+
+    def __init__(self, tracks: int = 96, clock=REAL_CLOCK, midiouts: Optional[List[Any]] = None,
+                 stamp: bool = False, metrics=None):
+        consoles = console_count(tracks)
+        if not 1 <= consoles <= MAX_CONSOLES:
+            raise ValueError(f"tracks must be 1-{MAX_CONSOLES * CONSOLE_TRACKS}, got {tracks}")
+        names = [console_device_name(number) for number in range(1, consoles + 1)]
+        missing = [name for name in names if name not in load_compiled(MAPPING_FILE).devices]
+        if missing:
+            raise MappingError(f"no device entry for {', '.join(missing)} in {MAPPING_FILE} "
+                               f"(run: python console_cascade.py --write-mappings {consoles})")
+
+        self.tracks = tracks
+        self.clock = clock
+        self.scheduler = SendScheduler(clock)
+        self.consoles = [
+            YamahaSimulator(stamp=stamp, verbose=False, clock=clock,
+                            midiout=midiouts[i] if midiouts else None, metrics=metrics,
+                            device=name, first_track=1 + i * CONSOLE_TRACKS)
+            for i, name in enumerate(names)
+        ]
+        if not midiouts:
+            for console in self.consoles:
+                console.connect_to_midi_port()
+        self.sent = 0
+
+    def console_for(self, track: int) -> YamahaSimulator:
+        """The console that owns a track number (1-based, counted across the cascade)"""
+        if not 1 <= track <= self.tracks:
+            raise ValueError(f"track must be 1-{self.tracks}, got {track}")
+        return self.consoles[(track - 1) // CONSOLE_TRACKS]
+
+    def send_frame(self, console: YamahaSimulator, frame: int, rate: float):
+        """One sweep frame for every track of a console: fader, then X/Y position"""
+        seconds = frame / rate
+        last = min(console.last_track, self.tracks)
+        for track in range(console.first_track, last + 1):
+            phase = 2 * math.pi * (0.25 * seconds + track / self.tracks)
+            console.send_track_volume(track, int(63.5 + 63.5 * math.sin(phase)))
+            console.send_position_x(track, round(63 * math.cos(phase)))
+            console.send_position_y(track, round(63 * math.sin(phase)))
+        self.sent += 3 * (last - console.first_track + 1)
+        flush = getattr(console.midiout, 'flush', None)
+        if flush:
+            flush()  # byte-stream outputs: one batch of datagrams per frame
+
+    def schedule_sweep(self, rate: float, duration: float):
+        """Queue `rate` frames per second for `duration` seconds on every console"""
+        start = self.clock.monotonic()
+        for frame in range(int(duration * rate)):
+            for console in self.consoles:
+                self.scheduler.call_at(start + frame / rate, self.send_frame, console, frame, rate)
+
+    def run_sweep(self, rate: float, duration: float) -> Dict[str, float]:
+        """Run a sweep on the shared scheduler and summarize it"""
+        self.schedule_sweep(rate, duration)
+        sent_before, started = self.sent, self.clock.monotonic()
+        self.scheduler.run()
+        elapsed = self.clock.monotonic() - started
+        sent = self.sent - sent_before
+        return {
+            'tracks': self.tracks,
+            'consoles': len(self.consoles),
+            'messages': sent,
+            'seconds': elapsed,
+            'rate': sent / elapsed if elapsed > 0 else 0.0,
+            'mean_late_ms': self.scheduler.mean_late * 1000,
+            'p99_late_ms': self.scheduler.late_percentile(99) * 1000,
+            'max_late_ms': self.scheduler.max_late * 1000,
+        }
+
+    def close(self):
+        for console in self.consoles:
+            console.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascaded Yamaha 02R96 consoles (96-288 tracks)")
+    parser.add_argument("--tracks", type=int, default=96, help="Tracks across the cascade (48 per console)")
+    parser.add_argument("--rate", type=float, default=30.0, help="Sweep frames per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Sweep length in seconds")
+    parser.add_argument("--stamp", action="store_true",
+                        help="Follow every message with a sequence/timestamp SysEx")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve live Prometheus metrics on this local port")
+    parser.add_argument("--udp", type=parse_address, metavar="HOST:PORT",
+                        help="Send MIDI byte-stream datagrams, console k to PORT + k - 1, instead of MIDI ports")
+    parser.add_argument("--din", action="store_true",
+                        help="Pace each console's byte stream at the DIN MIDI rate (31.25 kbaud)")
+    parser.add_argument("--write-mappings", type=int, metavar="CONSOLES",
+                        help="Write device entries for consoles 2..CONSOLES into the mapping file and exit")
+    args = parser.parse_args()
+
+    if args.write_mappings:
+        for name in write_cascade_mappings(args.write_mappings):
+            print(f"✓ Wrote device entry: {name}")
+        return
+
+    metrics = start_metrics_server(args.metrics_port) if args.metrics_port else None
+    try:
+        midiouts = None
+        if args.udp:
+            host, port = args.udp
+            midiouts = [MidiStreamOut(UdpTransport(host, port + i), autoflush=False, din_pacing=args.din)
+                        for i in range(console_count(args.tracks))]
+        cascade = ConsoleCascade(args.tracks, midiouts=midiouts, stamp=args.stamp, metrics=metrics)
+    except (MappingError, ValueError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"🎹 {len(cascade.consoles)} cascaded consoles, {args.tracks} tracks, "
+          f"{args.rate:g} frames/s for {args.duration:g} s")
+    try:
+        started = time.perf_counter()
+        report = cascade.run_sweep(args.rate, args.duration)
+        print(f"✓ {report['messages']} messages in {time.perf_counter() - started:.2f} s "
+              f"({report['rate']:.0f} msg/s), frames late by {report['mean_late_ms']:.2f} ms on average, "
+              f"{report['p99_late_ms']:.2f} ms at p99, {report['max_late_ms']:.2f} ms at worst")
+    except KeyboardInterrupt:
+        print("\n⏹️ Stopping cascade...")
+    finally:
+        cascade.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Console Core
+
+The front-end-independent part of the 02R96 simulators, shared by the CLI
+(yamaha_02r96_simulator.py), the GUI (yamaha_02r96_simulator_gui_v2.py) and
+headless tools:
+- ConsoleEncoder: control changes -> CC/SysEx messages through the compiled
+  mapping tables (position, solo and scene encodings included)
+- the mapping loader (mapping_cache.load_device) and byte-stream transports
+  (midi_stream), re-exported here
+- MIDI port helpers (create, open, reopen, check) for rtmidi-style outputs
+
+Importing this module loads no GUI toolkit and no MIDI backend, and opens no
+port: python-rtmidi is imported by create_midi_output() on first use, and
+tkinter only by the GUI front end.
+
+Usage (encode a few controls without any MIDI port):
+    python console_core.py
+"""
+
+import argparse
+import os
+import sys
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+# The mapping loader and byte-stream transports, re-exported for front ends and headless tools
+from mapping_cache import MAPPING_FILE, CompiledDevice, MappingError, load_device
+from midi_stream import CaptureTransport, MidiStreamOut, StreamTransport, UdpTransport, parse_address
+from scene_sysex import DEFAULT_TRACK, encode_scene
+
+CONSOLE_TRACKS = 48  # input channels per console
+TOGGLE_ACTIONS = ("toggleMute", "toggleSolo")  # every change matters, never replaced by a later one
+LOOPMIDI_PATTERNS = ("Yamaha", "02R96", "loopMIDI")  # port names worth trying when none matches exactly
+
+# (message, control): the bytes to send, and the address of the setting they change
+# (e.g. ("setTrackVolume", 5)) so later changes of the same control can supersede them
+Encoded = Tuple[List[int], Hashable]
+
+
+class EncodeError(ValueError):
+    """A control change the mapping cannot express (bad track, no mapping for the action)"""
+
+
+def encode_position(value: int) -> List[int]:
+    """Position value (-63 to +63) as the console's 4-byte format"""
+    # Format: 00 00 00 00 = origin, 00 00 00 3F = +63, 7F 7F 7F 7F = -1, 7F 7F 7F 41 = -63
+    if value >= 0:
+        # Positive values: 00 00 00 XX (where XX = 0 to 63)
+        return [0x00, 0x00, 0x00, min(value, 63)]
+    # Negative values: 7F 7F 7F XX (where XX descends from 7F for -1 to 41 for -63)
+    abs_value = min(abs(value), 63)  # Clamp to valid range
+    return [0x7F, 0x7F, 0x7F, 0x7F - abs_value + 1]
+
+
+class ConsoleEncoder:
+    """Builds one console's messages from its compiled mapping tables
+
+    table can be swapped at any time (mapping hot reload): each message reads
+    it once, so it is built from the old or the new tables, never a mix.
+    """
+
+    def __init__(self, table: CompiledDevice, first_track: int = 1):
+        self.table = table
+        # Cascaded consoles continue the track numbering from first_track
+        self.first_track = first_track
+        self.last_track = first_track + CONSOLE_TRACKS - 1
+
+    def check_track(self, track: int):
+        if not (self.first_track <= track <= self.last_track):
+            raise EncodeError(f"Invalid track number: {track} (must be {self.first_track}-{self.last_track})")
+
+    def track_cc(self, action: str, track: int, value: int) -> Encoded:
+        """A per-track Control Change on the channel/controller the mapping assigns"""
+        self.check_track(track)
+        target = self.table.cc_output(action, track - 1)
+        if target is None:
+            raise EncodeError(f"No {action} mapping for track {track}")
+        return [0xB0 + target[0], target[1], value], (action, track)
+
+    def track_sysex(self, action: str, track: int, data: List[int]) -> Encoded:
+        """A per-track SysEx: the mapping's leading bytes, the track byte, then data"""
+        self.check_track(track)
+        output = self.table.sysex_output(action)
+        track_byte = track - 1 - output[1] if output else -1  # 00-2F on every console
+        if output is None or not output[2] <= track_byte <= output[3]:
+            raise EncodeError(f"No {action} mapping for track {track}")
+        return list(output[0]) + [track_byte] + data, (action, track)
+
+    def track_volume(self, track: int, value: int) -> Encoded:
+        # Tracks 1-24 on channel 0, 25-48 on channel 1, controllers 1-24
+        return self.track_cc("setTrackVolume", track, value)
+
+    def master_volume(self, value: int) -> Encoded:
+        # Master fader on channel 1, controller 30
+        target = self.table.cc_output("setMasterVolume", 0)
+        if target is None:
+            raise EncodeError("No setMasterVolume mapping")
+        return [0xB0 + target[0], target[1], value], ("setMasterVolume",)
+
+    def track_mute(self, track: int, muted: bool) -> Encoded:
+        # Tracks 1-24 on channel 1, 25-48 on channel 2, controllers 40-63
+        return self.track_cc("toggleMute", track, 127 if muted else 0)
+
+    def track_solo(self, track: int, solo: bool) -> Encoded:
+        # SysEx pattern: F0 43 10 3E 0B 03 2E 00 [track] 00 00 00 [value] F7
+        return self.track_sysex("toggleSolo", track, [0x00, 0x00, 0x00, 1 if solo else 0, 0xF7])
+
+    def track_pan(self, track: int, value: int) -> Encoded:
+        # Tracks 1-24 on channel 0, 25-48 on channel 1, controllers 89-112
+        return self.track_cc("setPan", track, value)
+
+    def position_x(self, track: int, value: int) -> Encoded:
+        # SysEx pattern: F0 43 10 3E 7F 01 25 05 [track] [b1] [b2] [b3] [b4] F7
+        return self.track_sysex("setPositionX", track, encode_position(value) + [0xF7])
+
+    def position_y(self, track: int, value: int) -> Encoded:
+        # SysEx pattern: F0 43 10 3E 7F 01 25 06 [track] [b1] [b2] [b3] [b4] F7
+        return self.track_sysex("setPositionY", track, encode_position(value) + [0xF7])
+
+    def scene(self, tracks: List[Dict[str, Any]], master: int) -> Encoded:
+        """One bulk scene frame (scene_sysex.py) for consecutive tracks from first_track"""
+        output = self.table.scene_output("recallScene")
+        if output is None:
+            raise EncodeError("No recallScene mapping")
+        prefix, offset, fields = output
+        return encode_scene(tracks, master, self.first_track - 1 - offset, prefix, fields), \
+            ("recallScene", self.first_track)
+
+
+def create_midi_output():
+    """A new rtmidi.MidiOut (python-rtmidi is imported here, on first use)"""
+    try:
+        import rtmidi
+    except ImportError:
+        raise ImportError("python-rtmidi is required: pip install python-rtmidi") from None
+    return rtmidi.MidiOut()
+
+
+def find_port(ports: Sequence[str], port_name: str, patterns: Sequence[str] = ()) -> Optional[int]:
+    """Index of the first port containing port_name, else of the first containing any pattern"""
+    for names in ((port_name,), patterns):
+        for i, port in enumerate(ports):
+            if any(name in port for name in names):
+                return i
+    return None
+
+
+def open_existing_port(midiout, port_name: str, patterns: Sequence[str] = ()) -> Optional[str]:
+    """Open an existing port (e.g. loopMIDI) by name; the opened port's name, or None"""
+    ports = midiout.get_ports()
+    index = find_port(ports, port_name, patterns)
+    if index is None:
+        return None
+    midiout.open_port(index)
+    return ports[index]
+
+
+def reopen_port(midiout, port_name: str, port_label: Optional[str]) -> Optional[str]:
+    """Close and reopen a port that went away; the reopened port's name, or None if it is not back"""
+    try:
+        midiout.close_port()
+    except Exception:
+        pass
+    for i, port in enumerate(midiout.get_ports()):
+        if port == (port_label or port_name) or port_name in port:
+            midiout.open_port(i)
+            return port
+    return None
+
+
+def port_present(midiout, port_label: Optional[str]) -> bool:
+    """False once an opened port is missing from the port list (virtual ports cannot go away)"""
+    return port_label is None or port_label in midiout.get_ports()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode a few controls through the mapping, without a MIDI port")
+    parser.add_argument('--device', default="Yamaha 02R96-1", help="Device entry in midi_mapping.json")
+    parser.add_argument('--first-track', type=int, default=1, help="First track of the console")
+    args = parser.parse_args()
+
+    encoder = ConsoleEncoder(load_device(args.device, MAPPING_FILE), args.first_track)
+    track = args.first_track
+    for name, (message, control) in (("volume", encoder.track_volume(track, 100)),
+                                     ("mute", encoder.track_mute(track, True)),
+                                     ("solo", encoder.track_solo(track, True)),
+                                     ("pan", encoder.track_pan(track, 32)),
+                                     ("position x", encoder.position_x(track, -20)),
+                                     ("master", encoder.master_volume(110))):
+        print(f"{name:<11} {str(control):<26} {' '.join(f'{b:02X}' for b in message)}")
+    frame, _ = encoder.scene([dict(DEFAULT_TRACK) for _ in range(CONSOLE_TRACKS)], 100)
+    print(f"{'scene':<11} {len(frame)}-byte bulk frame")
+
+
+if __name__ == "__main__":
+    main()
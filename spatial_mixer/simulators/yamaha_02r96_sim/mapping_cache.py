@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+MIDI Mapping Cache
+
+Compiles data/midi_mapping.json into validated lookup tables and caches them in
+a compact binary file next to the JSON (midi_mapping.json.cache), so simulator
+startup skips parsing the whole file and building tables:
+- cc:     flat int16 table indexed by (channel << 7 | controller), holding
+          (mapping index, track index) pairs, -1 where nothing is mapped
+- sysex:  fixed leading bytes of each pattern/prefix -> candidate mappings,
+          checked against the remaining byte ranges (or suffix)
+- outputs: the reverse direction for the simulators, action -> track index ->
+          (channel, controller) for CC, and action -> (leading bytes, trackOffset,
+          track byte range) of the first SysEx pattern that carries a track byte
+- scenes: "sysexScene" entries (bulk scene frames, scene_sysex.py) match by
+          prefix and F7 like prefix/suffix SysEx, and give the simulators
+          action -> (prefix, trackOffset, field list)
+
+Track indices follow MidiMappingManager.pde: controller - first controller +
+trackOffset for CC, and the first variable byte of a SysEx pattern (plus its
+optional trackOffset, used by cascaded consoles past the first). When two
+CC banks reach the same track (e.g. Pan 1-24 runs to controller 118, into the
+tracks of Pan 25-48), the bank with the larger trackOffset sends it; on a tie
+the first one in the file does.
+
+The cache header holds a BLAKE2 hash of the JSON bytes plus the interpreter's
+cache tag and byte order, so any edit to the JSON (or a different Python)
+rebuilds it; a CRC over the tables catches a damaged file. Each device is
+stored as its own compressed marshal blob and only unpacked when that device
+is asked for, so large multi-device files cost little more than one hash of
+the JSON. Paths resolve from this module, not the working directory.
+
+Usage:
+    python mapping_cache.py                 # build/refresh the cache and summarize it
+    python mapping_cache.py --no-cache      # validate and compile without touching the cache
+"""
+
+import argparse
+import array
+import hashlib
+import json
+import marshal
+import os
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+MAPPING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'midi_mapping.json')
+CACHE_SUFFIX = '.cache'
+CACHE_MAGIC = b'MMC4'
+# marshal is interpreter-specific and the CC table uses native byte order
+CACHE_TAG = f"{sys.implementation.cache_tag or 'python'}-{sys.byteorder}".encode('ascii')
+DIGEST_SIZE = 16
+
+CC_KEYS = 16 << 7  # channel << 7 | controller
+
+REQUIRED_KEYS = ('type', 'name', 'parameter', 'action')
+SCENE_FIELDS = ('volume', 'pan', 'switches', 'positionX', 'positionY')  # one byte per track each
+
+
+class MappingError(ValueError):
+    """A mapping entry that the sketch would reject or misread"""
+
+
+def parse_hex_bytes(text: str) -> bytes:
+    """Parse space separated hex bytes like 'F0 43 10'"""
+    return bytes(int(token, 16) for token in text.split())
+
+
+def parse_pattern(pattern: str) -> List[Tuple[int, int]]:
+    """Split a SysEx pattern like 'F0 43 [00-2F] F7' into (low, high) byte ranges"""
+    ranges = []
+    for token in pattern.split():
+        if token.startswith('[') and token.endswith(']'):
+            low, high = (int(part, 16) for part in token[1:-1].split('-'))
+        else:
+            low = high = int(token, 16)
+        if not 0 <= low <= high <= 0xFF:
+            raise ValueError(f"bad byte range '{token}'")
+        ranges.append((low, high))
+    return ranges
+
+
+def _check_range(value, low: int, high: int, what: str) -> Tuple[int, int]:
+    if (not isinstance(value, list) or len(value) != 2 or not all(isinstance(v, int) for v in value)
+            or not low <= value[0] <= value[1] <= high):
+        raise ValueError(f"{what} must be [first, last] within {low}-{high}, got {value!r}")
+    return value[0], value[1]
+
+
+def _track_offset(mapping: Dict[str, Any]) -> int:
+    offset = mapping.get('trackOffset', 0)
+    if not isinstance(offset, int):
+        raise ValueError(f"trackOffset must be an integer, got {offset!r}")
+    return offset
+
+
+def compile_device(mappings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Validate one device's midiMappings and build its lookup tables"""
+    cc = array.array('h', [-1]) * (2 * CC_KEYS)
+    sysex: Dict[bytes, List[Tuple[int, int, Any, Any, int]]] = {}
+    cc_out: Dict[str, Dict[int, Tuple[int, int]]] = {}
+    cc_out_offsets: Dict[Tuple[str, int], int] = {}
+    sysex_out: Dict[str, Tuple[bytes, int, int, int]] = {}
+    scene_out: Dict[str, Tuple[bytes, int, Tuple[str, ...]]] = {}
+    for index, mapping in enumerate(mappings):
+        label = f"mapping {index} ('{mapping.get('name', '?')}')"
+        try:
+            missing = [key for key in REQUIRED_KEYS if key not in mapping]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+
+            if mapping['type'] == 'cc':
+                channel = mapping.get('channel')
+                if not isinstance(channel, int) or not 0 <= channel <= 15:
+                    raise ValueError(f"channel must be 0-15, got {channel!r}")
+                first, last = _check_range(mapping.get('controllerRange'), 0, 127, "controllerRange")
+                if 'valueRange' in mapping:
+                    _check_range(mapping['valueRange'], 0, 127, "valueRange")
+                offset = _track_offset(mapping)
+                for controller in range(first, last + 1):
+                    slot = 2 * ((channel << 7) | controller)
+                    if cc[slot] >= 0:
+                        other = mappings[cc[slot]].get('name')
+                        raise ValueError(f"channel {channel} controller {controller} already mapped by '{other}'")
+                    track = controller - first + offset
+                    cc[slot], cc[slot + 1] = index, track
+                    key = (mapping['action'], track)
+                    if key not in cc_out_offsets or offset > cc_out_offsets[key]:
+                        cc_out_offsets[key] = offset
+                        cc_out.setdefault(mapping['action'], {})[track] = (channel, controller)
+
+            elif mapping['type'] == 'sysex':
+                offset = _track_offset(mapping)
+                if 'pattern' in mapping:
+                    ranges = parse_pattern(mapping['pattern'])
+                    fixed = 0
+                    while fixed < len(ranges) and ranges[fixed][0] == ranges[fixed][1]:
+                        fixed += 1
+                    if fixed == 0:
+                        raise ValueError("pattern must start with a fixed byte")
+                    prefix = bytes(low for low, _ in ranges[:fixed])
+                    # Entry: (mapping index, track byte position, remaining ranges, suffix, trackOffset)
+                    track_position = fixed if fixed < len(ranges) else -1
+                    entry = (index, track_position, tuple(ranges[fixed:]), None, offset)
+                    if track_position >= 0:
+                        sysex_out.setdefault(mapping['action'], (prefix, offset) + ranges[fixed])
+                elif 'prefix' in mapping and 'suffix' in mapping:
+                    prefix = parse_hex_bytes(mapping['prefix'])
+                    if not prefix:
+                        raise ValueError("prefix must not be empty")
+                    entry = (index, -1, None, parse_hex_bytes(mapping['suffix']), offset)
+                else:
+                    raise ValueError("SysEx mappings need a pattern, or a prefix and suffix")
+                sysex.setdefault(prefix, []).append(entry)
+
+            elif mapping['type'] == 'sysexScene':
+                prefix = parse_hex_bytes(mapping.get('prefix', ''))
+                if not prefix or prefix[0] != 0xF0:
+                    raise ValueError("scene prefix must start with F0")
+                fields = mapping.get('fields')
+                if (not isinstance(fields, list) or not fields or len(set(fields)) != len(fields)
+                        or not set(fields) <= set(SCENE_FIELDS)):
+                    raise ValueError(f"fields must be distinct names from {', '.join(SCENE_FIELDS)}, got {fields!r}")
+                offset = _track_offset(mapping)
+                sysex.setdefault(prefix, []).append((index, -1, None, b'\xF7', offset))
+                scene_out.setdefault(mapping['action'], (prefix, offset, tuple(fields)))
+
+            else:
+                raise ValueError(f"unknown type '{mapping['type']}'")
+        except ValueError as e:
+            raise MappingError(f"{label}: {e}") from None
+
+    return {
+        'mappings': mappings,
+        'cc': cc,
+        'sysex': sysex,
+        'prefix_lengths': sorted({len(prefix) for prefix in sysex}, reverse=True),
+        'cc_out': cc_out,
+        'sysex_out': sysex_out,
+        'scene_out': scene_out,
+    }
+
+
+def pack_device(tables: Dict[str, Any]) -> bytes:
+    """Serialize one device's tables (mappings kept as JSON, parsed only on use)"""
+    return zlib.compress(marshal.dumps({
+        'mappings': json.dumps(tables['mappings']).encode('utf-8'),
+        'cc': tables['cc'].tobytes(),
+        'sysex': tables['sysex'],
+        'prefix_lengths': tables['prefix_lengths'],
+        'cc_out': tables['cc_out'],
+        'sysex_out': tables['sysex_out'],
+        'scene_out': tables['scene_out'],
+    }))
+
+
+def unpack_device(blob: bytes) -> Dict[str, Any]:
+    tables = marshal.loads(zlib.decompress(blob))
+    cc = array.array('h')
+    cc.frombytes(tables['cc'])
+    tables['cc'] = cc
+    tables['mappings'] = json.loads(tables['mappings'])
+    return tables
+
+
+def compile_mappings(data: Dict[str, Any]) -> Dict[str, bytes]:
+    """Validate and compile every device of a parsed midi_mapping.json into packed tables"""
+    devices = {}
+    for name, device in data.get('devices', {}).items():
+        try:
+            devices[name] = pack_device(compile_device(device['midiMappings']))
+        except KeyError:
+            raise MappingError(f"device '{name}': missing midiMappings") from None
+        except MappingError as e:
+            raise MappingError(f"device '{name}' {e}") from None
+    return devices
+
+
+class CompiledDevice:
+    """Lookup tables for one device"""
+
+    def __init__(self, name: str, tables: Dict[str, Any]):
+        self.name = name
+        self.mappings: List[Dict[str, Any]] = tables['mappings']
+        self.cc: array.array = tables['cc']
+        self.sysex: Dict[bytes, List[Tuple[int, int, Any, Any, int]]] = tables['sysex']
+        self.prefix_lengths: List[int] = tables['prefix_lengths']
+        self.cc_out: Dict[str, Dict[int, Tuple[int, int]]] = tables['cc_out']
+        self.sysex_out: Dict[str, Tuple[bytes, int, int, int]] = tables['sysex_out']
+        self.scene_out: Dict[str, Tuple[bytes, int, Tuple[str, ...]]] = tables['scene_out']
+
+    @classmethod
+    def empty(cls, name: str) -> 'CompiledDevice':
+        return cls(name, {'mappings': [], 'cc': array.array('h', [-1]) * (2 * CC_KEYS),
+                          'sysex': {}, 'prefix_lengths': [], 'cc_out': {}, 'sysex_out': {},
+                          'scene_out': {}})
+
+    def resolve_cc(self, channel: int, controller: int) -> Optional[Tuple[Dict[str, Any], int]]:
+        """(mapping, track index) for a Control Change, or None"""
+        slot = 2 * ((channel << 7) | controller)
+        index = self.cc[slot]
+        if index < 0:
+            return None
+        return self.mappings[index], self.cc[slot + 1]
+
+    def cc_output(self, action: str, track: int) -> Optional[Tuple[int, int]]:
+        """(channel, controller) that sends an action for a track index, or None"""
+        return self.cc_out.get(action, {}).get(track)
+
+    def sysex_output(self, action: str) -> Optional[Tuple[bytes, int, int, int]]:
+        """(leading bytes up to the track byte, trackOffset, lowest and highest track byte)
+        of the SysEx that sends an action, or None"""
+        return self.sysex_out.get(action)
+
+    def scene_output(self, action: str) -> Optional[Tuple[bytes, int, Tuple[str, ...]]]:
+        """(prefix, trackOffset, per-track fields) of the bulk scene frame for an action, or None"""
+        return self.scene_out.get(action)
+
+    def resolve_sysex(self, data) -> List[Tuple[Dict[str, Any], Optional[int]]]:
+        """Every (mapping, track index or None) whose pattern or prefix/suffix matches"""
+        data = bytes(data)
+        matches = []
+        for length in self.prefix_lengths:
+            for index, track_position, ranges, suffix, offset in self.sysex.get(data[:length], ()):
+                if ranges is not None:
+                    rest = data[length:]
+                    if len(rest) != len(ranges) or not all(lo <= b <= hi for b, (lo, hi) in zip(rest, ranges)):
+                        continue
+                elif not data.endswith(suffix):
+                    continue
+                track = data[track_position] + offset if track_position >= 0 else None
+                matches.append((self.mappings[index], track))
+        return matches
+
+
+class CompiledMappings:
+    """All devices of a mapping file (packed), and whether they came from the cache"""
+
+    def __init__(self, devices: Dict[str, bytes], from_cache: bool):
+        self.devices = devices
+        self.from_cache = from_cache
+
+    def device(self, name: str) -> CompiledDevice:
+        if name not in self.devices:
+            raise MappingError(f"no device '{name}' (available: {', '.join(self.devices)})")
+        return CompiledDevice(name, unpack_device(self.devices[name]))
+
+
+def cache_path(path: str = MAPPING_FILE) -> str:
+    return path + CACHE_SUFFIX
+
+
+def _cache_header(digest: bytes) -> bytes:
+    return CACHE_MAGIC + bytes([len(CACHE_TAG)]) + CACHE_TAG + digest
+
+
+def load_compiled(path: str = MAPPING_FILE, use_cache: bool = True) -> CompiledMappings:
+    """Load compiled mappings, from the cache when it matches the JSON content"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    header = _cache_header(hashlib.blake2b(raw, digest_size=DIGEST_SIZE).digest())
+
+    if use_cache:
+        try:
+            with open(cache_path(path), 'rb') as f:
+                cached = f.read()
+            # Header, then a CRC of the payload so a damaged file is never trusted
+            payload = cached[len(header) + 4:]
+            if (cached.startswith(header)
+                    and cached[len(header):len(header) + 4] == zlib.crc32(payload).to_bytes(4, 'little')):
+                return CompiledMappings(marshal.loads(payload), from_cache=True)
+        except (OSError, ValueError, EOFError, TypeError):
+            pass  # missing or unreadable cache: rebuild below
+
+    devices = compile_mappings(json.loads(raw))
+    if use_cache:
+        # Write-then-rename, so a concurrent launch never reads a partial cache
+        temporary = f"{cache_path(path)}.{os.getpid()}.tmp"
+        try:
+            payload = marshal.dumps(devices)
+            with open(temporary, 'wb') as f:
+                f.write(header + zlib.crc32(payload).to_bytes(4, 'little') + payload)
+            os.replace(temporary, cache_path(path))
+        except (OSError, ValueError) as e:
+            # Read-only install, full disk, ...: a cache that cannot be written never stops startup
+            print(f"⚠️ Mapping cache not written ({e}), running uncached")
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass  # never created
+    return CompiledMappings(devices, from_cache=False)
+
+
+def load_device(name: str, path: str = MAPPING_FILE) -> CompiledDevice:
+    """Compiled lookup tables for one device of the mapping file"""
+    return load_compiled(path).device(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and compile midi_mapping.json into its cache")
+    parser.add_argument('path', nargs='?', default=MAPPING_FILE, help="Mapping JSON file")
+    parser.add_argument('--no-cache', action='store_true', help="Compile without reading or writing the cache")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        compiled = load_compiled(args.path, use_cache=not args.no_cache)
+    except MappingError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    source = "cache" if compiled.from_cache else "JSON"
+    print(f"✓ Loaded {len(compiled.devices)} device(s) from {source} in {elapsed:.2f} ms")
+    for name in compiled.devices:
+        device = compiled.device(name)
+        print(f"  {name}: {len(device.mappings)} mappings, {sum(i >= 0 for i in device.cc[::2])} CC keys, "
+              f"{sum(len(entries) for entries in device.sysex.values())} SysEx entries")
+    if not args.no_cache:
+        print(f"  Cache: {cache_path(args.path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+MIDI Mapping Watcher
+
+Hot reload for data/midi_mapping.json: a daemon thread polls the file's
+modification time and size, and when an edit has settled (the same new
+signature on two consecutive polls, so a half-saved file is not read) it
+compiles the device's tables through mapping_cache.py and hands the finished
+CompiledDevice to a callback.
+
+Everything slow happens on the watcher thread. The simulators install the new
+tables with a single attribute assignment and every send reads that attribute
+once, so a send in flight never waits on a reload and never sees a half-built
+table: it uses either the old tables or the new ones. A file that fails to
+parse or validate is reported and the previous tables stay in use.
+
+Usage (print what a running simulator would pick up):
+    python mapping_watcher.py
+    python mapping_watcher.py --device "MPK mk3" --interval 0.2
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from mapping_cache import MAPPING_FILE, CompiledDevice, load_device
+
+POLL_INTERVAL = 0.5  # seconds between checks of the mapping file
+
+
+class MappingWatcher:
+    """Polls a mapping file and passes freshly compiled device tables to on_reload"""
+
+    def __init__(self, device_name: str, on_reload: Callable[[CompiledDevice], None],
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 path: str = MAPPING_FILE, interval: float = POLL_INTERVAL):
+        self.device_name = device_name
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.path = path
+        self.interval = interval
+        self.signature = self.stat()  # the version the caller already loaded
+        self.pending: Optional[Tuple[int, int]] = None
+        self.reloads = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="mapping-watcher", daemon=True)
+
+    def stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return None  # missing, or mid-rename by an editor
+        return info.st_mtime_ns, info.st_size
+
+    def poll(self) -> bool:
+        """Check the file once; reload if an edit has settled. True when new tables were installed"""
+        signature = self.stat()
+        if signature is None or signature == self.signature:
+            self.pending = None
+            return False
+        if signature != self.pending:
+            self.pending = signature  # changed since the last poll: wait for the write to finish
+            return False
+
+        self.signature, self.pending = signature, None
+        try:
+            device = load_device(self.device_name, self.path)
+        except (OSError, ValueError) as e:  # ValueError covers MappingError and bad JSON
+            if self.on_error:
+                self.on_error(e)
+            return False
+        self.reloads += 1
+        self.on_reload(device)
+        return True
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:  # a callback failing must not end hot reload
+                if self.on_error:
+                    self.on_error(e)
+
+    def start(self) -> 'MappingWatcher':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch midi_mapping.json and report reloads")
+    parser.add_argument('path', nargs='?', default=MAPPING_FILE, help="Mapping JSON file")
+    parser.add_argument('--device', default="Yamaha 02R96-1", help="Device entry to compile")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Seconds between polls")
+    args = parser.parse_args()
+
+    def reloaded(device: CompiledDevice):
+        print(f"✓ Reloaded {len(device.mappings)} mappings for {device.name}")
+
+    def failed(error: Exception):
+        print(f"✗ Mapping reload failed, keeping previous mappings: {error}")
+
+    watcher = MappingWatcher(args.device, reloaded, failed, args.path, args.interval).start()
+    print(f"Watching {args.path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+MIDI Output Queue
+
+One sender thread between the GUI and the MIDI port. Callers (usually the Tk
+main thread) submit messages and return at once; the sender thread makes the
+actual port calls, so a slow port or transport never stalls the UI.
+
+The queue is keyed by control, e.g. (track, action):
+- continuous controls (faders, pans, positions) keep only their newest value:
+  a value submitted while an older one for the same key is still waiting
+  replaces it in place (counted as `replaced`), so a slider drag against a
+  slow port costs one pending entry per control instead of one per step
+- toggles (mute, solo) and manual messages are submitted without a key and
+  are never replaced or dropped; they go out in submission order. Only if
+  max_toggles of them are waiting does submit() block until the sender
+  catches up, so memory stays bounded even then
+
+Pending entries therefore never exceed the number of distinct controls plus
+max_toggles. depth, max_depth, replaced, sent and errors are plain counters
+for the GUI's status line.
+
+Usage (slider sweeps into a port that takes 1 ms per message):
+    python midi_output.py
+    python midi_output.py --port-ms 5 --steps 200
+"""
+
+import argparse
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+MAX_TOGGLES = 1024  # unkeyed messages waiting before submit() blocks
+
+
+class MidiOutputQueue:
+    """Latest-value-wins send queue drained by one sender thread"""
+
+    def __init__(self, transmit: Callable[[Any], None], max_toggles: int = MAX_TOGGLES):
+        self.transmit = transmit              # called on the sender thread, one item at a time
+        self.max_toggles = max_toggles
+        self.pending: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.toggles = 0                      # unkeyed entries in pending
+        self.sequence = itertools.count()     # unique keys for unkeyed entries
+        self.busy = False                     # the sender thread is inside transmit()
+        self.closed = False
+        self.condition = threading.Condition()
+
+        self.max_depth = 0
+        self.replaced = 0                     # values overwritten by a newer one before they were sent
+        self.sent = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self.run, name="midi-output", daemon=True)
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def submit(self, item: Any, key: Optional[Hashable] = None):
+        """Queue an item; with a key, replace any value still waiting under that key"""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("MIDI output queue is closed")
+            if key is not None:
+                key = ('value', key)
+                if key in self.pending:
+                    self.replaced += 1  # keeps its place in line, sends the newer value
+                self.pending[key] = item
+            else:
+                while self.toggles >= self.max_toggles and not self.closed:
+                    self.condition.wait()  # backpressure: toggles are never dropped
+                self.pending[('toggle', next(self.sequence))] = item
+                self.toggles += 1
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return  # closed and drained
+                key, item = self.pending.popitem(last=False)
+                if key[0] == 'toggle':
+                    self.toggles -= 1
+                self.busy = True
+                self.condition.notify_all()
+            try:
+                self.transmit(item)  # outside the lock: submit() never waits on the port
+                self.sent += 1
+            except Exception:
+                self.errors += 1
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def start(self) -> 'MidiOutputQueue':
+        self.thread.start()
+        return self
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far has been sent. False on timeout"""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Send what is still waiting, then stop the sender thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slider sweeps through the MIDI output queue into a slow port")
+    parser.add_argument('--port-ms', type=float, default=1.0, help="Milliseconds the port takes per message")
+    parser.add_argument('--steps', type=int, default=100, help="Values per fader sweep")
+    parser.add_argument('--tracks', type=int, default=48, help="Faders swept at once")
+    args = parser.parse_args()
+
+    def slow_port(item):
+        time.sleep(args.port_ms / 1000)
+
+    output = MidiOutputQueue(slow_port).start()
+    started = time.perf_counter()
+    for value in range(args.steps):
+        for track in range(1, args.tracks + 1):
+            output.submit((track, value), key=(track, 'setTrackVolume'))
+        output.submit(('toggleMute', value))
+    submitted = time.perf_counter() - started
+    output.flush()
+    drained = time.perf_counter() - started
+    output.close()
+
+    total = args.steps * (args.tracks + 1)
+    print(f"✓ {total} submits in {submitted * 1000:.1f} ms ({submitted / total * 1e6:.1f} us each)")
+    print(f"  sent {output.sent}, replaced {output.replaced}, max depth {output.max_depth}, "
+          f"drained after {drained * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+MIDI Byte-Stream Output
+
+Frames simulator messages as a raw MIDI byte stream for transports without
+message boundaries of their own, such as MIDI over UDP or an emulated serial
+DIN link. MidiStreamOut stands in for rtmidi.MidiOut (send_message), so it can
+be injected into YamahaSimulator like any other output:
+- running status: consecutive channel messages with the same status byte
+  (e.g. a fader burst on one channel) drop the repeated status byte
+- batching: messages collect in a buffer and go out on flush(), many per
+  datagram; a datagram never splits a message and always starts with a full
+  status byte, so a lost datagram cannot corrupt the next one
+- DIN pacing (optional): a write waits until the previous one would have left
+  a 31.25 kbaud wire (10 bits per byte, 320 us), and the output reports how
+  far the backlog ran behind
+
+Real-time bytes (F8-FF) pass through without touching running status; SysEx
+and system common messages cancel it, as on a real wire.
+
+Usage (wire time of typical bursts from the simulator, in virtual time):
+    python midi_stream.py
+    python midi_stream.py --udp 127.0.0.1:5004      # also send the bursts as UDP datagrams
+"""
+
+import argparse
+import os
+import socket
+import sys
+from typing import Callable, List, Optional, Tuple
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sim_clock import REAL_CLOCK, VirtualClock
+
+DIN_BAUD = 31250
+DIN_BYTE_SECONDS = 10 / DIN_BAUD  # start bit + 8 data bits + stop bit
+MAX_DATAGRAM = 1024               # bytes per UDP datagram (well under a typical MTU)
+
+
+class UdpTransport:
+    """Datagram transport: each write is one UDP packet"""
+
+    datagram = True
+
+    def __init__(self, host: str, port: int):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def write(self, data: bytes):
+        self.sock.sendto(data, self.address)
+
+    def close(self):
+        self.sock.close()
+
+
+class StreamTransport:
+    """Byte-stream transport over a binary file object (serial device, pty, pipe)"""
+
+    datagram = False
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+class MidiStreamOut:
+    """rtmidi.MidiOut stand-in that writes a running-status byte stream to a transport"""
+
+    def __init__(self, transport, running_status: bool = True, autoflush: bool = True,
+                 din_pacing: bool = False, max_datagram: int = MAX_DATAGRAM, clock=REAL_CLOCK):
+        self.transport = transport
+        self.running_status = running_status
+        self.autoflush = autoflush      # flush after every message (interactive use)
+        self.din_pacing = din_pacing
+        self.max_datagram = max_datagram
+        self.clock = clock
+        # Datagrams restart running status; a continuous stream carries it over writes
+        self.datagram = getattr(transport, 'datagram', True)
+
+        self.buffer = bytearray()
+        self.cuts: List[int] = []        # buffer offsets where a new datagram starts
+        self.status = 0                  # current running status (0: none)
+        self.wire_free_at = 0.0          # when the paced wire finishes the previous write
+
+        self.messages = 0
+        self.bytes = 0
+        self.writes = 0
+        self.saved = 0                   # status bytes left out thanks to running status
+        self.max_backlog = 0.0           # seconds a paced write waited for the wire
+
+    def send_message(self, message):
+        """Queue one complete MIDI message (a list of bytes, as for rtmidi)"""
+        status = message[0]
+        start = self.cuts[-1] if self.cuts else 0
+        if self.datagram and len(self.buffer) > start and len(self.buffer) - start + len(message) > self.max_datagram:
+            # Start the next datagram here, with a full status byte
+            self.cuts.append(len(self.buffer))
+            self.status = 0
+        if status >= 0xF8:
+            self.buffer.append(status)  # real-time: may go anywhere, leaves running status alone
+        elif status >= 0xF0:
+            self.status = 0  # SysEx and system common cancel running status
+            self.buffer += bytes(message)
+        elif self.running_status and status == self.status:
+            self.buffer += bytes(message[1:])
+            self.saved += 1
+        else:
+            self.status = status if self.running_status else 0
+            self.buffer += bytes(message)
+        self.messages += 1
+        if self.autoflush:
+            self.flush()
+
+    def flush(self):
+        """Write everything queued, as few datagrams as the size limit allows"""
+        if not self.buffer:
+            return
+        data, cuts = bytes(self.buffer), [0] + self.cuts + [len(self.buffer)]
+        self.buffer.clear()
+        self.cuts = []
+        if self.datagram:
+            self.status = 0  # the next datagram starts with a full status byte
+        for start, end in zip(cuts, cuts[1:]):
+            self.write(data[start:end])
+
+    def write(self, data: bytes):
+        if self.din_pacing:
+            wait = self.wire_free_at - self.clock.monotonic()
+            if wait > 0:
+                self.max_backlog = max(self.max_backlog, wait)
+                self.clock.sleep(wait)
+            self.wire_free_at = self.clock.monotonic() + len(data) * DIN_BYTE_SECONDS
+        self.transport.write(data)
+        self.bytes += len(data)
+        self.writes += 1
+
+    def get_ports(self) -> List[str]:
+        return []
+
+    def close_port(self):
+        self.flush()
+        self.transport.close()
+
+
+class CaptureTransport:
+    """Transport that keeps every write, with the clock time it happened"""
+
+    def __init__(self, clock=REAL_CLOCK, datagram: bool = True):
+        self.clock = clock
+        self.datagram = datagram
+        self.writes: List[Tuple[float, bytes]] = []
+
+    def write(self, data: bytes):
+        self.writes.append((self.clock.monotonic(), data))
+
+    def close(self):
+        pass
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    """'host:port' -> (host, port)"""
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def burst_report(name: str, burst: Callable, running_status: bool, udp: Optional[Tuple[str, int]] = None):
+    """Frame one burst from the simulator on a paced DIN wire (virtual time) and print its cost"""
+    from yamaha_02r96_simulator import YamahaSimulator
+
+    clock = VirtualClock()
+    transport = UdpTransport(*udp) if udp else CaptureTransport(clock)
+    output = MidiStreamOut(transport, running_status=running_status, autoflush=False, din_pacing=True, clock=clock)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=output)
+    burst(simulator)
+    output.flush()
+    wire = output.bytes * DIN_BYTE_SECONDS
+    print(f"  {name:<34} {'on ' if running_status else 'off'}  {output.messages:5d} msgs "
+          f"{output.bytes:6d} bytes {output.writes:3d} datagrams  {wire * 1000:8.1f} ms on a DIN wire")
+    output.close_port()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wire cost of simulator bursts as a MIDI byte stream")
+    parser.add_argument("--udp", type=parse_address, metavar="HOST:PORT",
+                        help="Also send the framed bursts as UDP datagrams")
+    args = parser.parse_args()
+
+    bursts = [
+        ("48 faders", lambda sim: [sim.send_track_volume(t, 100) for t in range(1, 49)]),
+        ("24 faders x 10 steps (one bank)", lambda sim: [sim.send_track_volume(t, v)
+                                                         for v in range(10) for t in range(1, 25)]),
+        ("48 pans", lambda sim: [sim.send_track_pan(t, 64) for t in range(1, 49)]),
+        ("48 X/Y positions", lambda sim: [(sim.send_position_x(t, 10), sim.send_position_y(t, -10))
+                                          for t in range(1, 49)]),
+    ]
+    print(f"MIDI byte stream at {DIN_BAUD} baud ({DIN_BYTE_SECONDS * 1e6:.0f} us per byte), running status:")
+    for name, burst in bursts:
+        for running_status in (False, True):
+            burst_report(name, burst, running_status, args.udp)
+
+
+if __name__ == "__main__":
+    main()
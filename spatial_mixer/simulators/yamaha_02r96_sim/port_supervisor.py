@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+MIDI Port Supervisor
+
+Keeps a simulator's MIDI output usable when the port goes away (loopMIDI
+restarted, driver hiccup, device unplugged):
+- loss is detected when a send raises, or when a background check no longer
+  finds the port in the output's port list
+- reconnection is retried with exponential backoff (0.1 s doubling to 5 s)
+- while the port is gone, sends are not queued: each control's latest message
+  goes into a state table keyed by its address (CC: status byte and
+  controller; SysEx: the caller's key, e.g. (action, track))
+- after reconnecting, only the controls whose held message differs from what
+  the port last received are sent, in the order of their last change, so a fader moved 200 times during the
+  outage costs one message, and one moved back to where it was costs none
+
+Usage (simulate a port that drops out while faders keep moving):
+    python port_supervisor.py
+"""
+
+import argparse
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sim_clock import REAL_CLOCK, VirtualClock
+
+MIN_BACKOFF = 0.1     # seconds before the first reconnection attempt
+MAX_BACKOFF = 5.0     # longest wait between attempts
+CHECK_INTERVAL = 0.5  # seconds between port list checks while connected
+
+
+def control_key(message: List[int], key: Optional[Hashable] = None) -> Hashable:
+    """The address a message sets: later messages to the same address supersede it"""
+    if key is not None:
+        return key
+    if 0xB0 <= message[0] <= 0xBF:
+        return message[0], message[1]
+    return tuple(message)
+
+
+class PortSupervisor:
+    """Detects port loss, reconnects with backoff and resyncs the controls that changed
+
+    transmit and reconnect run while the lock is held (so a resync never
+    interleaves with a send) and must not wait on other threads. on_event is
+    always called after the lock is released, from whichever thread noticed
+    the change (output thread, supervisor thread, or a poll() caller).
+    """
+
+    def __init__(self, transmit: Callable[[List[int]], None], reconnect: Callable[[], bool],
+                 port_present: Callable[[], bool] = lambda: True, clock=REAL_CLOCK,
+                 on_event: Optional[Callable[[str], None]] = None, connected: bool = True,
+                 min_backoff: float = MIN_BACKOFF, max_backoff: float = MAX_BACKOFF,
+                 interval: float = CHECK_INTERVAL):
+        self.transmit = transmit          # sends one message; raises if the port is gone
+        self.reconnect = reconnect        # reopens the port; True on success
+        self.port_present = port_present  # cheap check that the port still exists
+        self.clock = clock
+        self.on_event = on_event or (lambda text: None)
+        self.connected = connected
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.interval = interval
+
+        self.sent: Dict[Hashable, List[int]] = {}                  # what the port last received, per control
+        self.held: 'OrderedDict[Hashable, List[int]]' = OrderedDict()  # latest change per control while offline
+        self.backoff = min_backoff
+        self.next_attempt = clock.monotonic() + min_backoff
+        self.lock = threading.RLock()
+
+        self.outages = 0
+        self.attempts = 0
+        self.held_messages = 0            # sends that went into the state table
+        self.resent = 0                   # messages sent by resyncs
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="port-supervisor", daemon=True)
+
+    def send(self, message: List[int], key: Optional[Hashable] = None) -> bool:
+        """Send now, or hold the control's latest value until the port is back. True if sent"""
+        key = control_key(message, key)
+        event = None
+        with self.lock:
+            if self.connected:
+                try:
+                    self.transmit(message)
+                    self.sent[key] = message
+                    return True
+                except Exception as e:
+                    event = self._lose(f"send failed: {e}")
+            self.held[key] = message
+            self.held.move_to_end(key)
+            self.held_messages += 1
+        if event:
+            self.on_event(event)
+        return False
+
+    def port_lost(self, reason: str):
+        event = self._lose(reason)
+        if event:
+            self.on_event(event)
+
+    def _lose(self, reason: str) -> Optional[str]:
+        """Mark the port lost; the event to report (None if it already was)"""
+        with self.lock:
+            if not self.connected:
+                return None
+            self.connected = False
+            self.outages += 1
+            self.backoff = self.min_backoff
+            self.next_attempt = self.clock.monotonic() + self.backoff
+        return f"✗ MIDI port lost ({reason}), holding changes until it is back"
+
+    def diff(self) -> List[Tuple[Hashable, List[int]]]:
+        """Held controls whose value differs from what the port last received"""
+        with self.lock:
+            return [(key, message) for key, message in self.held.items() if self.sent.get(key) != message]
+
+    def poll(self):
+        """Check the port once, or try to reconnect once the backoff has passed"""
+        if self.connected:
+            if not self.port_present():
+                self.port_lost("port disappeared")
+            return
+        if self.clock.monotonic() < self.next_attempt:
+            return
+        with self.lock:
+            if self.connected:
+                return
+            self.attempts += 1
+            try:
+                ok = self.reconnect()
+            except Exception:
+                ok = False
+            if not ok:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self.next_attempt = self.clock.monotonic() + self.backoff
+                return
+            self.connected = True
+            changes = self.diff()
+            try:
+                for key, message in changes:
+                    self.transmit(message)
+                    self.sent[key] = message
+                    del self.held[key]
+                    self.resent += 1
+            except Exception as e:
+                event = self._lose(f"resync failed: {e}")  # the rest stays held for the next attempt
+            else:
+                skipped = len(self.held)
+                self.held.clear()
+                event = (f"✓ MIDI port reconnected, resynced {len(changes)} controls"
+                         f"{f' ({skipped} unchanged)' if skipped else ''}")
+        if event:
+            self.on_event(event)
+
+    def retry_now(self):
+        """Skip the remaining backoff (e.g. a Reconnect button)"""
+        with self.lock:
+            self.next_attempt = self.clock.monotonic()
+
+    def run(self):
+        while True:
+            wait = self.interval
+            if not self.connected:
+                wait = min(wait, max(0.0, self.next_attempt - self.clock.monotonic()))
+            if self.stopped.wait(wait):
+                return
+            try:
+                self.poll()
+            except Exception as e:  # a broken port list must not end supervision
+                self.on_event(f"✗ MIDI port check failed: {e}")
+
+    def start(self) -> 'PortSupervisor':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+
+
+class FlakyMidiOut:
+    """Stand-in MIDI output whose port can be unplugged and plugged back in"""
+
+    def __init__(self, clock=REAL_CLOCK, port_name: str = "Yamaha 02R96-1 1"):
+        self.clock = clock
+        self.port_name = port_name
+        self.present = True
+        self.is_open = False
+        self.messages: List[Tuple[float, List[int]]] = []
+
+    def get_ports(self) -> List[str]:
+        return [self.port_name] if self.present else []
+
+    def open_port(self, index: int = 0):
+        if not self.present:
+            raise OSError("port not found")
+        self.is_open = True
+
+    def close_port(self):
+        self.is_open = False
+
+    def send_message(self, message):
+        if not (self.present and self.is_open):
+            raise OSError("port is closed")
+        self.messages.append((self.clock.monotonic(), list(message)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a MIDI port outage and the resync after it")
+    parser.add_argument('--outage', type=float, default=3.0, help="Seconds the port is gone")
+    parser.add_argument('--rate', type=float, default=100.0, help="Fader updates per second during the outage")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from yamaha_02r96_simulator import YamahaSimulator
+
+    clock = VirtualClock()
+    midiout = FlakyMidiOut(clock)
+    midiout.open_port(0)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+    for track in range(1, 49):
+        simulator.send_track_volume(track, 100)
+    simulator.send_track_mute(3, False)
+    before = len(midiout.messages)
+
+    midiout.present = False
+    steps = int(args.outage * args.rate)
+    for step in range(steps):
+        clock.sleep(1 / args.rate)
+        simulator.send_track_volume(1 + step % 8, step % 128)  # 8 faders ride during the outage
+        simulator.send_track_mute(3, (steps - step) % 2 == 0)  # toggled back and forth, ends unmuted
+        simulator.supervisor.poll()
+    midiout.present = True
+    while not simulator.supervisor.connected:
+        clock.sleep(0.05)
+        simulator.supervisor.poll()
+
+    supervisor = simulator.supervisor
+    print(f"{steps * 2} changes during a {args.outage:g} s outage, {supervisor.attempts} reconnection attempts")
+    print(f"✓ Resync sent {len(midiout.messages) - before} messages "
+          f"(held {supervisor.held_messages}), back {clock.monotonic() - args.outage:.2f} s after the port returned")
+
+
+if __name__ == "__main__":
+    main()
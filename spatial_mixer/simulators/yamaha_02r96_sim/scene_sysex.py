@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Bulk Scene SysEx
+
+One SysEx frame that carries a whole-mixer scene (volume, pan, mute, solo
+and X/Y position for every track of a console) instead of one CC or SysEx
+per parameter. Recalling a 48-track scene parameter by parameter takes 289
+messages (2.4 kB with running status, 0.77 s on a DIN wire); the frame is
+249 bytes (80 ms) and parses about 9x faster on the receiving side.
+
+Frame layout (every byte after F0 is 7-bit, so it is legal SysEx as is):
+
+    F0 7D 02 01        prefix: non-commercial ID, scene frame, format version 1
+    tt                 first track byte (00-2F; the mapping's trackOffset applies, as for solo/position)
+    nn                 track count (01-30)
+    mm                 master volume (00-7F)
+    nn x fields        one byte per field per track, in the mapping's "fields" order:
+                         volume, pan     00-7F
+                         switches        bit 0 mute, bit 1 solo
+                         positionX/Y     position + 40h (-63..+63 -> 01-7F)
+    cc                 checksum: the low 7 bits of tt..last field plus cc are zero
+    F7
+
+The matching midi_mapping.json entry has type "sysexScene", the prefix and the
+field list, so the frame can be extended (or fields reordered) without
+changing the decoder:
+
+    {"type": "sysexScene", "name": "Scene 1-48", "parameter": "scene",
+     "prefix": "F0 7D 02 01", "fields": ["volume", "pan", "switches", "positionX", "positionY"],
+     "action": "recallScene", ...}
+
+decode_scene() is the reference decoder for receivers (the Processing sketch
+does not read this entry type yet and skips it as an unknown type).
+
+Usage (recall cost, per-parameter messages vs one bulk frame):
+    python scene_sysex.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# Shared simulator tooling (sim_clock.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from mapping_cache import SCENE_FIELDS, load_device
+
+SCENE_PREFIX = (0xF0, 0x7D, 0x02, 0x01)
+MUTE_BIT = 0x01
+SOLO_BIT = 0x02
+POSITION_BIAS = 0x40
+
+# One track of a scene, as the simulators hold it
+DEFAULT_TRACK = {'volume': 100, 'pan': 64, 'mute': False, 'solo': False, 'x': 0, 'y': 0}
+
+
+def _clamp_position(value: int) -> int:
+    return max(-63, min(63, value))
+
+
+def _clamp_level(value: int) -> int:
+    return max(0, min(127, value))
+
+
+def encode_field(field: str, track: Dict) -> int:
+    if field == 'volume':
+        return _clamp_level(track['volume'])
+    if field == 'pan':
+        return _clamp_level(track['pan'])
+    if field == 'switches':
+        return (MUTE_BIT if track['mute'] else 0) | (SOLO_BIT if track['solo'] else 0)
+    if field == 'positionX':
+        return _clamp_position(track['x']) + POSITION_BIAS
+    if field == 'positionY':
+        return _clamp_position(track['y']) + POSITION_BIAS
+    raise ValueError(f"unknown scene field '{field}' (choose from: {', '.join(SCENE_FIELDS)})")
+
+
+def decode_field(field: str, value: int, track: Dict):
+    if field == 'switches':
+        track['mute'] = bool(value & MUTE_BIT)
+        track['solo'] = bool(value & SOLO_BIT)
+    elif field in ('positionX', 'positionY'):
+        track['x' if field == 'positionX' else 'y'] = value - POSITION_BIAS
+    else:
+        track[field] = value
+
+
+def checksum(data: Sequence[int]) -> int:
+    """Byte that brings the 7-bit sum of data to zero (Roland-style)"""
+    return -sum(data) & 0x7F
+
+
+def encode_scene(tracks: List[Dict], master: int, first_track: int = 0,
+                 prefix: Sequence[int] = SCENE_PREFIX, fields: Sequence[str] = SCENE_FIELDS) -> List[int]:
+    """Build the scene frame for consecutive tracks starting at track byte first_track"""
+    if not 1 <= len(tracks) <= 0x30 or not 0 <= first_track <= 0x2F:
+        raise ValueError(f"a scene frame holds 1-48 tracks from track byte 00-2F, "
+                         f"got {len(tracks)} from {first_track:02X}")
+    body = [first_track, len(tracks), _clamp_level(master)]
+    for track in tracks:
+        body += [encode_field(field, track) for field in fields]
+    return [*prefix, *body, checksum(body), 0xF7]
+
+
+def decode_scene(data, prefix: Sequence[int] = SCENE_PREFIX,
+                 fields: Sequence[str] = SCENE_FIELDS) -> Tuple[int, int, List[Dict]]:
+    """(first track byte, master volume, track states) of a scene frame; ValueError if it is damaged"""
+    data = bytes(data)
+    start = len(prefix)
+    if data[:start] != bytes(prefix) or len(data) < start + 5 or data[-1] != 0xF7:
+        raise ValueError("not a scene frame")
+    first_track, count, master = data[start:start + 3]
+    width = len(fields)
+    end = start + 3 + count * width
+    if len(data) != end + 2:
+        raise ValueError(f"scene frame for {count} tracks must be {end + 2} bytes, got {len(data)}")
+    if sum(data[start:end + 1]) & 0x7F:
+        raise ValueError("scene frame checksum mismatch")
+    tracks = []
+    for offset in range(start + 3, end, width):
+        track = dict(DEFAULT_TRACK)
+        for field, value in zip(fields, data[offset:offset + width]):
+            decode_field(field, value, track)
+        tracks.append(track)
+    return first_track, master, tracks
+
+
+def recall_report(tracks: int = 48):
+    """Bytes, DIN wire time and receiver parse cost of one scene recall, both ways"""
+    from midi_parser import MappingCheck, MidiParser
+    from midi_stream import DIN_BYTE_SECONDS, CaptureTransport, MidiStreamOut
+    from sim_clock import VirtualClock
+    from yamaha_02r96_simulator import YamahaSimulator
+
+    device = load_device("Yamaha 02R96-1")
+    _, _, scene_fields = device.scene_output('recallScene')
+    scene = [dict(DEFAULT_TRACK, volume=90 + n % 10, pan=n * 2, mute=n % 5 == 0, x=n - 24, y=24 - n)
+             for n in range(tracks)]
+    print(f"Recall of a {tracks}-track scene:")
+    for bulk in (False, True):
+        clock = VirtualClock()
+        transport = CaptureTransport(clock, datagram=False)
+        output = MidiStreamOut(transport, din_pacing=True, clock=clock)
+        simulator = YamahaSimulator(verbose=False, clock=clock, midiout=output)
+        simulator.send_scene(scene, 100, bulk=bulk)
+        stream = b''.join(data for _, data in transport.writes)
+
+        repeats = 200
+        started = time.perf_counter()
+        for _ in range(repeats):
+            events = MidiParser().feed(stream)
+            resolved = MappingCheck(device).check(events)
+            if bulk:
+                for event, _, _ in resolved:
+                    decode_scene(event[1], fields=scene_fields)
+        parse_us = (time.perf_counter() - started) / repeats * 1e6
+        print(f"  {'bulk frame' if bulk else 'per parameter':<14} {output.messages:4d} msgs {output.bytes:5d} bytes "
+              f"{output.bytes * DIN_BYTE_SECONDS * 1000:7.1f} ms on a DIN wire  {parse_us:8.1f} us to parse and resolve")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a scene recall as per-parameter messages and as one bulk frame")
+    parser.add_argument('--tracks', type=int, default=48, help="Tracks in the scene (1-48)")
+    args = parser.parse_args()
+    recall_report(args.tracks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for batch scripts (compile once, run fast or on schedule)
+
+Usage:
+    python -m pytest test_batch_script.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from batch_script import ScriptError, compile_script, run_timeline, summarize
+from sim_clock import RecordingMidiOut, VirtualClock
+from yamaha_02r96_simulator import YamahaSimulator
+
+SCRIPT = """
+# ride two faders while the rest sit at unity
+vol * 100
+mute 3,5-6 on
+repeat 3
+  vol 1-2 0      # both faders down
+  wait 100ms
+  repeat 2
+    pan 1 0
+    wait .05s
+  end
+end
+scene
+"""
+
+
+def test_ranges_broadcasts_and_loops_unroll_in_time_order():
+    timeline = compile_script(SCRIPT)
+    assert timeline[:48] == [(0.0, 'vol', track, 100) for track in range(1, 49)]
+    assert [event[2] for event in timeline[48:51]] == [3, 5, 6]
+    loop = timeline[51:-1]
+    assert len(loop) == 3 * (2 + 2)
+    assert [round(event[0], 3) for event in loop[:4]] == [0.0, 0.0, 0.1, 0.15]
+    assert timeline[-1] == (pytest.approx(0.6), 'scene', 0, True)
+    assert summarize(timeline)['commands'] == {'vol': 54, 'mute': 3, 'pan': 6, 'scene': 1}
+
+
+def test_errors_name_the_line():
+    for script, line in (("vol 1 100\nvol 49 100", 2),
+                         ("pan 1 128", 1),
+                         ("\nmute 1 maybe", 2),
+                         ("wait 5 minutes", 1),
+                         ("repeat 2\nvol 1 0", 1),
+                         ("end", 1),
+                         ("fade 1 0", 1)):
+        with pytest.raises(ScriptError, match=f"^line {line}:"):
+            compile_script(script)
+    assert compile_script("vol 49-96 0", range(49, 97))[0] == (0.0, 'vol', 49, 0)  # a cascaded console
+
+
+def test_huge_loops_are_errors_not_hangs():
+    with pytest.raises(ScriptError, match="^line 2: .* loop passes"):
+        compile_script("vol 1 0\nrepeat 1000000000\nwait 1\nend")  # only waits: never reaches MAX_EVENTS
+    with pytest.raises(ScriptError, match="^line 2: .* loop passes"):
+        compile_script("repeat 100000\nrepeat 100000\nend\nend")
+
+
+def test_scheduled_run_follows_the_timeline():
+    clock = VirtualClock()
+    midiout = RecordingMidiOut(clock)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+    report = run_timeline(simulator, compile_script("repeat 4\nvol 1 10\nwait 250ms\nend\nsolo 2 on"))
+
+    start = midiout.messages[0][0]
+    assert [round(t - start, 3) for t, _ in midiout.messages] == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert midiout.messages[-1][1][8] == 0x01  # solo SysEx for track byte 01
+    assert report['events'] == 5 and report['ran'] == 5 and report['max_late_ms'] == 0
+
+
+def test_fast_run_ignores_waits():
+    clock = VirtualClock()
+    midiout = RecordingMidiOut(clock)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+    run_timeline(simulator, compile_script("repeat 100\nvol * 64\nwait 1\nend"), fast=True)
+    assert len(midiout.messages) == 4800 and clock.monotonic() == 0.0
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the cascaded console simulator
+
+Usage:
+    python -m pytest test_console_cascade.py
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from console_cascade import ConsoleCascade, format_mapping_json, write_cascade_mappings
+from mapping_cache import MAPPING_FILE, load_device
+from sim_clock import RecordingMidiOut, VirtualClock
+
+
+def make_cascade(tracks):
+    clock = VirtualClock()
+    midiouts = [RecordingMidiOut(clock) for _ in range(-(-tracks // 48))]
+    return ConsoleCascade(tracks, clock=clock, midiouts=midiouts), midiouts
+
+
+def resolved_tracks(console, midiout):
+    """(action, track number) of every recorded message, read back through the console's device entry"""
+    device = load_device(console.device)
+    resolved = []
+    for _, message in midiout.messages:
+        if message[0] == 0xF0:
+            (mapping, track), = device.resolve_sysex(message)
+        else:
+            mapping, track = device.resolve_cc(message[0] & 0x0F, message[1])
+        resolved.append((mapping['action'], track + 1))
+    return resolved
+
+
+def test_tracks_continue_across_consoles():
+    cascade, midiouts = make_cascade(96)
+    for track in (1, 48, 49, 73, 96):
+        cascade.console_for(track).send_track_volume(track, 100)
+        cascade.console_for(track).send_track_solo(track, True)
+    cascade.consoles[1].send_track_pan(48, 64)  # console 1's track on console 2: rejected
+
+    assert [message for _, message in midiouts[1].messages[:2]] == [
+        [0xB0, 1, 100], [0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00, 0x00, 0x00, 0x00, 0x00, 0x01, 0xF7]]
+    assert resolved_tracks(cascade.consoles[0], midiouts[0]) == [
+        ('setTrackVolume', 1), ('toggleSolo', 1), ('setTrackVolume', 48), ('toggleSolo', 48)]
+    assert resolved_tracks(cascade.consoles[1], midiouts[1]) == [
+        ('setTrackVolume', 49), ('toggleSolo', 49), ('setTrackVolume', 73), ('toggleSolo', 73),
+        ('setTrackVolume', 96), ('toggleSolo', 96)]
+    with pytest.raises(ValueError):
+        cascade.console_for(97)
+
+
+def test_sweep_runs_every_console_on_one_timeline():
+    cascade, midiouts = make_cascade(256)
+    report = cascade.run_sweep(rate=30, duration=1)
+
+    assert report['consoles'] == 6 and report['messages'] == 256 * 3 * 30
+    assert sum(len(midiout.messages) for midiout in midiouts) == report['messages']
+    assert len(midiouts[5].messages) == (256 - 5 * 48) * 3 * 30  # the last console is partly used
+    assert report['max_late_ms'] == 0  # virtual time: sends cost nothing
+    assert {midiout.messages[-1][0] for midiout in midiouts} == {29 / 30}
+
+    for console, midiout in zip(cascade.consoles, midiouts):
+        tracks = {track for _, track in resolved_tracks(console, midiout)}
+        assert tracks == set(range(console.first_track, min(console.last_track, 256) + 1))
+
+
+def test_written_entries_round_trip(tmp_path):
+    path = str(tmp_path / "midi_mapping.json")
+    shutil.copy(MAPPING_FILE, path)
+    with open(path) as f:
+        original = f.read()
+    assert format_mapping_json(json.loads(original)) == original
+
+    assert write_cascade_mappings(6, path) == [f"Yamaha 02R96-{n}" for n in range(2, 7)]
+    with open(path) as f:
+        assert f.read() == original  # the committed entries are up to date
+    device = load_device("Yamaha 02R96-3", path)
+    assert device.cc_output('setTrackVolume', 96) == (0, 1)
+    assert device.cc_output('setMasterVolume', 0) == (1, 30)  # the master section is per console
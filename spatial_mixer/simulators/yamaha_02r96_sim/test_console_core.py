@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the importable console core (encoders without a front end or port)
+
+Usage:
+    python -m pytest test_console_core.py
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+from console_core import ConsoleEncoder, EncodeError, load_device
+from port_supervisor import FlakyMidiOut
+from yamaha_02r96_simulator import YamahaSimulator
+
+IMPORT_CHECK = """
+import sys, time
+sys.path.insert(0, {here!r})
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = sorted(name for name in ('tkinter', 'rtmidi', 'pythonosc', 'http.server') if name in sys.modules)
+print(elapsed, ','.join(loaded))
+"""
+
+
+@pytest.mark.parametrize("module", ["console_core", "yamaha_02r96_simulator"])
+def test_import_loads_no_gui_or_backend(module):
+    result = subprocess.run([sys.executable, "-c", IMPORT_CHECK.format(here=HERE, module=module)],
+                            capture_output=True, text=True, check=True, cwd=HERE)
+    elapsed, loaded = result.stdout.split()[0], result.stdout.split()[1:]
+    assert loaded == []
+    assert float(elapsed) < 0.5  # about 20-40 ms; generous for slow CI hosts
+
+
+def test_encoder_builds_messages_without_a_simulator():
+    encoder = ConsoleEncoder(load_device("Yamaha 02R96-1"))
+    assert encoder.track_volume(25, 100) == ([0xB1, 1, 100], ("setTrackVolume", 25))
+    assert encoder.position_x(1, -1) == ([0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x05, 0x00,
+                                          0x7F, 0x7F, 0x7F, 0x7F, 0xF7], ("setPositionX", 1))
+    with pytest.raises(EncodeError, match="must be 1-48"):
+        encoder.track_pan(49, 64)
+
+    second = ConsoleEncoder(load_device("Yamaha 02R96-2"), first_track=49)
+    message, control = second.track_solo(49, True)
+    assert message[8] == 0x00 and control == ("toggleSolo", 49)  # track bytes restart at 00
+
+
+def test_simulator_opens_no_port_until_asked(capsys):
+    midiout = FlakyMidiOut()
+    simulator = YamahaSimulator(verbose=False)
+    assert simulator.midiout is None and not simulator.connected
+    simulator.send_track_volume(1, 10)  # held until a port is open
+    simulator.send_track_volume(49, 10)
+    assert "Invalid track number: 49" in capsys.readouterr().out
+
+    simulator.midiout = midiout
+    midiout.open_port(0)
+    simulator.connected = True
+    simulator.send_track_volume(2, 20)
+    assert [message for _, message in midiout.messages] == [[0xB0, 2, 20]]
+    assert list(simulator.supervisor.held.values()) == [[0xB0, 1, 10]]
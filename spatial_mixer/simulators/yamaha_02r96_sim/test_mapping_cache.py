@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled MIDI mapping cache
+
+Usage:
+    python -m pytest test_mapping_cache.py
+"""
+
+import copy
+import json
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mapping_cache import MAPPING_FILE, MappingError, cache_path, load_compiled, load_device
+
+DEVICE = "Yamaha 02R96-1"
+MAX_CACHED_LOAD_SECONDS = 0.05
+
+
+@pytest.fixture
+def mapping_file(tmp_path):
+    path = tmp_path / "midi_mapping.json"
+    shutil.copy(MAPPING_FILE, path)
+    return str(path)
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def test_cc_lookup_follows_sketch_track_numbering(mapping_file):
+    device = load_device(DEVICE, mapping_file)
+    assert [(m['action'], track) for m, track in (device.resolve_cc(0, 1), device.resolve_cc(1, 24),
+                                                   device.resolve_cc(1, 30), device.resolve_cc(2, 63))] == [
+        ('setTrackVolume', 0), ('setTrackVolume', 47), ('setMasterVolume', 0), ('toggleMute', 47)]
+    assert device.resolve_cc(5, 1) is None
+
+
+def test_sysex_lookup_by_prefix_and_ranges(mapping_file):
+    device = load_device(DEVICE, mapping_file)
+    solo = [0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00, 0x2F, 0x00, 0x00, 0x00, 0x01, 0xF7]
+    position = [0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x06, 0x04, 0x7F, 0x7F, 0x7F, 0x41, 0xF7]
+    assert [(m['action'], track) for m, track in device.resolve_sysex(solo)] == [('toggleSolo', 47)]
+    assert [(m['action'], track) for m, track in device.resolve_sysex(position)] == [('setPositionY', 4)]
+    assert device.resolve_sysex(solo[:8] + [0x30] + solo[9:]) == []  # track byte out of range
+    assert device.resolve_sysex(solo[:-1]) == []
+
+
+def test_outputs_prefer_the_bank_a_track_starts_in(mapping_file):
+    device = load_device(DEVICE, mapping_file)
+    # Pan 1-24 runs on to controller 118 (tracks 25-30), but Pan 25-48 owns those tracks
+    assert [device.cc_output('setPan', track) for track in (23, 24, 47)] == [(0, 112), (1, 89), (1, 112)]
+    assert device.cc_output('setMasterVolume', 0) == (1, 30)  # Master Fader, not Faders Master Mode
+    assert device.cc_output('setTrackVolume', 48) is None
+    assert device.sysex_output('toggleSolo') == (bytes([0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00]),
+                                                 0, 0x00, 0x2F)
+
+
+def test_cache_is_reused_and_invalidated_by_content(mapping_file):
+    assert not load_compiled(mapping_file).from_cache
+    assert os.path.exists(cache_path(mapping_file))
+    assert load_compiled(mapping_file).from_cache
+
+    with open(mapping_file) as f:
+        data = json.load(f)
+    data["devices"][DEVICE]["midiMappings"][0]["controllerRange"] = [1, 12]
+    write_json(mapping_file, data)
+
+    compiled = load_compiled(mapping_file)
+    assert not compiled.from_cache
+    assert compiled.device(DEVICE).resolve_cc(0, 13) is None
+
+
+def test_corrupt_cache_is_rebuilt(mapping_file):
+    load_compiled(mapping_file)
+    size = os.path.getsize(cache_path(mapping_file))
+    with open(cache_path(mapping_file), 'r+b') as f:
+        f.seek(size // 2)
+        f.write(b'\xff' * 8)
+    compiled = load_compiled(mapping_file)
+    assert not compiled.from_cache
+    assert compiled.device(DEVICE).resolve_cc(0, 1) is not None
+
+
+def test_failed_cache_write_leaves_no_temporary_and_loads(mapping_file, capsys):
+    os.mkdir(cache_path(mapping_file))  # os.replace onto a directory fails
+    compiled = load_compiled(mapping_file)
+    assert not compiled.from_cache
+    assert compiled.device(DEVICE).resolve_cc(0, 1) is not None
+    assert "Mapping cache not written" in capsys.readouterr().out
+    assert [name for name in os.listdir(os.path.dirname(mapping_file)) if name.endswith('.tmp')] == []
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"channel": 16}, "channel must be 0-15"),
+    ({"controllerRange": [24, 1]}, "controllerRange"),
+    ({"controllerRange": [30, 30]}, "controller 30 already mapped by 'Faders 25-48'"),
+    ({"type": "nrpn"}, "unknown type"),
+])
+def test_invalid_mappings_are_rejected(mapping_file, change, message):
+    with open(mapping_file) as f:
+        data = json.load(f)
+    data["devices"][DEVICE]["midiMappings"][1].update(change)  # "Faders 25-48" (channel 1)
+    write_json(mapping_file, data)
+    with pytest.raises(MappingError, match=message):
+        load_compiled(mapping_file)
+
+
+def test_large_multi_device_file_loads_in_milliseconds(tmp_path):
+    with open(MAPPING_FILE) as f:
+        base = json.load(f)["devices"][DEVICE]["midiMappings"]
+    devices = {}
+    for console in range(32):
+        mappings = []
+        for bank in range(4):
+            for mapping in copy.deepcopy(base):
+                if mapping['type'] == 'cc':
+                    mapping['channel'] = (mapping['channel'] + 4 * bank) % 16
+                elif mapping['type'] == 'sysex':
+                    mapping['pattern'] = mapping['pattern'].replace('F0 43', f'F0 {0x10 + bank:02X}', 1)
+                mappings.append(mapping)
+        devices[f"Console {console}"] = {"midiMappings": mappings}
+    path = str(tmp_path / "large.json")
+    write_json(path, {"devices": devices})
+
+    load_compiled(path)
+    started = time.perf_counter()
+    device = load_device("Console 31", path)
+    elapsed = time.perf_counter() - started
+
+    assert len(device.mappings) == 4 * len(base)
+    assert elapsed < MAX_CACHED_LOAD_SECONDS
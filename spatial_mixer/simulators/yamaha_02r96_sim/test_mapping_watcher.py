@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for hot reloading midi_mapping.json into a running simulator
+
+Usage:
+    python -m pytest test_mapping_watcher.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mapping_cache import MAPPING_FILE
+from mapping_watcher import MappingWatcher
+from yamaha_02r96_simulator import YamahaSimulator
+from sim_clock import RecordingMidiOut
+
+DEVICE = "Yamaha 02R96-1"
+
+
+@pytest.fixture
+def mapping_file(tmp_path):
+    path = tmp_path / "midi_mapping.json"
+    shutil.copy(MAPPING_FILE, path)
+    return str(path)
+
+
+@pytest.fixture
+def simulator():
+    return YamahaSimulator(verbose=False, midiout=RecordingMidiOut())
+
+
+def edit_faders(path, controllers, version):
+    """Move 'Faders 1-24' to other controllers; version keeps every edit's mtime distinct"""
+    with open(path) as f:
+        data = json.load(f)
+    data["devices"][DEVICE]["midiMappings"][0]["controllerRange"] = controllers
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    os.utime(path, ns=(version * 10**9, version * 10**9))
+
+
+def test_edit_is_installed_once_it_settles(simulator, mapping_file):
+    watcher = MappingWatcher(DEVICE, simulator.reload_mappings, path=mapping_file)
+    assert not watcher.poll()
+
+    edit_faders(mapping_file, [65, 88], 1)
+    assert not watcher.poll()  # first sighting: the write may still be in progress
+    assert watcher.poll()
+    assert not watcher.poll()
+
+    simulator.send_track_volume(1, 100)
+    simulator.send_track_volume(25, 100)  # other mappings are unchanged
+    assert [message for _, message in simulator.midiout.messages] == [[0xB0, 65, 100], [0xB1, 1, 100]]
+
+
+def test_invalid_edit_keeps_previous_tables(simulator, mapping_file):
+    errors = []
+    watcher = MappingWatcher(DEVICE, simulator.reload_mappings, errors.append, path=mapping_file)
+    previous = simulator.mapping_table
+
+    edit_faders(mapping_file, [89, 112], 1)  # collides with 'Pan 1-24'
+    watcher.poll()
+    assert not watcher.poll()
+    with open(mapping_file, 'a') as f:
+        f.write(',')  # broken JSON
+    watcher.poll()
+    assert not watcher.poll()
+
+    assert [type(e).__name__ for e in errors] == ['MappingError', 'JSONDecodeError']
+    assert simulator.mapping_table is previous
+    simulator.send_track_volume(1, 100)
+    assert simulator.midiout.messages[-1][1] == [0xB0, 1, 100]
+
+
+def test_sends_during_reloads_use_whole_tables(simulator, mapping_file):
+    versions = {1: [1, 24], 2: [65, 88]}
+    watcher = MappingWatcher(DEVICE, simulator.reload_mappings, path=mapping_file, interval=0.001).start()
+    stop = threading.Event()
+
+    def send():
+        while not stop.is_set():
+            simulator.send_track_volume(1, 100)
+            simulator.send_track_volume(24, 100)
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    try:
+        for version in range(2, 12):
+            reloads, deadline = watcher.reloads, time.monotonic() + 5
+            edit_faders(mapping_file, versions[1 + version % 2], version)
+            while watcher.reloads == reloads and time.monotonic() < deadline:
+                stop.wait(0.001)
+    finally:
+        stop.set()
+        sender.join()
+        watcher.stop()
+
+    assert watcher.reloads == 10
+    # Every message comes whole from one version of the tables
+    messages = {tuple(message) for _, message in simulator.midiout.messages}
+    assert messages <= {(0xB0, controller, 100) for controller in (1, 24, 65, 88)}
+    assert (0xB0, 1, 100) in messages and (0xB0, 65, 100) in messages
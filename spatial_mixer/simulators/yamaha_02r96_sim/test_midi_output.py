@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the GUI's MIDI output queue
+
+Usage:
+    python -m pytest test_midi_output.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from midi_output import MidiOutputQueue
+
+
+class GatedPort:
+    """Transmit callback that holds every send until the test opens the gate"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.sent = []
+
+    def __call__(self, item):
+        self.gate.wait(5)
+        self.sent.append(item)
+
+
+def test_newer_values_replace_waiting_ones_and_toggles_all_go_out():
+    port = GatedPort()
+    output = MidiOutputQueue(port).start()
+    output.submit(('volume', 1, -1), key=(1, 'setTrackVolume'))  # in flight, held by the gate
+    deadline = time.monotonic() + 5
+    while output.depth and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    for value in range(100):
+        for track in range(1, 49):
+            output.submit(('volume', track, value), key=(track, 'setTrackVolume'))
+        output.submit(('mute', value))
+    assert output.depth == 48 + 100  # one entry per fader, every toggle
+    port.gate.set()
+    assert output.flush(5)
+    output.close()
+
+    volumes = [item for item in port.sent if item[0] == 'volume']
+    assert volumes[0] == ('volume', 1, -1)
+    assert sorted(volumes[1:]) == [('volume', track, 99) for track in range(1, 49)]
+    assert [item for item in port.sent if item[0] == 'mute'] == [('mute', value) for value in range(100)]
+    assert output.replaced == 48 * 99 and output.sent == 1 + 48 + 100 and output.max_depth == 148
+
+
+def test_submit_does_not_wait_for_a_slow_port():
+    output = MidiOutputQueue(lambda item: time.sleep(0.01)).start()
+    started = time.perf_counter()
+    for value in range(1000):
+        output.submit(value, key='fader')
+    elapsed = time.perf_counter() - started
+    output.close(5)
+
+    assert elapsed < 1.0  # 1000 sends at 10 ms each would take 10 s
+    assert output.depth == 0 and output.sent + output.replaced == 1000
+
+
+def test_toggle_backpressure_and_errors():
+    port = GatedPort()
+    output = MidiOutputQueue(port, max_toggles=4).start()
+    submitter = threading.Thread(target=lambda: [output.submit(n) for n in range(10)])
+    submitter.start()
+    submitter.join(0.2)
+    assert submitter.is_alive() and output.depth <= 4  # blocked, not growing
+    port.gate.set()
+    submitter.join(5)
+    assert output.flush(5)
+    assert port.sent == list(range(10))
+
+    failing = MidiOutputQueue(lambda item: 1 / 0).start()
+    failing.submit('a')
+    failing.submit('b', key='x')
+    assert failing.flush(5)
+    failing.close()
+    assert failing.errors == 2 and failing.sent == 0
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the running-status MIDI byte-stream output
+
+Usage:
+    python -m pytest test_midi_stream.py
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from midi_stream import DIN_BYTE_SECONDS, CaptureTransport, MidiStreamOut, UdpTransport
+from sim_clock import VirtualClock
+from yamaha_02r96_simulator import YamahaSimulator
+
+SOLO = [0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00, 0x00, 0x00, 0x00, 0x00, 0x01, 0xF7]
+
+
+def expand(data):
+    """Reference reader: messages from a byte stream, restoring running status"""
+    messages, status, i = [], 0, 0
+    while i < len(data):
+        byte = data[i]
+        if byte >= 0xF8:
+            messages.append([byte])
+            i += 1
+        elif byte == 0xF0:
+            end = data.index(0xF7, i) + 1
+            messages.append(list(data[i:end]))
+            status, i = 0, end
+        elif byte >= 0x80:
+            status = byte
+            messages.append(list(data[i:i + 3]))
+            i += 3
+        else:
+            assert status, "data byte without running status"
+            messages.append([status] + list(data[i:i + 2]))
+            i += 2
+    return messages
+
+
+def test_running_status_drops_repeated_status_bytes():
+    transport = CaptureTransport()
+    output = MidiStreamOut(transport, autoflush=False)
+    for message in ([0xB0, 1, 10], [0xB0, 2, 20], [0xF8], [0xB0, 3, 30], [0xB1, 1, 10], SOLO, [0xB1, 2, 20]):
+        output.send_message(message)
+    output.flush()
+
+    assert [data for _, data in transport.writes] == [bytes(
+        [0xB0, 1, 10, 2, 20, 0xF8, 3, 30,   # real-time byte keeps running status
+         0xB1, 1, 10] + SOLO +               # new channel: full status
+        [0xB1, 2, 20])]                      # SysEx cancelled running status
+    assert output.saved == 2 and output.messages == 7
+
+
+def test_datagrams_are_bounded_and_stand_alone():
+    transport = CaptureTransport()
+    output = MidiStreamOut(transport, autoflush=False, max_datagram=16)
+    messages = [[0xB0 + channel, controller, 64] for channel in range(2) for controller in range(1, 25)] + [SOLO]
+    for message in messages:
+        output.send_message(message)
+    output.flush()
+
+    datagrams = [data for _, data in transport.writes]
+    assert all(len(data) <= 16 and data[0] >= 0x80 for data in datagrams)
+    assert [message for data in datagrams for message in expand(data)] == messages
+    assert sum(map(len, datagrams)) < 3 * 48 + len(SOLO)
+
+
+def test_stream_keeps_running_status_across_writes():
+    transport = CaptureTransport(datagram=False)
+    output = MidiStreamOut(transport)
+    output.send_message([0xB0, 1, 10])
+    output.send_message([0xB0, 2, 20])
+    assert [data for _, data in transport.writes] == [bytes([0xB0, 1, 10]), bytes([2, 20])]
+
+
+def test_din_pacing_holds_writes_to_the_wire_rate():
+    clock = VirtualClock()
+    output = MidiStreamOut(CaptureTransport(clock, datagram=False), din_pacing=True, clock=clock)
+    simulator = YamahaSimulator(verbose=False, clock=clock, midiout=output)
+    for value in range(100):
+        simulator.send_track_volume(1, value)
+
+    assert output.bytes == 3 + 99 * 2
+    # Every write but the last has to leave the wire first
+    assert clock.monotonic() == pytest.approx((output.bytes - 2) * DIN_BYTE_SECONDS)
+    assert output.max_backlog == pytest.approx(3 * DIN_BYTE_SECONDS)  # behind the first, full message
+
+
+def test_fader_burst_is_one_udp_datagram():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    output = MidiStreamOut(UdpTransport(*receiver.getsockname()), autoflush=False)
+    simulator = YamahaSimulator(verbose=False, midiout=output)
+    try:
+        for track in range(1, 49):
+            simulator.send_track_volume(track, 100)
+        output.flush()
+        datagram = receiver.recv(2048)
+    finally:
+        output.close_port()
+        receiver.close()
+
+    assert len(datagram) == 2 * (3 + 23 * 2)  # one full status per channel (tracks 1-24, 25-48)
+    assert expand(datagram) == [[0xB0, track, 100] for track in range(1, 25)] + \
+        [[0xB1, track, 100] for track in range(1, 25)]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Offline tests for MIDI port loss, reconnection and resync
+
+Usage:
+    python -m pytest test_port_supervisor.py
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from port_supervisor import MAX_BACKOFF, MIN_BACKOFF, FlakyMidiOut, PortSupervisor
+from sim_clock import VirtualClock
+from yamaha_02r96_simulator import YamahaSimulator
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def midiout(clock):
+    midiout = FlakyMidiOut(clock)
+    midiout.open_port(0)
+    return midiout
+
+
+@pytest.fixture
+def simulator(clock, midiout):
+    return YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+
+
+def poll_until_connected(simulator, clock, step=0.01):
+    while not simulator.supervisor.connected:
+        clock.sleep(step)
+        simulator.supervisor.poll()
+
+
+def test_reconnect_sends_only_what_changed(simulator, midiout, clock):
+    for track in range(1, 49):
+        simulator.send_track_volume(track, 100)
+    simulator.send_track_solo(5, False)
+    midiout.present = False
+
+    for value in range(50):
+        simulator.send_track_volume(1 + value % 4, value)  # four faders ride
+        simulator.send_track_solo(5, value % 2 == 0)       # ends where it was: off
+    simulator.send_track_volume(10, 100)                   # unchanged value
+    simulator.send_position_x(7, 20)
+    assert not simulator.supervisor.connected and simulator.supervisor.outages == 1
+    sent_before = len(midiout.messages)
+
+    midiout.present = True
+    poll_until_connected(simulator, clock)
+    resync = [message for _, message in midiout.messages[sent_before:]]
+
+    # in the order of their last change
+    assert resync == [[0xB0, 3, 46], [0xB0, 4, 47], [0xB0, 1, 48], [0xB0, 2, 49],
+                      [0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x05, 0x06, 0x00, 0x00, 0x00, 20, 0xF7]]
+    assert simulator.supervisor.resent == 5 and not simulator.supervisor.held
+
+
+def test_backoff_doubles_up_to_the_limit(simulator, midiout, clock):
+    midiout.present = False
+    simulator.send_track_volume(1, 1)  # the failing send detects the loss at t=0
+    clock.sleep(30)
+    simulator.supervisor.poll()        # first attempt, long overdue
+    start = clock.monotonic()
+    attempts = []
+    while clock.monotonic() < start + 20:
+        clock.sleep(0.01)
+        before = simulator.supervisor.attempts
+        simulator.supervisor.poll()
+        if simulator.supervisor.attempts > before:
+            attempts.append(clock.monotonic() - start)
+    gaps = [b - a for a, b in zip([0.0] + attempts, attempts)]
+    assert gaps[:5] == pytest.approx([2 * MIN_BACKOFF, 4 * MIN_BACKOFF, 8 * MIN_BACKOFF,
+                                      16 * MIN_BACKOFF, 32 * MIN_BACKOFF], abs=0.011)
+    assert max(gaps) == pytest.approx(MAX_BACKOFF, abs=0.011)
+
+    midiout.present = True
+    simulator.supervisor.retry_now()
+    simulator.supervisor.poll()
+    assert simulator.supervisor.connected
+    assert [message for _, message in midiout.messages] == [[0xB0, 1, 1]]
+
+
+def test_vanished_port_is_detected_without_a_send(simulator, midiout, clock):
+    simulator.port_label = midiout.port_name  # an existing (loopMIDI) port, not a virtual one
+    simulator.supervisor.poll()
+    assert simulator.supervisor.connected
+
+    midiout.present = False
+    simulator.supervisor.poll()
+    assert not simulator.supervisor.connected
+    simulator.send_track_mute(2, True)
+    midiout.present = True
+    poll_until_connected(simulator, clock)
+    assert [message for _, message in midiout.messages] == [[0xB1, 41, 127]]
+
+
+def test_events_are_reported_outside_the_lock(midiout, clock):
+    def lock_free() -> bool:
+        # The lock is reentrant, so try it from another thread
+        result = []
+        def probe():
+            result.append(supervisor.lock.acquire(timeout=1.0))
+            if result[0]:
+                supervisor.lock.release()
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    events = []
+    supervisor = PortSupervisor(midiout.send_message, lambda: midiout.open_port(0) or True,
+                                lambda: midiout.present, clock,
+                                on_event=lambda text: events.append((text, lock_free())))
+    midiout.present = False
+    assert not supervisor.send([0xB0, 1, 10])      # lost on a send
+    midiout.present = True
+    supervisor.send([0xB0, 1, 20])
+    while not supervisor.connected:
+        clock.sleep(0.01)
+        supervisor.poll()                          # reconnect and resync
+    midiout.present = False
+    supervisor.poll()                              # lost on a port check
+    assert [text[0] for text, _ in events] == ["✗", "✓", "✗"]
+    assert all(free for _, free in events)
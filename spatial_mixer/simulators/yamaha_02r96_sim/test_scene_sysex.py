@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk scene SysEx frame
+
+Usage:
+    python -m pytest test_scene_sysex.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mapping_cache import MappingError, compile_device, load_device
+from scene_sysex import DEFAULT_TRACK, SCENE_PREFIX, decode_scene, encode_scene
+from sim_clock import RecordingMidiOut
+from yamaha_02r96_simulator import YamahaSimulator
+
+SCENE = [dict(DEFAULT_TRACK, volume=n * 2, pan=127 - n, mute=n % 3 == 0, solo=n % 4 == 0,
+              x=n * 3 - 63 if n < 43 else 63, y=-63 + n) for n in range(48)]
+
+
+def test_round_trip_is_seven_bit_clean():
+    frame = encode_scene(SCENE, 127)
+    assert len(frame) == len(SCENE_PREFIX) + 3 + 48 * 5 + 2
+    assert frame[0] == 0xF0 and frame[-1] == 0xF7 and all(b < 0x80 for b in frame[1:-1])
+    assert decode_scene(frame) == (0, 127, SCENE)
+
+
+def test_damaged_frames_are_rejected():
+    frame = encode_scene(SCENE[:4], 100, first_track=10)
+    assert decode_scene(frame)[0] == 10
+    for damaged in (frame[:-3] + frame[-2:],                         # a byte lost
+                    frame[:9] + [frame[9] ^ 0x01] + frame[10:],      # a flipped bit
+                    [0xF0, 0x7D, 0x01] + frame[3:]):                 # another SysEx
+        with pytest.raises(ValueError):
+            decode_scene(damaged)
+    with pytest.raises(ValueError):
+        encode_scene(SCENE + SCENE[:1], 100)
+
+
+def test_simulator_frame_resolves_through_the_mapping():
+    midiout = RecordingMidiOut()
+    simulator = YamahaSimulator(verbose=False, midiout=midiout)
+    simulator.send_scene(SCENE, 90)
+    simulator.send_scene(SCENE[:2], 90, bulk=False)
+
+    (_, frame), *each = midiout.messages
+    device = load_device("Yamaha 02R96-1")
+    (mapping, track), = device.resolve_sysex(frame)
+    assert (mapping['action'], track) == ('recallScene', None)
+    prefix, offset, fields = device.scene_output('recallScene')
+    assert decode_scene(frame, prefix, fields) == (0, 90, SCENE)
+    assert len(each) == 2 * 6 + 1  # per parameter: six messages per track, then the master
+
+
+def test_scene_entries_are_validated():
+    entry = {'type': 'sysexScene', 'name': 'Scene', 'parameter': 'scene', 'action': 'recallScene',
+             'prefix': 'F0 7D 02 01', 'fields': ['volume', 'pan']}
+    assert compile_device([entry])['scene_out'] == {'recallScene': (bytes(SCENE_PREFIX), 0, ('volume', 'pan'))}
+    for bad in ({'fields': ['volume', 'volume']}, {'fields': ['gain']}, {'prefix': '7D 02'}):
+        with pytest.raises(MappingError):
+            compile_device([dict(entry, **bad)])
@@ -1,112 +1,238 @@
 #!/usr/bin/env python3
 """
-Quick test script to verify the new Yamaha 02R96-1 GUI simulator functionality
+Offline tests for the Yamaha 02R96-1 MIDI simulator
+
+Runs YamahaSimulator against an in-process loopback output (sim_clock.RecordingMidiOut)
+on a virtual clock, so no MIDI port, loopMIDI or rtmidi backend is needed:
+- every encoder (CC volume/mute/pan, solo SysEx, 4-byte X/Y position SysEx)
+- mapping coverage: every message resolves through data/midi_mapping.json
+  to the intended action and track
+- the exact demo timeline, and throughput floors for encoding and pacing
+
+Usage:
+    python -m pytest test_simulator.py
 """
 
-import rtmidi
+import json
+import os
+import sys
 import time
 
-def test_midi_connection():
-    """Test if we can connect to the Yamaha MIDI port"""
-    print("🎵 Yamaha 02R96-1 MIDI Simulator Test")
-    print("=" * 50)
-    
-    # Check for MIDI input ports (what our Processing sketch would see)
-    midiin = rtmidi.MidiIn()
-    input_ports = midiin.get_ports()
-    
-    print(f"📥 Available MIDI INPUT ports:")
-    for i, port in enumerate(input_ports):
-        print(f"   {i}: {port}")
-        if "Yamaha 02R96-1" in port:
-            print(f"   ✓ Found target port: {port}")
-    
-    # Check for MIDI output ports (what our simulator connects to)
-    midiout = rtmidi.MidiOut()
-    output_ports = midiout.get_ports()
-    
-    print(f"\n📤 Available MIDI OUTPUT ports:")
-    for i, port in enumerate(output_ports):
-        print(f"   {i}: {port}")
-        if "Yamaha 02R96-1" in port:
-            print(f"   ✓ Found target port: {port}")
-    
-    # Test connection
-    print(f"\n🔗 Testing MIDI connection...")
-    
-    target_port = None
-    for i, port in enumerate(output_ports):
-        if "Yamaha 02R96-1" in port:
-            target_port = i
-            break
-    
-    if target_port is not None:
-        try:
-            midiout.open_port(target_port)
-            print(f"   ✓ Successfully connected to: {output_ports[target_port]}")
-            
-            # Send a test CC message
-            print(f"   🎛️ Sending test CC message...")
-            test_message = [0xB0, 1, 64]  # CC message: Channel 0, Controller 1, Value 64
-            midiout.send_message(test_message)
-            print(f"   ✓ Sent: Channel=0, Controller=1, Value=64")
-            
-            midiout.close_port()
-            print(f"   ✓ Connection test successful!")
-            return True
-            
-        except Exception as e:
-            print(f"   ✗ Connection failed: {e}")
-            return False
-    else:
-        print(f"   ✗ No Yamaha 02R96-1 port found")
-        print(f"   💡 Make sure loopMIDI is running with 'Yamaha 02R96-1 1' port")
-        print(f"   💡 Or run the simulator GUI first")
-        return False
-
-def test_message_formats():
-    """Test different MIDI message formats"""
-    print(f"\n🧪 Testing MIDI message formats:")
-    
-    # CC Message format
-    cc_msg = [0xB0 + 0, 1, 127]  # Channel 0, Controller 1, Value 127
-    print(f"   CC Message: {[hex(b) for b in cc_msg]} -> Ch=0, CC=1, Val=127")
-    
-    # SysEx Message format (Solo)
-    solo_msg = [0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00, 0x00, 0x00, 0x00, 0x00, 0x01, 0xF7]
-    print(f"   Solo SysEx: {[hex(b) for b in solo_msg]} -> Track 1 Solo ON")
-    
-    # SysEx Message format (Position X)
-    pos_msg = [0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x05, 0x00, 0x00, 0x00, 0x00, 0x1E, 0xF7]
-    print(f"   Position SysEx: {[hex(b) for b in pos_msg]} -> Track 1 X=+30")
-
-def show_gui_usage():
-    """Show usage instructions for the GUI"""
-    print(f"\n📋 GUI Simulator Usage:")
-    print(f"   1. Run: python yamaha_02r96_simulator_gui_v2.py")
-    print(f"   2. Check connection status (should show 'Connected')")
-    print(f"   3. Use tabs to control different functions:")
-    print(f"      • Volume: Adjust master and track volumes")
-    print(f"      • Mute/Solo: Toggle mute/solo for tracks")
-    print(f"      • Pan: Control stereo panning")
-    print(f"      • 3D Position: Set X/Y coordinates for spatial audio")
-    print(f"      • Testing: Run automated tests and send custom MIDI")
-    print(f"   4. Watch the MIDI Log for sent messages")
-    print(f"   5. Your Processing sketch should receive these messages")
-
-def main():
-    """Main test function"""
-    test_midi_connection()
-    test_message_formats()
-    show_gui_usage()
-    
-    print(f"\n🎯 Next Steps:")
-    print(f"   1. Start the GUI simulator if not already running")
-    print(f"   2. Start your Processing spatial mixer sketch")
-    print(f"   3. Use the GUI to control the mixer parameters")
-    print(f"   4. Verify the Processing sketch responds to the controls")
-    
-    print(f"\n✨ Test complete!")
-
-if __name__ == "__main__":
-    main()
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from yamaha_02r96_simulator import MAPPING_FILE, YamahaSimulator
+from scene_sysex import DEFAULT_TRACK
+from sim_clock import RecordingMidiOut, VirtualClock
+from stream_integrity import decode_midi_stamp
+
+# Throughput floors (messages per second), about 10x below a typical laptop
+MIN_ENCODE_RATE = 50_000
+MAX_VIRTUAL_DEMO_SECONDS = 0.5
+
+SOLO_PREFIX = [0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00]
+POSITION_PREFIX = [0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25]
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def midiout(clock):
+    return RecordingMidiOut(clock)
+
+
+@pytest.fixture
+def simulator(clock, midiout):
+    return YamahaSimulator(verbose=False, clock=clock, midiout=midiout)
+
+
+def sent(midiout):
+    return [message for _, message in midiout.messages]
+
+
+# Mapping resolution (mirrors MidiMappingManager.pde)
+
+def load_device_mappings():
+    with open(MAPPING_FILE, 'r') as f:
+        return json.load(f)["devices"]["Yamaha 02R96-1"]["midiMappings"]
+
+
+def parse_pattern(pattern: str):
+    """Split a SysEx pattern like 'F0 43 [00-2F] F7' into (low, high) byte ranges"""
+    ranges = []
+    for token in pattern.split():
+        if token.startswith('['):
+            low, high = token.strip('[]').split('-')
+            ranges.append((int(low, 16), int(high, 16)))
+        else:
+            ranges.append((int(token, 16), int(token, 16)))
+    return ranges
+
+
+def resolve(mappings, message):
+    """Return (action, 0-based track or None) for a message, or None if unmapped"""
+    matches = []
+    for mapping in mappings:
+        if mapping['type'] == 'cc' and message[0] & 0xF0 == 0xB0:
+            low, high = mapping['controllerRange']
+            if message[0] & 0x0F == mapping['channel'] and low <= message[1] <= high:
+                matches.append((mapping['action'], message[1] - low + mapping.get('trackOffset', 0)))
+        elif mapping['type'] == 'sysex' and message[0] == 0xF0:
+            ranges = parse_pattern(mapping['pattern'])
+            if len(ranges) == len(message) and all(lo <= b <= hi for b, (lo, hi) in zip(message, ranges)):
+                matches.append((mapping['action'], message[8]))
+        elif mapping['type'] == 'sysexScene' and message[0] == 0xF0:
+            prefix = [int(token, 16) for token in mapping['prefix'].split()]
+            if message[:len(prefix)] == prefix and message[-1] == 0xF7:
+                matches.append((mapping['action'], None))  # every track of the console
+    assert len(matches) <= 1, f"ambiguous mapping for {message}: {matches}"
+    return matches[0] if matches else None
+
+
+# Encoders
+
+def test_track_volume_channels_and_controllers(simulator, midiout):
+    simulator.send_track_volume(1, 100)
+    simulator.send_track_volume(24, 0)
+    simulator.send_track_volume(25, 127)
+    simulator.send_track_volume(48, 64)
+    assert sent(midiout) == [[0xB0, 1, 100], [0xB0, 24, 0], [0xB1, 1, 127], [0xB1, 24, 64]]
+
+
+def test_master_volume(simulator, midiout):
+    simulator.send_master_volume(90)
+    assert sent(midiout) == [[0xB1, 30, 90]]
+
+
+def test_track_mute(simulator, midiout):
+    simulator.send_track_mute(1, True)
+    simulator.send_track_mute(24, False)
+    simulator.send_track_mute(25, True)
+    simulator.send_track_mute(48, False)
+    assert sent(midiout) == [[0xB1, 40, 127], [0xB1, 63, 0], [0xB2, 40, 127], [0xB2, 63, 0]]
+
+
+def test_track_pan(simulator, midiout):
+    simulator.send_track_pan(1, 0)
+    simulator.send_track_pan(24, 127)
+    simulator.send_track_pan(25, 64)
+    simulator.send_track_pan(48, 1)
+    assert sent(midiout) == [[0xB0, 89, 0], [0xB0, 112, 127], [0xB1, 89, 64], [0xB1, 112, 1]]
+
+
+def test_track_solo_sysex(simulator, midiout):
+    simulator.send_track_solo(1, True)
+    simulator.send_track_solo(48, False)
+    assert sent(midiout) == [
+        SOLO_PREFIX + [0x00, 0x00, 0x00, 0x00, 0x01, 0xF7],
+        SOLO_PREFIX + [0x2F, 0x00, 0x00, 0x00, 0x00, 0xF7],
+    ]
+
+
+@pytest.mark.parametrize("value, data", [
+    (0, [0x00, 0x00, 0x00, 0x00]),
+    (30, [0x00, 0x00, 0x00, 0x1E]),
+    (63, [0x00, 0x00, 0x00, 0x3F]),
+    (100, [0x00, 0x00, 0x00, 0x3F]),   # clamped to +63
+    (-1, [0x7F, 0x7F, 0x7F, 0x7F]),
+    (-2, [0x7F, 0x7F, 0x7F, 0x7E]),
+    (-30, [0x7F, 0x7F, 0x7F, 0x62]),
+    (-63, [0x7F, 0x7F, 0x7F, 0x41]),
+    (-100, [0x7F, 0x7F, 0x7F, 0x41]),  # clamped to -63
+])
+def test_position_four_byte_encoding(simulator, midiout, value, data):
+    simulator.send_position_x(5, value)
+    simulator.send_position_y(48, value)
+    assert sent(midiout) == [
+        POSITION_PREFIX + [0x05, 0x04] + data + [0xF7],
+        POSITION_PREFIX + [0x06, 0x2F] + data + [0xF7],
+    ]
+
+
+@pytest.mark.parametrize("send", ["send_track_volume", "send_track_mute", "send_track_pan",
+                                  "send_track_solo", "send_position_x", "send_position_y"])
+@pytest.mark.parametrize("track", [0, 49])
+def test_invalid_tracks_send_nothing(simulator, midiout, send, track):
+    getattr(simulator, send)(track, 1)
+    assert midiout.messages == []
+
+
+def test_stamps_follow_every_message(clock, midiout):
+    simulator = YamahaSimulator(stamp=True, verbose=False, clock=clock, midiout=midiout)
+    simulator.send_track_volume(1, 10)
+    clock.sleep(0.25)
+    simulator.send_track_solo(2, True)
+    messages = sent(midiout)
+    assert len(messages) == 4
+    first, second = decode_midi_stamp(messages[1]), decode_midi_stamp(messages[3])
+    assert (first[0], second[0]) == (0, 1)
+    assert second[1] - first[1] == 250_000
+
+
+# Mapping coverage
+
+def test_every_message_resolves_to_its_mapping(simulator, midiout):
+    mappings = load_device_mappings()
+    expected = []
+    for track in range(1, 49):
+        index = track - 1
+        simulator.send_track_volume(track, 100)
+        simulator.send_track_mute(track, True)
+        simulator.send_track_pan(track, 64)
+        simulator.send_track_solo(track, True)
+        simulator.send_position_x(track, -10)
+        simulator.send_position_y(track, 10)
+        expected += [('setTrackVolume', index), ('toggleMute', index), ('setPan', index),
+                     ('toggleSolo', index), ('setPositionX', index), ('setPositionY', index)]
+    simulator.send_master_volume(100)
+    expected.append(('setMasterVolume', 0))
+
+    assert [resolve(mappings, message) for message in sent(midiout)] == expected
+
+
+def test_track_actions_in_mapping_are_all_reachable(simulator, midiout):
+    mappings = load_device_mappings()
+    for track in range(1, 49):
+        for send in (simulator.send_track_volume, simulator.send_track_mute, simulator.send_track_pan,
+                     simulator.send_track_solo, simulator.send_position_x, simulator.send_position_y):
+            send(track, 1)
+    simulator.send_master_volume(1)
+    simulator.send_scene([dict(DEFAULT_TRACK) for _ in range(48)], 100)
+    reached = {resolve(mappings, message)[0] for message in sent(midiout)}
+
+    # Master-mode entries (channel 3, solo group 02) are console modes the simulator doesn't emit
+    simulated = {m['action'] for m in mappings if 'Master Mode' not in m['name']}
+    assert simulated <= reached
+
+
+# Timeline and throughput
+
+def test_demo_sequence_timeline(simulator, midiout, clock):
+    started = time.perf_counter()
+    simulator.demo_sequence()
+    elapsed = time.perf_counter() - started
+
+    times = [t for t, _ in midiout.messages]
+    assert len(times) == 51
+    assert times[:3] == pytest.approx([0.0, 0.1, 0.2])
+    assert times[7] == pytest.approx(1.7)  # 1 s pause after the track volumes
+    assert clock.monotonic() == pytest.approx(14.5)
+    assert elapsed < MAX_VIRTUAL_DEMO_SECONDS
+
+
+def test_encode_throughput(simulator, midiout):
+    count = 20_000
+    started = time.perf_counter()
+    for i in range(count // 4):
+        track = i % 48 + 1
+        simulator.send_track_volume(track, i % 128)
+        simulator.send_track_pan(track, i % 128)
+        simulator.send_track_solo(track, i % 2 == 0)
+        simulator.send_position_x(track, i % 127 - 63)
+    elapsed = time.perf_counter() - started
+
+    assert len(midiout.messages) == count
+    assert count / elapsed > MIN_ENCODE_RATE
@@ -14,168 +14,214 @@ Usage:
 2. The script will create a virtual MIDI port named "Yamaha 02R96-1 Simulator"
 3. Use the command-line interface or GUI to send MIDI messages
 4. Your Processing sketch should receive these messages as if from a real device
+
+Run with --stamp to follow every message with a sequence/timestamp SysEx for
+receiver-side loss, reorder and delay checks (see ../stream_integrity.py).
+
+If the MIDI port disappears (e.g. loopMIDI restarted), the port supervisor
+(port_supervisor.py) holds the latest value of every control, reconnects with
+backoff and then sends only the controls that changed during the outage.
+
+Run with --batch FILE (or --batch - for stdin) to play a command script
+non-interactively (batch_script.py): track ranges and broadcasts, waits and
+repeat loops, compiled once and sent on schedule, or back to back with --fast.
+
+Run with --state-bus to publish the mixer state to shared memory for local
+monitors and renderers (../state_bus.py).
 """
 
-import rtmidi
 import time
+from time import perf_counter_ns
 import threading
 import json
 import sys
+import os
+import argparse
 from typing import List, Dict, Any, Optional
 
+# Shared simulator tooling (stream_integrity.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from stream_integrity import MIDI_SEQ_BITS, MIDI_TIME_BITS, SequenceStamper, encode_midi_stamp
+from sim_clock import REAL_CLOCK
+from sim_metrics import start_metrics_server
+from state_bus import DEFAULT_NAME as STATE_BUS_NAME, StateBus
+from console_core import (CONSOLE_TRACKS, DEFAULT_TRACK, LOOPMIDI_PATTERNS, MAPPING_FILE, CompiledDevice,
+                          ConsoleEncoder, EncodeError, MidiStreamOut, StreamTransport, UdpTransport,
+                          create_midi_output, load_device, open_existing_port,
+                          parse_address, port_present, reopen_port)
+from mapping_watcher import MappingWatcher
+from port_supervisor import PortSupervisor
+from batch_script import ScriptError, compile_script, run_timeline
+
 class YamahaSimulator:
-    def __init__(self):
-        self.midiout = rtmidi.MidiOut()
-        self.port_name = "Yamaha 02R96-1"
+    def __init__(self, stamp: bool = False, verbose: bool = True, clock=REAL_CLOCK, midiout=None,
+                 metrics=None, device: str = "Yamaha 02R96-1", first_track: int = 1, state_bus=None):
+        # clock/midiout can be injected (sim_clock.VirtualClock, RecordingMidiOut)
+        # to run sequences in virtual time without a MIDI port. Otherwise no port is
+        # opened until connect_to_midi_port(); changes made before that are held.
+        self.clock = clock
+        self.midiout = midiout
+        # Cascaded consoles (console_cascade.py) each use their own device entry and
+        # port, and continue the track numbering from first_track
+        self.device = device
+        self.port_name = device
+        self.first_track = first_track
+        self.last_track = first_track + CONSOLE_TRACKS - 1
         self.is_running = False
-        self.connected = False
-        self.mappings = self.load_mappings()
+        self.port_label = None  # the existing port we opened (None: virtual or injected output)
+        self.verbose = verbose  # print every sent message
+        self.watcher = None  # mapping hot reload (watch_mappings)
+        # Messages are built by the shared encoder (console_core.py) from the compiled tables
+        self.encoder = ConsoleEncoder(self.load_mappings(), first_track)
+        
+        # Optional sequence/timestamp SysEx after every message
+        self.stamper = SequenceStamper(MIDI_SEQ_BITS, MIDI_TIME_BITS, clock) if stamp else None
+        
+        # Optional live metrics (sim_metrics.MetricsRegistry)
+        self.cc_metrics = metrics.message("yamaha", "cc") if metrics else None
+        self.sysex_metrics = metrics.message("yamaha", "sysex") if metrics else None
         
-        # Connect to MIDI port with Windows compatibility
-        self.connect_to_midi_port()
+        # Optional shared-memory mixer state for local monitors (state_bus.StateBus)
+        self.state_bus = state_bus
+        
+        # Port loss detection, reconnection and resync (started by supervise())
+        self.supervisor = PortSupervisor(self.transmit, self.reopen_midi_port, self.midi_port_present,
+                                         clock, on_event=lambda text: print(f"\n{text}"),
+                                         connected=midiout is not None)
+    
+    @property
+    def connected(self) -> bool:
+        return self.supervisor.connected
     
-    def load_mappings(self) -> Dict[str, Any]:
-        """Load MIDI mappings from the JSON file"""
+    @connected.setter
+    def connected(self, value: bool):
+        self.supervisor.connected = value
+    
+    def load_mappings(self) -> CompiledDevice:
+        """Load MIDI mappings (compiled from the JSON file, cached next to it)"""
         try:
-            with open('data/midi_mapping.json', 'r') as f:
-                data = json.load(f)
-            return data["devices"]["Yamaha 02R96-1"]["midiMappings"]
+            return load_device(self.device, MAPPING_FILE)
         except Exception as e:
             print(f"✗ Failed to load MIDI mappings: {e}")
-            return []
+            return CompiledDevice.empty(self.device)
+    
+    @property
+    def mapping_table(self) -> CompiledDevice:
+        """Compiled lookup tables (mapping_cache.py) the encoder builds messages from"""
+        return self.encoder.table
+    
+    @property
+    def mappings(self) -> List[Dict[str, Any]]:
+        return self.mapping_table.mappings
+    
+    def reload_mappings(self, table: CompiledDevice):
+        """Install freshly compiled mapping tables (called from the mapping watcher thread)"""
+        # One assignment: sends use the old or the new tables, never a mix of both
+        self.encoder.table = table
+        print(f"\n🔄 Reloaded {len(table.mappings)} MIDI mappings")
+    
+    def watch_mappings(self) -> MappingWatcher:
+        """Hot reload data/midi_mapping.json while the simulator runs"""
+        def failed(error: Exception):
+            print(f"\n✗ Mapping reload failed, keeping previous mappings: {error}")
+        self.watcher = MappingWatcher(self.device, self.reload_mappings, failed, MAPPING_FILE).start()
+        return self.watcher
+    
     def send_cc_message(self, channel: int, controller: int, value: int):
-        """Send a Control Change message"""
-        if not self.connected:
-            print("✗ Error: Not connected to MIDI port")
-            return
-            
+        """Send a Control Change message (held for resync while the port is gone)"""
         # MIDI CC: Status byte (0xB0 + channel), Controller, Value
-        message = [0xB0 + channel, controller, value]
+        if not self.supervisor.send([0xB0 + channel, controller, value]) and self.cc_metrics:
+            self.cc_metrics.errors += 1
+    
+    def send_sysex_message(self, data: List[int], key=None):
+        """Send a System Exclusive message (key: the control it sets, for resync)"""
+        if not self.supervisor.send(data, key) and self.sysex_metrics:
+            self.sysex_metrics.errors += 1
+    
+    def transmit(self, message: List[int]):
+        """Put one message (and its stamp) on the port; raises if the port is gone"""
+        metrics = self.sysex_metrics if message[0] == 0xF0 else self.cc_metrics
+        started = perf_counter_ns()
         self.midiout.send_message(message)
-        print(f"→ CC: Ch={channel}, CC={controller}, Val={value}")
+        if metrics:
+            metrics.record(started, perf_counter_ns())
+        self.send_stamp()
+        if self.verbose:
+            if message[0] == 0xF0:
+                print(f"→ SysEx: {' '.join([f'{b:02X}' for b in message])}")
+            else:
+                print(f"→ CC: Ch={message[0] & 0x0F}, CC={message[1]}, Val={message[2]}")
+    
+    def send_stamp(self):
+        """Send the sequence/timestamp SysEx that follows each message (if enabled)"""
+        if self.stamper:
+            self.midiout.send_message(encode_midi_stamp(*self.stamper.next()))
     
-    def send_sysex_message(self, data: List[int]):
-        """Send a System Exclusive message"""
-        if not self.connected:
-            print("✗ Error: Not connected to MIDI port")
+    def send_encoded(self, encode, *args):
+        """Build a message with one of the encoder's methods and send it (held while the port is gone)"""
+        try:
+            message, control = encode(*args)
+        except EncodeError as e:
+            print(f"✗ {e}")
             return
-            
-        self.midiout.send_message(data)
-        data_hex = ' '.join([f'{b:02X}' for b in data])
-        print(f"→ SysEx: {data_hex}")
+        sent = self.supervisor.send(message, control)
+        if not sent:
+            metrics = self.sysex_metrics if message[0] == 0xF0 else self.cc_metrics
+            if metrics:
+                metrics.errors += 1
+        if self.state_bus:
+            self.state_bus.apply(control, args, held=not sent, outages=self.supervisor.outages)
+    
+    def send_track_cc(self, action: str, track: int, value: int):
+        """Send a per-track Control Change on the channel/controller the mapping assigns"""
+        self.send_encoded(self.encoder.track_cc, action, track, value)
+    
+    def send_track_sysex(self, action: str, track: int, data: List[int]):
+        """Send a per-track SysEx: the mapping's leading bytes, the track byte, then data"""
+        self.send_encoded(self.encoder.track_sysex, action, track, data)
     
     def send_track_volume(self, track: int, value: int):
-        """Send volume control for a specific track (1-48)"""
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 0, controllers 1-24
-            self.send_cc_message(0, track, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 1, controllers 1-24
-            self.send_cc_message(1, track - 24, value)
-        else:
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
+        """Send volume control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.track_volume, track, value)
     
     def send_master_volume(self, value: int):
         """Send master volume control"""
-        # Master fader on channel 1, controller 30
-        self.send_cc_message(1, 30, value)
+        self.send_encoded(self.encoder.master_volume, value)
     
     def send_track_mute(self, track: int, muted: bool):
-        """Send mute control for a specific track (1-48)"""
-        value = 127 if muted else 0
-        
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 1, controllers 40-63
-            controller = 39 + track  # 40-63
-            self.send_cc_message(1, controller, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 2, controllers 40-63
-            controller = 39 + (track - 24)  # 40-63
-            self.send_cc_message(2, controller, value)
-        else:
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
+        """Send mute control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.track_mute, track, muted)
     
     def send_track_solo(self, track: int, solo: bool):
-        """Send solo control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
-            return
-        
-        # SysEx pattern: F0 43 10 3E 0B 03 2E 00 [track] 00 00 00 [value] F7
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        value_byte = 1 if solo else 0
-        
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00,
-            track_byte, 0x00, 0x00, 0x00, value_byte, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        """Send solo control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.track_solo, track, solo)
     
     def send_track_pan(self, track: int, value: int):
-        """Send pan control for a specific track (1-48)"""
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 0, controllers 89-118
-            controller = 88 + track  # 89-112
-            self.send_cc_message(0, controller, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 1, controllers 89-118
-            controller = 88 + (track - 24)  # 89-112
-            self.send_cc_message(1, controller, value)
-        else:
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
+        """Send pan control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.track_pan, track, value)
+    
     def send_position_x(self, track: int, value: int):
-        """Send X position control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
-            return
-        
-        # Convert value to 4-byte format
-        # Format: 00 00 00 00 = origin, 00 00 00 3F = +63, 7F 7F 7F 7F = -1, 7F 7F 7F 41 = -63
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        
-        # Convert position value (-63 to +63) to the special 4-byte format
-        if value >= 0:
-            # Positive values: 00 00 00 XX (where XX = 0 to 63)
-            b1, b2, b3, b4 = 0x00, 0x00, 0x00, min(value, 63)
-        else:
-            # Negative values: 7F 7F 7F XX (where XX descends from 7F for -1 to 41 for -63)
-            # -1 = 7F 7F 7F 7F, -2 = 7F 7F 7F 7E, ..., -63 = 7F 7F 7F 41
-            abs_value = min(abs(value), 63)  # Clamp to valid range
-            b4 = 0x7F - abs_value + 1  # Calculate: -1->7F, -2->7E, ..., -63->41
-            b1, b2, b3 = 0x7F, 0x7F, 0x7F
-        
-        # SysEx pattern: F0 43 10 3E 7F 01 25 05 [track] [b1] [b2] [b3] [b4] F7
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x05,
-            track_byte, b1, b2, b3, b4, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        """Send X position control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.position_x, track, value)
+    
     def send_position_y(self, track: int, value: int):
-        """Send Y position control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            print(f"✗ Invalid track number: {track} (must be 1-48)")
+        """Send Y position control for a specific track (1-48 on the first console)"""
+        self.send_encoded(self.encoder.position_y, track, value)
+    
+    def send_scene(self, tracks: List[Dict[str, Any]], master: int, bulk: bool = True):
+        """Recall a scene for this console's tracks (from first_track on): one bulk SysEx
+        frame (scene_sysex.py), or every parameter as its own message"""
+        if bulk:
+            self.send_encoded(self.encoder.scene, tracks, master)
             return
-        
-        # Convert value to 4-byte format (same format as X position)
-        # Format: 00 00 00 00 = origin, 00 00 00 3F = +63, 7F 7F 7F 7F = -1, 7F 7F 7F 41 = -63
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        
-        if value >= 0:
-            # Positive values: 00 00 00 XX (where XX = 0 to 63)
-            b1, b2, b3, b4 = 0x00, 0x00, 0x00, min(value, 63)
-        else:
-            # Negative values: 7F 7F 7F XX (where XX descends from 7F for -1 to 41 for -63)
-            # -1 = 7F 7F 7F 7F, -2 = 7F 7F 7F 7E, ..., -63 = 7F 7F 7F 41
-            abs_value = min(abs(value), 63)  # Clamp to valid range
-            b4 = 0x7F - abs_value + 1  # Calculate: -1->7F, -2->7E, ..., -63->41
-            b1, b2, b3 = 0x7F, 0x7F, 0x7F
-        
-        # SysEx pattern: F0 43 10 3E 7F 01 25 06 [track] [b1] [b2] [b3] [b4] F7
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x06,
-            track_byte, b1, b2, b3, b4, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        for track, state in enumerate(tracks, self.first_track):
+            self.send_track_volume(track, state['volume'])
+            self.send_track_pan(track, state['pan'])
+            self.send_track_mute(track, state['mute'])
+            self.send_track_solo(track, state['solo'])
+            self.send_position_x(track, state['x'])
+            self.send_position_y(track, state['y'])
+        self.send_master_volume(master)
     
     def demo_sequence(self):
         """Run a demonstration sequence of MIDI messages"""
@@ -186,38 +232,38 @@ class YamahaSimulator:
         for track in range(1, 8):  # Test first 7 tracks
             volume = int(127 * (track / 7))  # Gradual increase
             self.send_track_volume(track, volume)
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         
-        time.sleep(1)
+        self.clock.sleep(1)
         
         # Demo master volume
         print("\n🎚️ Demo: Master Volume")
         for value in [0, 64, 127, 100]:
             self.send_master_volume(value)
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
         
         # Demo mute toggles
         print("\n🔇 Demo: Mute Toggles")
         for track in range(1, 4):
             self.send_track_mute(track, True)   # Mute
-            time.sleep(0.3)
+            self.clock.sleep(0.3)
             self.send_track_mute(track, False)  # Unmute
-            time.sleep(0.3)
+            self.clock.sleep(0.3)
         
         # Demo solo toggles
         print("\n🎯 Demo: Solo Toggles")
         for track in range(1, 4):
             self.send_track_solo(track, True)   # Solo on
-            time.sleep(0.3)
+            self.clock.sleep(0.3)
             self.send_track_solo(track, False)  # Solo off
-            time.sleep(0.3)
+            self.clock.sleep(0.3)
         
         # Demo pan controls
         print("\n⬅️➡️ Demo: Pan Controls")
         for track in range(1, 4):
             for pan_value in [0, 64, 127, 64]:  # Left, Center, Right, Center
                 self.send_track_pan(track, pan_value)
-                time.sleep(0.2)
+                self.clock.sleep(0.2)
         
         # Demo position controls
         print("\n🎯 Demo: Position Controls")
@@ -225,12 +271,12 @@ class YamahaSimulator:
             # Test X position
             for x_pos in [-30, 0, 30, 0]:
                 self.send_position_x(track, x_pos)
-                time.sleep(0.3)
+                self.clock.sleep(0.3)
             
             # Test Y position  
             for y_pos in [-20, 0, 20, 0]:
                 self.send_position_y(track, y_pos)
-                time.sleep(0.3)
+                self.clock.sleep(0.3)
         
         print("\n✅ Demo sequence completed!")
     
@@ -244,6 +290,7 @@ class YamahaSimulator:
         print("  pan <track> <value>     - Set track pan (value: 0-127)")
         print("  posx <track> <value>    - Set X position (value: -63 to 63)")
         print("  posy <track> <value>    - Set Y position (value: -63 to 63)")
+        print("  scene [bulk/each]       - Recall the default scene on all 48 tracks")
         print("  demo                    - Run demo sequence")
         print("  help                    - Show this help")
         print("  quit                    - Exit simulator")
@@ -258,7 +305,7 @@ class YamahaSimulator:
                 elif cmd[0] == 'quit':
                     break
                 elif cmd[0] == 'help':
-                    print("📋 Commands: vol, master, mute, solo, pan, posx, posy, demo, help, quit")
+                    print("📋 Commands: vol, master, mute, solo, pan, posx, posy, scene, demo, help, quit")
                 elif cmd[0] == 'demo':
                     self.demo_sequence()
                 elif cmd[0] == 'vol' and len(cmd) == 3:
@@ -282,6 +329,9 @@ class YamahaSimulator:
                 elif cmd[0] == 'posy' and len(cmd) == 3:
                     track, value = int(cmd[1]), int(cmd[2])
                     self.send_position_y(track, value)
+                elif cmd[0] == 'scene' and len(cmd) <= 2:
+                    bulk = len(cmd) == 1 or cmd[1] == 'bulk'
+                    self.send_scene([dict(DEFAULT_TRACK) for _ in range(CONSOLE_TRACKS)], 100, bulk)
                 else:
                     print("❌ Invalid command. Type 'help' for available commands.")
                     
@@ -294,6 +344,8 @@ class YamahaSimulator:
     
     def connect_to_midi_port(self):
         """Connect to MIDI port with Windows compatibility"""
+        if self.midiout is None:
+            self.midiout = create_midi_output()  # imports python-rtmidi
         try:
             # First, try to open a virtual port (works on macOS/Linux)
             self.midiout.open_virtual_port(self.port_name)
@@ -303,26 +355,18 @@ class YamahaSimulator:
         except Exception as virtual_error:
             print(f"Virtual port creation failed: {virtual_error}")
             
-        # Virtual ports failed, try to find existing port (Windows with loopMIDI)
+        # Virtual ports failed, try to find existing port (Windows with loopMIDI):
+        # exact name first, then the usual loopMIDI names
         try:
             available_ports = self.midiout.get_ports()
             print(f"Available MIDI ports: {available_ports}")
             
-            # Look for exact match first
-            for i, port in enumerate(available_ports):
-                if self.port_name in port:
-                    self.midiout.open_port(i)
-                    self.connected = True
-                    print(f"✓ Connected to existing port: {port}")
-                    return
-            
-            # If no exact match, try loopMIDI pattern
-            for i, port in enumerate(available_ports):
-                if "Yamaha" in port or "02R96" in port or "loopMIDI" in port:
-                    self.midiout.open_port(i)
-                    self.connected = True
-                    print(f"✓ Connected to: {port}")
-                    return
+            label = open_existing_port(self.midiout, self.port_name, LOOPMIDI_PATTERNS)
+            if label is not None:
+                self.port_label = label
+                self.connected = True
+                print(f"✓ Connected to existing port: {label}")
+                return
             
             # No suitable port found
             print(f"✗ No suitable MIDI port found.")
@@ -337,19 +381,103 @@ class YamahaSimulator:
             print(f"✗ MIDI connection failed: {port_error}")
             sys.exit(1)
 
+    def reopen_midi_port(self) -> bool:
+        """Reopen the port after it went away (called by the port supervisor, never exits)"""
+        if self.midiout is None:
+            return False  # never connected: connect_to_midi_port() opens the first port
+        if not hasattr(self.midiout, "open_port"):
+            return True  # byte-stream or recording output: nothing to reopen
+        label = reopen_port(self.midiout, self.port_name, self.port_label)
+        if label is None:
+            return False
+        self.port_label = label
+        return True
+    
+    def midi_port_present(self) -> bool:
+        """False once the opened port is missing from the port list (virtual ports cannot go away)"""
+        return port_present(self.midiout, self.port_label)
+    
+    def supervise(self) -> PortSupervisor:
+        """Watch the MIDI port and reconnect/resync when it comes back after a loss"""
+        return self.supervisor.start()
+    
     def close(self):
         """Clean up MIDI connection"""
+        if self.watcher:
+            self.watcher.stop()
+        self.supervisor.stop()
         if self.midiout:
             del self.midiout
         print("🔌 MIDI connection closed")
 
 def main():
+    parser = argparse.ArgumentParser(description="Yamaha 02R96-1 MIDI Simulator")
+    parser.add_argument("--stamp", action="store_true",
+                        help="Follow every message with a sequence/timestamp SysEx")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve live Prometheus metrics on this local port")
+    parser.add_argument("--no-watch", action="store_true",
+                        help="Do not hot reload data/midi_mapping.json when it changes")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument("--udp", type=parse_address, metavar="HOST:PORT",
+                           help="Send a raw MIDI byte stream over UDP instead of opening a MIDI port")
+    transport.add_argument("--serial", metavar="DEVICE",
+                           help="Write a raw MIDI byte stream to a serial device or pty instead")
+    parser.add_argument("--din", action="store_true",
+                        help="Pace the byte stream at the DIN MIDI rate (31.25 kbaud)")
+    parser.add_argument("--no-reconnect", action="store_true",
+                        help="Do not reconnect and resync when the MIDI port disappears")
+    parser.add_argument("--state-bus", nargs="?", const=STATE_BUS_NAME, metavar="NAME",
+                        help="Publish the mixer state to a shared-memory state bus (state_bus.py); the first "
+                             "publisher creates and owns it, so start it first and stop it last")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run a command script ('-' for stdin) instead of the interactive menu")
+    parser.add_argument("--fast", action="store_true",
+                        help="With --batch: ignore waits and send the script back to back")
+    args = parser.parse_args()
+    
     print("🎹 Yamaha 02R96-1 MIDI Simulator")
     print("=" * 40)
     
-    simulator = YamahaSimulator()
+    timeline = None
+    if args.batch:
+        # Compile before opening any port, so a broken script costs nothing
+        try:
+            with (sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')) as script:
+                timeline = compile_script(script.read(), range(1, CONSOLE_TRACKS + 1))
+        except (OSError, ScriptError) as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+    
+    metrics = start_metrics_server(args.metrics_port) if args.metrics_port else None
+    midiout = None
+    if args.udp or args.serial:
+        stream = UdpTransport(*args.udp) if args.udp else StreamTransport(open(args.serial, 'wb', buffering=0))
+        midiout = MidiStreamOut(stream, din_pacing=args.din)
+        print(f"✓ MIDI byte stream to {args.udp[0]}:{args.udp[1]}" if args.udp else
+              f"✓ MIDI byte stream to {args.serial}")
+    state_bus = StateBus(args.state_bus) if args.state_bus else None
+    if state_bus:
+        print(f"✓ Publishing mixer state to shared memory '{args.state_bus}'"
+              f"{' (created here: keep this simulator running until the other users stop)' if state_bus.owner else ''}")
+    simulator = YamahaSimulator(stamp=args.stamp, metrics=metrics, midiout=midiout, state_bus=state_bus)
+    if midiout is None:
+        simulator.connect_to_midi_port()
+    if not args.no_watch:
+        simulator.watch_mappings()
+    if not args.no_reconnect:
+        simulator.supervise()
     
     try:
+        if timeline is not None:
+            simulator.verbose = False
+            print(f"▶️ Running {len(timeline)} scripted events{' (fast)' if args.fast else ''}...")
+            report = run_timeline(simulator, timeline, fast=args.fast)
+            print(f"✓ Sent {report['events']} events in {report['seconds']:.3f} s"
+                  + (f", late mean {report['mean_late_ms']:.3f} ms, p99 {report['p99_late_ms']:.3f} ms"
+                     if 'ran' in report else ""))
+            return
+        
         print("\nChoose mode:")
         print("1. Interactive mode (manual control)")
         print("2. Demo sequence (automated)")
@@ -372,6 +500,8 @@ def main():
         print("\n\n⏹️ Stopping simulator...")
     finally:
         simulator.close()
+        if state_bus:
+            state_bus.close()
 
 if __name__ == "__main__":
     main()
@@ -14,82 +14,175 @@ Usage:
 2. Run: python yamaha_02r96_simulator_gui_v2.py
 3. Use the GUI tabs to control different mixer functions
 4. Your Processing sketch should receive these messages
+
+Enable "Sequence stamps" in the Testing tab (or run with --stamp) to follow every
+message with a sequence/timestamp SysEx for receiver-side loss, reorder and
+delay checks (see ../stream_integrity.py).
+
+Messages go out on a dedicated sender thread (midi_output.py): the UI only
+queues them, a newer fader/pan/position value replaces one still waiting for
+the same control, and mute/solo toggles are never dropped. The status bar
+shows the queue depth and how many stale values were replaced.
+
+If the MIDI port disappears, the port supervisor (port_supervisor.py) holds the
+latest value of every control, reconnects with backoff and then sends only the
+controls that changed during the outage.
+
+Messages are built by the encoder shared with the CLI simulator
+(console_core.py); python-rtmidi is only imported when the port is opened.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import rtmidi
 import json
 import time
-import threading
+from time import perf_counter_ns
+import argparse
+from collections import deque
+import os
+import sys
 from typing import List, Dict, Any, Optional
 
+# Shared simulator tooling (stream_integrity.py, ...) lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from stream_integrity import MIDI_SEQ_BITS, MIDI_TIME_BITS, SequenceStamper, encode_midi_stamp
+from sim_clock import REAL_CLOCK
+from sim_metrics import start_metrics_server
+from console_core import (DEFAULT_TRACK, MAPPING_FILE, TOGGLE_ACTIONS, CompiledDevice, ConsoleEncoder,
+                          EncodeError, create_midi_output, load_device, open_existing_port, port_present,
+                          reopen_port)
+from mapping_watcher import MappingWatcher
+from midi_output import MidiOutputQueue
+from port_supervisor import PortSupervisor
+
+QUEUE_STATUS_MS = 250  # refresh interval of the output queue status
+
 class MIDILogger:
-    """Thread-safe MIDI message logger for the GUI"""
+    """Thread-safe MIDI message logger for the GUI
+
+    Tk may only be called from the main thread, but messages are logged from
+    the output, supervisor and watcher threads too: log() only queues the
+    line, and drain() (run by the main thread's after() loop) shows them.
+    """
     def __init__(self, text_widget: scrolledtext.ScrolledText):
         self.text_widget = text_widget
-        self.lock = threading.Lock()
+        self.pending = deque()  # append/popleft are atomic, no lock needed
     
     def log(self, message: str):
-        """Add a timestamped log message"""
+        """Queue a timestamped log message (any thread)"""
         timestamp = time.strftime("%H:%M:%S")
-        with self.lock:
-            self.text_widget.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.text_widget.see(tk.END)
+        self.pending.append(f"[{timestamp}] {message}\n")
+    
+    def drain(self):
+        """Show every queued message (main thread only)"""
+        pending = self.pending
+        if not pending:
+            return
+        lines = []
+        while pending:
+            lines.append(pending.popleft())
+        self.text_widget.insert(tk.END, ''.join(lines))
+        self.text_widget.see(tk.END)
 
 class YamahaSimulatorGUI:
-    def __init__(self):
+    def __init__(self, stamp: bool = False, clock=REAL_CLOCK, midiout=None, metrics=None):
         self.root = tk.Tk()
         self.root.title("Yamaha 02R96-1 MIDI Simulator")
         self.root.geometry("900x700")
         
-        # MIDI setup
-        self.midiout = rtmidi.MidiOut()
+        # MIDI setup (clock/midiout can be injected to run tests in virtual time)
+        self.clock = clock
+        self.midiout = midiout  # created (importing python-rtmidi) by connect_to_midi_port()
         self.port_name = "Yamaha 02R96-1"
-        self.connected = False
+        self.port_label = None  # the existing port we opened (None: virtual or injected output)
         
-        # Load MIDI mappings
-        self.mappings = self.load_mappings()
+        # Optional sequence/timestamp SysEx after every message
+        self.stamp_enabled = tk.BooleanVar(value=stamp)
+        self.stamper = SequenceStamper(MIDI_SEQ_BITS, MIDI_TIME_BITS, clock) if stamp else None
+        
+        # Optional live metrics (sim_metrics.MetricsRegistry)
+        self.cc_metrics = metrics.message("yamaha_gui", "cc") if metrics else None
+        self.sysex_metrics = metrics.message("yamaha_gui", "sysex") if metrics else None
+        
+        # Load MIDI mappings; messages are built by the shared encoder (console_core.py)
+        self.encoder = ConsoleEncoder(self.load_mappings())
+        self.watcher = None  # mapping hot reload (watch_mappings)
+        
+        # All port calls happen on the output thread; the UI thread only queues.
+        # The supervisor holds changes while the port is gone and resyncs them.
+        # Its events and transmit's log lines only go into the logger's queue,
+        # which the main thread shows (MIDILogger.drain); nothing here touches Tk.
+        self.supervisor = PortSupervisor(self.transmit, self.reopen_midi_port, self.midi_port_present,
+                                         clock, on_event=lambda text: self.logger.log(text), connected=False)
+        self.output = MidiOutputQueue(self.deliver).start()
         
         # Create GUI
         self.setup_gui()
         
         # Connect to MIDI port
-        self.connect_to_midi_port()
+        if midiout is not None:
+            self.connected = True
+            self.connection_status.config(text="Injected Output", fg="green")
+        else:
+            self.connect_to_midi_port()
+        self.shown_connected = self.connected  # connection state the status label shows
         
         # Track states for toggle buttons
         self.mute_states = {}  # track_id -> bool
         self.solo_states = {}  # track_id -> bool
         
-    def load_mappings(self) -> List[Dict[str, Any]]:
-        """Load MIDI mappings from the JSON file"""
+    def load_mappings(self) -> CompiledDevice:
+        """Load MIDI mappings (compiled from the JSON file, cached next to it)"""
         try:
-            with open('data/midi_mapping.json', 'r') as f:
-                data = json.load(f)
-            return data["devices"]["Yamaha 02R96-1"]["midiMappings"]
+            return load_device("Yamaha 02R96-1", MAPPING_FILE)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load MIDI mappings: {e}")
-            return []
+            return CompiledDevice.empty("Yamaha 02R96-1")
+    
+    @property
+    def mapping_table(self) -> CompiledDevice:
+        """Compiled lookup tables (mapping_cache.py) the encoder builds messages from"""
+        return self.encoder.table
+    
+    @property
+    def mappings(self) -> List[Dict[str, Any]]:
+        return self.mapping_table.mappings
+    
+    @property
+    def connected(self) -> bool:
+        return self.supervisor.connected
+    
+    @connected.setter
+    def connected(self, value: bool):
+        self.supervisor.connected = value
+    
+    def reload_mappings(self, table: CompiledDevice):
+        """Install freshly compiled mapping tables (called from the mapping watcher thread)"""
+        # One assignment: sends use the old or the new tables, never a mix of both
+        self.encoder.table = table
+        self.logger.log(f"🔄 Reloaded {len(table.mappings)} MIDI mappings")
+    
+    def watch_mappings(self) -> MappingWatcher:
+        """Hot reload data/midi_mapping.json while the simulator runs"""
+        def failed(error: Exception):
+            self.logger.log(f"✗ Mapping reload failed, keeping previous mappings: {error}")
+        self.watcher = MappingWatcher("Yamaha 02R96-1", self.reload_mappings, failed, MAPPING_FILE).start()
+        return self.watcher
     
     def connect_to_midi_port(self):
         """Connect to the MIDI output port with Windows loopMIDI compatibility"""
         try:
+            if self.midiout is None:
+                self.midiout = create_midi_output()  # imports python-rtmidi
             # First, list all available ports
-            available_ports = self.midiout.get_ports()
-            self.logger.log(f"Available MIDI ports: {available_ports}")
+            self.logger.log(f"Available MIDI ports: {self.midiout.get_ports()}")
             
             # Try to find exact port name first
-            target_port = None
-            for i, port in enumerate(available_ports):
-                if self.port_name in port:
-                    target_port = i
-                    self.logger.log(f"Found target port: {port} at index {i}")
-                    break
-            
-            if target_port is not None:
-                self.midiout.open_port(target_port)
+            label = open_existing_port(self.midiout, self.port_name)
+            if label is not None:
                 self.connected = True
-                self.logger.log(f"✓ Connected to MIDI port: {available_ports[target_port]}")
+                self.port_label = label
+                self.logger.log(f"✓ Connected to MIDI port: {label}")
                 self.connection_status.config(text="Connected", fg="green")
                 return True
             else:
@@ -134,7 +227,10 @@ class YamahaSimulatorGUI:
         self.connection_status = tk.Label(status_frame, text="Connecting...", fg="orange")
         self.connection_status.grid(row=0, column=1, padx=(0, 20))
         
-        ttk.Button(status_frame, text="Reconnect", command=self.connect_to_midi_port).grid(row=0, column=2)
+        ttk.Button(status_frame, text="Reconnect", command=self.reconnect_now).grid(row=0, column=2)
+        self.queue_status = ttk.Label(status_frame, text="Queue: 0")
+        self.queue_status.grid(row=0, column=3, padx=(20, 0))
+        self.root.after(QUEUE_STATUS_MS, self.update_queue_status)
         
         # Create notebook for tabs
         self.notebook = ttk.Notebook(main_frame)
@@ -426,6 +522,12 @@ class YamahaSimulatorGUI:
                   command=self.test_positioning).grid(row=2, column=0, padx=5, pady=5, sticky=(tk.W, tk.E))
         ttk.Button(tests_frame, text="Reset All", 
                   command=self.reset_all_controls).grid(row=2, column=1, padx=5, pady=5, sticky=(tk.W, tk.E))
+        ttk.Checkbutton(tests_frame, text="Sequence stamps (SysEx after each message)",
+                        variable=self.stamp_enabled,
+                        command=self.on_stamp_toggle).grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        self.bulk_reset = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tests_frame, text="Reset All as one bulk scene SysEx",
+                        variable=self.bulk_reset).grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
         
         for i in range(2):
             tests_frame.columnconfigure(i, weight=1)
@@ -457,146 +559,136 @@ class YamahaSimulatorGUI:
         manual_frame.columnconfigure(0, weight=1)
     
     # MIDI Sending Methods
-    def send_cc_message(self, channel: int, controller: int, value: int):
-        """Send a Control Change message"""
-        if not self.connected:
-            self.logger.log("✗ Error: Not connected to MIDI port")
-            return
-        
-        try:
-            # MIDI CC: Status byte (0xB0 + channel), Controller, Value
-            message = [0xB0 + channel, controller, value]
-            self.midiout.send_message(message)
-            self.logger.log(f"→ CC: Ch={channel}, CC={controller}, Val={value}")
-        except Exception as e:
-            self.logger.log(f"✗ Error sending CC message: {e}")
+    def send_cc_message(self, channel: int, controller: int, value: int, key=None):
+        """Queue a Control Change message (a key lets a newer value replace a waiting one)"""
+        # MIDI CC: Status byte (0xB0 + channel), Controller, Value
+        self.output.submit(([0xB0 + channel, controller, value], None), key)
+    
+    def send_sysex_message(self, data: List[int], key=None, control=None):
+        """Queue a System Exclusive message (control: the setting it changes, for resync)"""
+        self.output.submit((data, control), key)
+    
+    def deliver(self, item):
+        """Send one queued message, or hold it until the port is back (runs on the output thread)"""
+        message, control = item
+        if not self.supervisor.send(message, control):
+            metrics = self.sysex_metrics if message[0] == 0xF0 else self.cc_metrics
+            if metrics:
+                metrics.errors += 1
+    
+    def transmit(self, message: List[int]):
+        """Put one message (and its stamp) on the port; raises if the port is gone"""
+        sysex = message[0] == 0xF0
+        metrics = self.sysex_metrics if sysex else self.cc_metrics
+        started = perf_counter_ns()
+        self.midiout.send_message(message)
+        if metrics:
+            metrics.record(started, perf_counter_ns())
+        self.send_stamp()
+        if sysex:
+            data_hex = ' '.join([f'{b:02X}' for b in message])
+            self.logger.log(f"→ SysEx: {data_hex}")
+        else:
+            self.logger.log(f"→ CC: Ch={message[0] & 0x0F}, CC={message[1]}, Val={message[2]}")
+    
+    def reopen_midi_port(self) -> bool:
+        """Reopen the port after it went away (called by the port supervisor, no dialogs)"""
+        if self.midiout is None:
+            return False  # python-rtmidi missing: there is no output to reopen
+        if not hasattr(self.midiout, "open_port"):
+            return True  # injected byte-stream or recording output: nothing to reopen
+        label = reopen_port(self.midiout, self.port_name, self.port_label)
+        if label is None:
+            return False
+        self.port_label = label
+        return True
     
-    def send_sysex_message(self, data: List[int]):
-        """Send a System Exclusive message"""
-        if not self.connected:
-            self.logger.log("✗ Error: Not connected to MIDI port")
+    def midi_port_present(self) -> bool:
+        """False once the opened port is missing from the port list (virtual ports cannot go away)"""
+        return self.midiout is None or port_present(self.midiout, self.port_label)
+    
+    def supervise(self) -> PortSupervisor:
+        """Watch the MIDI port and reconnect/resync when it comes back after a loss"""
+        return self.supervisor.start()
+    
+    def reconnect_now(self):
+        """Reconnect button: try the port immediately instead of waiting for the backoff"""
+        if self.connected:
+            self.logger.log("✓ Already connected")
             return
-        
+        self.supervisor.retry_now()
+        self.supervisor.poll()
+        if not self.connected:
+            self.logger.log(f"✗ '{self.port_name}' port not found, retrying in the background")
+    
+    def update_queue_status(self):
+        """Show the output queue depth and how many stale values it replaced, and the queued log"""
+        self.logger.drain()
+        output = self.output
+        if self.connected != self.shown_connected:
+            self.shown_connected = self.connected
+            self.connection_status.config(text="Connected" if self.connected else "Reconnecting...",
+                                          fg="green" if self.connected else "orange")
+        self.queue_status.config(text=f"Queue: {output.depth} (max {output.max_depth}), "
+                                      f"replaced {output.replaced}, errors {output.errors}")
+        self.root.after(QUEUE_STATUS_MS, self.update_queue_status)
+    
+    def send_stamp(self):
+        """Send the sequence/timestamp SysEx that follows each message (if enabled)"""
+        stamper = self.stamper
+        if stamper:
+            self.midiout.send_message(encode_midi_stamp(*stamper.next()))
+    
+    def send_encoded(self, encode, *args):
+        """Build a message with one of the encoder's methods and queue it"""
         try:
-            self.midiout.send_message(data)
-            data_hex = ' '.join([f'{b:02X}' for b in data])
-            self.logger.log(f"→ SysEx: {data_hex}")
-        except Exception as e:
-            self.logger.log(f"✗ Error sending SysEx message: {e}")
+            message, control = encode(*args)
+        except EncodeError as e:
+            self.logger.log(f"✗ {e}")
+            return
+        # A newer value replaces a waiting one for the same control; toggles all go out
+        key = None if control[0] in TOGGLE_ACTIONS else control
+        self.output.submit((message, control), key)
+    
+    def send_track_cc(self, action: str, track: int, value: int):
+        """Send a per-track Control Change on the channel/controller the mapping assigns"""
+        self.send_encoded(self.encoder.track_cc, action, track, value)
+    
+    def send_track_sysex(self, action: str, track: int, data: List[int]):
+        """Send a per-track SysEx: the mapping's leading bytes, the track byte, then data"""
+        self.send_encoded(self.encoder.track_sysex, action, track, data)
     
     def send_track_volume(self, track: int, value: int):
         """Send volume control for a specific track (1-48)"""
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 0, controllers 1-24
-            self.send_cc_message(0, track, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 1, controllers 1-24
-            self.send_cc_message(1, track - 24, value)
-        else:
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
+        self.send_encoded(self.encoder.track_volume, track, value)
     
     def send_master_volume(self, value: int):
         """Send master volume control"""
-        # Master fader on channel 1, controller 30
-        self.send_cc_message(1, 30, value)
+        self.send_encoded(self.encoder.master_volume, value)
     
     def send_track_mute(self, track: int, muted: bool):
         """Send mute control for a specific track (1-48)"""
-        value = 127 if muted else 0
-        
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 1, controllers 40-63
-            controller = 39 + track  # 40-63
-            self.send_cc_message(1, controller, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 2, controllers 40-63
-            controller = 39 + (track - 24)  # 40-63
-            self.send_cc_message(2, controller, value)
-        else:
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
+        self.send_encoded(self.encoder.track_mute, track, muted)
     
     def send_track_solo(self, track: int, solo: bool):
         """Send solo control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
-            return
-        
-        # SysEx pattern: F0 43 10 3E 0B 03 2E 00 [track] 00 00 00 [value] F7
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        value_byte = 1 if solo else 0
-        
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x0B, 0x03, 0x2E, 0x00,
-            track_byte, 0x00, 0x00, 0x00, value_byte, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        self.send_encoded(self.encoder.track_solo, track, solo)
     
     def send_track_pan(self, track: int, value: int):
         """Send pan control for a specific track (1-48)"""
-        if 1 <= track <= 24:
-            # Tracks 1-24 on channel 0, controllers 89-118
-            controller = 88 + track  # 89-112
-            self.send_cc_message(0, controller, value)
-        elif 25 <= track <= 48:
-            # Tracks 25-48 on channel 1, controllers 89-118
-            controller = 88 + (track - 24)  # 89-112
-            self.send_cc_message(1, controller, value)
-        else:
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
+        self.send_encoded(self.encoder.track_pan, track, value)
+    
     def send_position_x(self, track: int, value: int):
         """Send X position control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
-            return
-        
-        # Convert value to 4-byte format
-        # Format: 00 00 00 00 = origin, 00 00 00 3F = +63, 7F 7F 7F 7F = -1, 7F 7F 7F 41 = -63
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        
-        # Convert position value (-63 to +63) to the special 4-byte format
-        if value >= 0:
-            # Positive values: 00 00 00 XX (where XX = 0 to 63)
-            b1, b2, b3, b4 = 0x00, 0x00, 0x00, min(value, 63)
-        else:
-            # Negative values: 7F 7F 7F XX (where XX descends from 7F for -1 to 41 for -63)
-            # -1 = 7F 7F 7F 7F, -2 = 7F 7F 7F 7E, ..., -63 = 7F 7F 7F 41
-            abs_value = min(abs(value), 63)  # Clamp to valid range
-            b4 = 0x7F - abs_value + 1  # Calculate: -1->7F, -2->7E, ..., -63->41
-            b1, b2, b3 = 0x7F, 0x7F, 0x7F
-        
-        # SysEx pattern: F0 43 10 3E 7F 01 25 05 [track] [b1] [b2] [b3] [b4] F7
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x05,
-            track_byte, b1, b2, b3, b4, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        self.send_encoded(self.encoder.position_x, track, value)
+    
     def send_position_y(self, track: int, value: int):
         """Send Y position control for a specific track (1-48)"""
-        if not (1 <= track <= 48):
-            self.logger.log(f"✗ Invalid track number: {track} (must be 1-48)")
-            return
-        
-        # Convert value to 4-byte format (same format as X position)
-        # Format: 00 00 00 00 = origin, 00 00 00 3F = +63, 7F 7F 7F 7F = -1, 7F 7F 7F 41 = -63
-        track_byte = track - 1  # Convert to 0-based (00-2F)
-        
-        # Convert position value (-63 to +63) to the special 4-byte format
-        if value >= 0:
-            # Positive values: 00 00 00 XX (where XX = 0 to 63)
-            b1, b2, b3, b4 = 0x00, 0x00, 0x00, min(value, 63)
-        else:
-            # Negative values: 7F 7F 7F XX (where XX descends from 7F for -1 to 41 for -63)
-            # -1 = 7F 7F 7F 7F, -2 = 7F 7F 7F 7E, ..., -63 = 7F 7F 7F 41
-            abs_value = min(abs(value), 63)  # Clamp to valid range
-            b4 = 0x7F - abs_value + 1  # Calculate: -1->7F, -2->7E, ..., -63->41
-            b1, b2, b3 = 0x7F, 0x7F, 0x7F
-        
-        # SysEx pattern: F0 43 10 3E 7F 01 25 06 [track] [b1] [b2] [b3] [b4] F7
-        sysex_data = [
-            0xF0, 0x43, 0x10, 0x3E, 0x7F, 0x01, 0x25, 0x06,
-            track_byte, b1, b2, b3, b4, 0xF7
-        ]
-        self.send_sysex_message(sysex_data)
+        self.send_encoded(self.encoder.position_y, track, value)
+    
+    def send_scene(self, tracks: List[Dict[str, Any]], master: int):
+        """Recall a scene for tracks 1-48 in one bulk SysEx frame (scene_sysex.py)"""
+        self.send_encoded(self.encoder.scene, tracks, master)
     
     # GUI Event Handlers
     def on_master_volume_change(self, value):
@@ -654,6 +746,15 @@ class YamahaSimulatorGUI:
         self.send_position_x(track, x)
         self.send_position_y(track, y)
     
+    def on_stamp_toggle(self):
+        """Start or stop sequence stamping (a new stream restarts at sequence 0)"""
+        if self.stamp_enabled.get():
+            self.stamper = SequenceStamper(MIDI_SEQ_BITS, MIDI_TIME_BITS, self.clock)
+            self.logger.log("Sequence stamps enabled")
+        else:
+            self.stamper = None
+            self.logger.log("Sequence stamps disabled")
+    
     def send_manual_cc(self):
         """Send a manually configured CC message"""
         channel = self.manual_channel.get()
@@ -667,7 +768,7 @@ class YamahaSimulatorGUI:
         self.logger.log("Testing all track volumes...")
         for track in range(1, 49):
             self.send_track_volume(track, 100)
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.send_master_volume(127)
         self.logger.log("Volume test complete")
     
@@ -676,11 +777,11 @@ class YamahaSimulatorGUI:
         self.logger.log("Testing all track mutes...")
         for track in range(1, 49):
             self.send_track_mute(track, True)
-            time.sleep(0.05)
-        time.sleep(1)
+            self.clock.sleep(0.05)
+        self.clock.sleep(1)
         for track in range(1, 49):
             self.send_track_mute(track, False)
-            time.sleep(0.05)
+            self.clock.sleep(0.05)
         self.logger.log("Mute test complete")
     
     def test_all_solos(self):
@@ -688,7 +789,7 @@ class YamahaSimulatorGUI:
         self.logger.log("Testing all track solos...")
         for track in range(1, 49):
             self.send_track_solo(track, True)
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
             self.send_track_solo(track, False)
         self.logger.log("Solo test complete")
     
@@ -697,11 +798,11 @@ class YamahaSimulatorGUI:
         self.logger.log("Testing all track pans...")
         for track in range(1, 49):
             self.send_track_pan(track, 0)   # Left
-            time.sleep(0.05)
+            self.clock.sleep(0.05)
             self.send_track_pan(track, 127) # Right
-            time.sleep(0.05)
+            self.clock.sleep(0.05)
             self.send_track_pan(track, 64)  # Center
-            time.sleep(0.05)
+            self.clock.sleep(0.05)
         self.logger.log("Pan test complete")
     
     def test_positioning(self):
@@ -711,13 +812,11 @@ class YamahaSimulatorGUI:
         for x, y in positions:
             self.send_position_x(1, x)
             self.send_position_y(1, y)
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
         self.logger.log("Positioning test complete")
     
-    def reset_all_controls(self):
-        """Reset all controls to default values"""
-        self.logger.log("Resetting all controls...")
-        
+    def send_reset_messages(self):
+        """Send every default value as its own message (289 messages)"""
         # Reset volumes
         for track in range(1, 49):
             self.send_track_volume(track, 100)
@@ -736,6 +835,15 @@ class YamahaSimulatorGUI:
         for track in range(1, 49):
             self.send_position_x(track, 0)
             self.send_position_y(track, 0)
+    
+    def reset_all_controls(self):
+        """Reset all controls to default values"""
+        self.logger.log("Resetting all controls...")
+        
+        if self.bulk_reset.get():
+            self.send_scene([dict(DEFAULT_TRACK) for _ in range(48)], 100)
+        else:
+            self.send_reset_messages()
         
         # Reset GUI controls
         self.master_volume.set(100)
@@ -761,6 +869,8 @@ class YamahaSimulatorGUI:
         self.logger.log("Yamaha 02R96-1 MIDI Simulator started")
         self.logger.log("Available tabs: Volume, Mute/Solo, Pan, 3D Position, Testing")
         self.root.mainloop()
+        self.output.close(timeout=1.0)
+        self.supervisor.stop()
     
     def __del__(self):
         """Cleanup on deletion"""
@@ -772,8 +882,24 @@ class YamahaSimulatorGUI:
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Yamaha 02R96-1 MIDI Simulator (GUI)")
+    parser.add_argument("--stamp", action="store_true",
+                        help="Follow every message with a sequence/timestamp SysEx")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve live Prometheus metrics on this local port")
+    parser.add_argument("--no-watch", action="store_true",
+                        help="Do not hot reload data/midi_mapping.json when it changes")
+    parser.add_argument("--no-reconnect", action="store_true",
+                        help="Do not reconnect and resync when the MIDI port disappears")
+    args = parser.parse_args()
+    
     try:
-        app = YamahaSimulatorGUI()
+        metrics = start_metrics_server(args.metrics_port) if args.metrics_port else None
+        app = YamahaSimulatorGUI(stamp=args.stamp, metrics=metrics)
+        if not args.no_watch:
+            app.watch_mappings()
+        if not args.no_reconnect:
+            app.supervise()
         app.run()
     except KeyboardInterrupt:
         print("\nShutting down simulator...")